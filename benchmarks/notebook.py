@@ -0,0 +1,107 @@
+"""Synthetic notebook generator for the benchmark suite."""
+
+import os
+import random
+from dataclasses import asdict, dataclass
+
+FRONT_MATTER_STYLES = ("none", "simple", "rich")
+SEARCH_TERM = "needle"
+
+_WORDS = (
+    "kubectl rollout restart deployment namespace pod service ingress helm chart "
+    "docker image build push tag registry terraform plan apply module state "
+    "ssh tunnel port forward netcat listener curl header token bearer json yaml "
+    "postgres vacuum index query replica backup restore cron job queue worker"
+).split()
+
+
+@dataclass(frozen=True)
+class NotebookShape:
+    notes: int = 1000
+    depth: int = 3
+    fanout: int = 8
+    note_size: int = 2048
+    front_matter: str = "simple"
+    binary_ratio: float = 0.0
+    hit_ratio: float = 0.05
+    seed: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _note_dir(root: str, n: int, shape: NotebookShape) -> str:
+    parts = []
+    bucket = n
+    for level in range(shape.depth):
+        bucket //= shape.fanout
+        parts.append(f"dir{level}_{bucket % shape.fanout}")
+    return os.path.join(root, *parts)
+
+
+def _front_matter(n: int, shape: NotebookShape, rng: random.Random) -> str:
+    if shape.front_matter == "none":
+        return ""
+    lines = ["---", f"description: Synthetic note {n} about {rng.choice(_WORDS)}"]
+    if shape.front_matter == "rich":
+        lines += [
+            f"format: {rng.choice(['slim', 'markdown'])}",
+            "placeholders:",
+            "  i: HOSTNAME",
+            "  j: NAMESPACE",
+            "  k: <TOKEN>",
+            f"tags: [{', '.join(rng.sample(_WORDS, 3))}]",
+            "owner:",
+            f"  team: team{n % 7}",
+            "  oncall: true",
+        ]
+    lines.append("---")
+    return "\n".join(lines) + "\n"
+
+
+def _body(n: int, shape: NotebookShape, rng: random.Random) -> str:
+    chunks = []
+    size = 0
+    block = 0
+    while size < shape.note_size:
+        if block % 4 == 3:
+            command = " ".join(rng.choices(_WORDS, k=6))
+            chunk = f"```bash\n{command} HOSTNAME -n NAMESPACE\n```\n"
+        else:
+            words = rng.choices(_WORDS, k=12)
+            if block % 5 == 0:
+                words[0] = "<red>" + words[0] + "<end>"
+            chunk = f"# Section {block}\n{' '.join(words)}\n"
+        chunks.append(chunk)
+        size += len(chunk)
+        block += 1
+    if rng.random() < shape.hit_ratio:
+        chunks.insert(len(chunks) // 2, f"The {SEARCH_TERM.upper()} is here.\n")
+    return "".join(chunks)
+
+
+def generate_notebook(root: str, shape: NotebookShape) -> dict:
+    if shape.front_matter not in FRONT_MATTER_STYLES:
+        raise ValueError(f"front_matter must be one of {FRONT_MATTER_STYLES}")
+    rng = random.Random(shape.seed)
+    created_dirs: set[str] = set()
+    counts = {"notes": 0, "binary": 0, "bytes": 0}
+    for n in range(shape.notes):
+        directory = _note_dir(root, n, shape)
+        if directory not in created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            created_dirs.add(directory)
+        if rng.random() < shape.binary_ratio:
+            data = b"\x89PNG\r\n\x1a\n" + rng.randbytes(max(shape.note_size - 8, 0))
+            path = os.path.join(directory, f"image{n:07}.png")
+            counts["binary"] += 1
+        else:
+            text = _front_matter(n, shape, rng) + _body(n, shape, rng)
+            data = text.encode("utf-8")
+            path = os.path.join(directory, f"note{n:07}.md")
+            counts["notes"] += 1
+        with open(path, "wb") as f:
+            f.write(data)
+        counts["bytes"] += len(data)
+    counts["directories"] = len(created_dirs)
+    return counts
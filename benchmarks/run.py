@@ -0,0 +1,259 @@
+"""Time noteagator's hot paths against a synthetic notebook.
+
+    python -m benchmarks.run --notes 10000 --front-matter rich -o results.json
+
+Results are written as JSON so runs from different releases can be diffed.
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from importlib import metadata
+
+import click
+
+from benchmarks.notebook import (
+    FRONT_MATTER_STYLES,
+    SEARCH_TERM,
+    NotebookShape,
+    generate_notebook,
+)
+from noteagator import fsutils, print_utils
+from noteagator.meta_cache import MetadataCache
+from noteagator.note import Note
+from noteagator.search_index import SearchIndex
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+class Context:
+    def __init__(self, root: str, app_path: str, sample_size: int) -> None:
+        self.root = root
+        self.app_path = app_path
+        paths = [p for p in fsutils.walk_files(root) if p.endswith(".md")]
+        step = max(len(paths) // max(sample_size, 1), 1)
+        self.sample = paths[::step][:sample_size]
+        self.largest = max(paths, key=os.path.getsize) if paths else None
+
+
+@contextlib.contextmanager
+def _quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@benchmark("ls_recursive")
+def bench_ls(ctx: Context):
+    with _quiet():
+        fsutils.print_directory_structure(ctx.root, ctx.root, max_depth=None)
+
+
+@benchmark("ls_recursive_cached")
+def bench_ls_cached(ctx: Context):
+    with _quiet(), MetadataCache(ctx.app_path) as cache:
+        fsutils.print_directory_structure(
+            ctx.root, ctx.root, max_depth=None, meta_cache=cache
+        )
+
+
+@benchmark("search_scan")
+def bench_search_scan(ctx: Context):
+    with _quiet():
+        fsutils.search_files(ctx.root, SEARCH_TERM)
+
+
+@benchmark("search_scan_jobs8")
+def bench_search_scan_parallel(ctx: Context):
+    with _quiet():
+        fsutils.search_files(ctx.root, SEARCH_TERM, jobs=8)
+
+
+@benchmark("index_rebuild")
+def bench_index_rebuild(ctx: Context):
+    index = SearchIndex(ctx.app_path, ctx.root)
+    index.rebuild()
+    index.close()
+
+
+@benchmark("index_refresh_unchanged")
+def bench_index_refresh(ctx: Context):
+    index = SearchIndex(ctx.app_path, ctx.root)
+    index.refresh()
+    index.close()
+
+
+@benchmark("index_search")
+def bench_index_search(ctx: Context):
+    index = SearchIndex(ctx.app_path, ctx.root)
+    index.search(SEARCH_TERM)
+    index.close()
+
+
+@benchmark("note_parse")
+def bench_note_parse(ctx: Context):
+    for path in ctx.sample:
+        Note(path).metadata
+
+
+@benchmark("format_note_body")
+def bench_format_note_body(ctx: Context):
+    for path in ctx.sample:
+        note = Note(path)
+        print_utils.format_note_body(
+            note.body, note.metadata, "host1", "ns1", "tok", None, None, None
+        )
+
+
+@benchmark("render_slim")
+def bench_render_slim(ctx: Context):
+    with _quiet():
+        for path in ctx.sample:
+            print_utils.print_note_slim(Note(path).body, None)
+
+
+@benchmark("render_markdown")
+def bench_render_markdown(ctx: Context):
+    with _quiet():
+        for path in ctx.sample:
+            print_utils.print_note_markdown(Note(path).body, None)
+
+
+@benchmark("render_slim_largest")
+def bench_render_slim_largest(ctx: Context):
+    if ctx.largest:
+        with _quiet():
+            print_utils.print_note_slim(Note(ctx.largest).body, None)
+
+
+@benchmark("jot_100")
+def bench_jot(ctx: Context):
+    for n in range(100):
+        fsutils.append_jot(ctx.app_path, f"benchmark entry {n}")
+
+
+def _time(func, ctx: Context, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(ctx)
+        runs.append(time.perf_counter() - start)
+    return {
+        "min_s": min(runs),
+        "median_s": statistics.median(runs),
+        "runs_s": runs,
+    }
+
+
+def _version() -> str:
+    try:
+        return metadata.version("noteagator")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+@click.command()
+@click.option("--notes", type=click.IntRange(1, None), default=1000, show_default=True)
+@click.option("--depth", type=click.IntRange(0, None), default=3, show_default=True)
+@click.option("--fanout", type=click.IntRange(1, None), default=8, show_default=True)
+@click.option("--note-size", type=int, default=2048, show_default=True)
+@click.option(
+    "--front-matter",
+    type=click.Choice(FRONT_MATTER_STYLES),
+    default="simple",
+    show_default=True,
+)
+@click.option("--binary-ratio", type=float, default=0.0, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--repeat", type=click.IntRange(1, None), default=3, show_default=True)
+@click.option(
+    "--sample",
+    type=click.IntRange(1, None),
+    default=50,
+    show_default=True,
+    help="Notes used by the per-note benchmarks.",
+)
+@click.option(
+    "--only",
+    multiple=True,
+    type=click.Choice(list(BENCHMARKS)),
+    help="Run only these benchmarks (repeatable).",
+)
+@click.option(
+    "--notebook",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Reuse (or create) the notebook here instead of a temp dir.",
+)
+@click.option("-o", "--output", type=click.File("w"), default="-")
+def main(
+    notes,
+    depth,
+    fanout,
+    note_size,
+    front_matter,
+    binary_ratio,
+    seed,
+    repeat,
+    sample,
+    only,
+    notebook,
+    output,
+):
+    """Run the noteagator benchmark suite and print JSON results."""
+    shape = NotebookShape(
+        notes=notes,
+        depth=depth,
+        fanout=fanout,
+        note_size=note_size,
+        front_matter=front_matter,
+        binary_ratio=binary_ratio,
+        seed=seed,
+    )
+    with tempfile.TemporaryDirectory(prefix="ngt-bench-") as tmp:
+        root = notebook or os.path.join(tmp, "notebook")
+        app_path = os.path.join(tmp, "app")
+        os.makedirs(app_path)
+        start = time.perf_counter()
+        if notebook and os.path.isdir(notebook) and os.listdir(notebook):
+            generated = None
+        else:
+            generated = generate_notebook(root, shape)
+        generate_s = time.perf_counter() - start
+
+        ctx = Context(root, app_path, sample)
+        results = {}
+        for name, func in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            click.echo(f"running {name}", err=True)
+            results[name] = _time(func, ctx, repeat)
+
+    report = {
+        "noteagator": _version(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "shape": shape.as_dict(),
+        "generated": generated,
+        "generate_s": generate_s,
+        "results": results,
+    }
+    json.dump(report, output, indent=4)
+    output.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import os
+import sys
+
+
+def _socket_path() -> str:
+    # daemon.socket_path(), spelled out so runs without a daemon skip
+    # importing the client and config.
+    return os.path.join(os.path.expanduser("~"), ".noteagator", "ngt.sock")
+
+
+def run() -> None:
+    """Console entry point: hand off to a running daemon, else run in-process."""
+    if os.path.exists(_socket_path()):
+        from noteagator.daemon import forward
+
+        exit_code = forward(sys.argv[1:])
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    from noteagator.main import main
+
+    main()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import time
+
+import click
+
+from noteagator import daemon
+
+
+@click.group(name="daemon")
+def daemon_group():
+    """\b
+    Run a resident ngt server so commands skip startup and rescans.
+    While it runs, other ngt commands are forwarded to it; set
+    NGT_NO_DAEMON=1 to run a command in-process anyway.
+    """
+
+
+@daemon_group.command(name="start")
+@click.option(
+    "-f", "--foreground", is_flag=True, help="Serve in this process until stopped."
+)
+def start_cmd(foreground):
+    """Start the daemon in the background."""
+    status = daemon.request({"op": "status"})
+    if status is not None:
+        click.echo(f"ngt daemon already running (pid {status['pid']}).")
+        return
+    if foreground:
+        daemon.serve()
+        return
+    status = daemon.start()
+    if status is None:
+        raise click.ClickException(
+            f"ngt daemon did not start; see {daemon.default_app_path()}/"
+            f"{daemon.LOG_NAME}"
+        )
+    click.echo(f"ngt daemon started (pid {status['pid']}).")
+
+
+@daemon_group.command(name="stop")
+def stop_cmd():
+    """Stop the running daemon."""
+    status = daemon.request({"op": "stop"})
+    if status is None:
+        click.echo("ngt daemon is not running.")
+    else:
+        click.echo(f"ngt daemon stopped (pid {status['pid']}).")
+
+
+@daemon_group.command(name="status")
+def status_cmd():
+    """Show whether the daemon is running."""
+    status = daemon.request({"op": "status"})
+    if status is None:
+        click.echo("ngt daemon is not running.")
+        raise SystemExit(1)
+    uptime = int(time.time() - status["started"])
+    click.echo(
+        f"ngt daemon running (pid {status['pid']}, up {uptime}s, "
+        f"{status['requests']} commands served) on {daemon.socket_path()}"
+    )
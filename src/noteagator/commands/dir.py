@@ -3,7 +3,6 @@ from __future__ import annotations
 import click
 
 from noteagator.config import Config
-from noteagator.fsutils import print_directory_structure, resolve_cd_target, verify_path
 
 
 @click.command(name="ls")
@@ -17,20 +16,83 @@ from noteagator.fsutils import print_directory_structure, resolve_cd_target, ver
 @click.option(
     "-R", "--recursive", is_flag=True, help="Display subdirectories recursively"
 )
-def ls_cmd(max_depth, recursive) -> None:
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(1, None),
+    default=1,
+    help="Prefetch listings and descriptions with N threads (for slow disks).",
+)
+def ls_cmd(max_depth, recursive, jobs) -> None:
     """
     List notes and folders in the notebook.
     """
+    from noteagator.daemon import open_metadata_cache
+    from noteagator.fsutils import print_directory_structure
+
     cfg = Config()
     if recursive:
         max_depth = None
 
-    s = print_directory_structure(
-        cfg.notebook_cwd, cfg.notebook_base_dir, max_depth=max_depth
-    )
+    with open_metadata_cache(cfg.app_path) as meta_cache:
+        s = print_directory_structure(
+            cfg.notebook_cwd,
+            cfg.notebook_base_dir,
+            max_depth=max_depth,
+            meta_cache=meta_cache,
+            jobs=jobs,
+        )
     cfg.display_index = s
 
 
+@click.command(
+    name="find",
+    help="""\b
+Find notes and folders by fuzzy-matching their paths.
+Every word must appear in the path relative to the notebook base or share
+at least half of its three-letter runs with it (so typos still match);
+matches in the file name rank first. Use the numbers with print and cd.
+Examples:
+  ngt find deploy
+  ngt find k8s rolout
+""",
+)
+@click.argument("query", nargs=-1, required=True)
+@click.option(
+    "-n",
+    "--limit",
+    type=click.IntRange(1, None),
+    default=20,
+    show_default=True,
+    help="Show at most N results.",
+)
+@click.option(
+    "--no-refresh",
+    is_flag=True,
+    help="Answer from the path index as-is without checking for changes.",
+)
+@click.option("--rebuild", is_flag=True, help="Discard the index and walk again.")
+def find_cmd(query, limit, no_refresh, rebuild) -> None:
+    from noteagator.daemon import open_metadata_cache, open_path_index
+    from noteagator.fsutils import collect_results, iter_path_results
+
+    cfg = Config()
+    with open_path_index(cfg.app_path, cfg.notebook_base_dir) as index:
+        if rebuild:
+            index.rebuild()
+        elif not no_refresh:
+            index.refresh()
+        matches = index.find(" ".join(query), limit)
+    s = {}
+    with open_metadata_cache(cfg.app_path) as meta_cache:
+        hits = iter_path_results(
+            cfg.notebook_base_dir, [(m.path, m.is_dir) for m in matches], meta_cache
+        )
+        collect_results(hits, s)
+    if s:
+        cfg.display_index = s
+
+
 @click.command(name="cd")
 @click.argument("arg", type=str)
 def cd_cmd(arg: str) -> None:
@@ -41,8 +103,10 @@ def cd_cmd(arg: str) -> None:
         ngt cd ..
         ngt cd /
     """
+    from noteagator.fsutils import resolve_cd_target
+
     cfg = Config()
-    entry = (cfg.display_index or {}).get(arg) or {}
+    entry = cfg.display_entry(arg)
     entry_path = entry.get("absolute_path")
     node_type = entry.get("type")
 
@@ -61,10 +125,13 @@ def set_notebook_base(path):
     """
     Set the notebook base directory.
     """
+    from noteagator.fsutils import verify_path
+
     p = verify_path(path)
     cfg = Config()
-    cfg.notebook_base_dir = p
-    cfg.notebook_cwd = p
+    with cfg.transaction():
+        cfg.notebook_base_dir = p
+        cfg.notebook_cwd = p
 
 
 @click.command(name="show-base")
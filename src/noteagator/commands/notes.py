@@ -1,29 +1,159 @@
 from __future__ import annotations
 
+import os
+import sys
+from itertools import chain, islice
+
 import click
-import yaml
 
 from noteagator.config import Config
-from noteagator.fsutils import append_jot, search_files
+from noteagator.fsutils import (
+    append_jot,
+    append_jots,
+    collect_results,
+    iter_search_files,
+    iter_search_results,
+)
 from noteagator.note import Note
 from noteagator.print_utils import (
+    capture_stdout,
+    code_block_text,
     format_note_body,
+    format_note_chunks,
     get_fmt,
     print_note_markdown,
-    print_note_slim,
+    write_note_slim,
+)
+
+
+@click.command(
+    name="search",
+    help="""\b
+Search notes for one or more terms.
+Each argument is a term; quote multi-word phrases. Notes must contain every
+term, a bare OR starts an alternative, and /.../ is a case-insensitive regex.
+Examples:
+  ngt search k8s
+  ngt search kubectl "rollout restart"
+  ngt search helm OR kubectl --rank --limit 10
+  ngt search --first rollout
+  ngt search '/port\\s+\\d{4}/'
+  ngt search --meta tags=k8s --meta owner.team=sre rollout
+  ngt search --meta 'description=deploy*'
+""",
+)
+@click.argument("search_terms", nargs=-1)
+@click.option(
+    "--scan", is_flag=True, help="Read every note instead of using the search index."
+)
+@click.option(
+    "--no-refresh",
+    is_flag=True,
+    help=(
+        "Answer from the index as-is, skipping the check for changed notes "
+        "(a stat per note; only changed directories are listed)."
+    ),
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(1, None),
+    default=None,
+    help="Scan files with N parallel readers (implies --scan).",
+)
+@click.option("-r", "--rank", is_flag=True, help="Order results by relevance (BM25).")
+@click.option(
+    "-n",
+    "--limit",
+    type=click.IntRange(1, None),
+    default=None,
+    help="Stop after N results (without --rank, no further notes are read).",
+)
+@click.option("--first", is_flag=True, help="Stop at the first result (--limit 1).")
+@click.option(
+    "-m",
+    "--meta",
+    "meta_specs",
+    multiple=True,
+    metavar="KEY[=VALUE[*]]",
+    help="Only notes whose front matter matches (repeatable).",
 )
+def search(search_terms, scan, no_refresh, jobs, rank, limit, first, meta_specs):
+    from noteagator.daemon import open_metadata_cache, open_search_index
+    from noteagator.query import MetaFilter, Query
 
+    if not search_terms and not meta_specs:
+        raise click.UsageError("Give at least one search term or --meta filter.")
+    try:
+        filters = [MetaFilter.parse(spec) for spec in meta_specs]
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--meta")
+    try:
+        query = Query.parse(search_terms) if search_terms else None
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="SEARCH_TERMS")
 
-@click.command(name="search")
-@click.argument("search_term")
-def search(search_term):
+    if first:
+        limit = 1
+    cfg = Config()
+    s = {}
+    try:
+        with open_metadata_cache(cfg.app_path, cfg.notebook_base_dir) as meta_cache:
+            only_paths = None
+            if filters:
+                if not no_refresh:
+                    meta_cache.refresh(cfg.notebook_base_dir)
+                only_paths = meta_cache.find(cfg.notebook_base_dir, filters)
+            if query is None:
+                hits = iter_search_results(
+                    cfg.notebook_base_dir, only_paths[:limit], meta_cache
+                )
+                collect_results(hits, s)
+            elif scan or jobs:
+                hits = iter_search_files(
+                    cfg.notebook_base_dir,
+                    query,
+                    jobs=jobs or 1,
+                    meta_cache=meta_cache,
+                    rank=rank,
+                    limit=limit,
+                    only_paths=None if only_paths is None else set(only_paths),
+                )
+                collect_results(hits, s)
+            else:
+                with open_search_index(cfg.app_path, cfg.notebook_base_dir) as index:
+                    if not no_refresh:
+                        index.refresh()
+                    wanted = None if only_paths is None else set(only_paths)
+                    if rank:
+                        paths = iter(index.ranked(query, wanted))
+                    else:
+                        paths = index.iter_search(query, wanted)
+                    hits = iter_search_results(
+                        cfg.notebook_base_dir, islice(paths, limit), meta_cache
+                    )
+                    collect_results(hits, s)
+    finally:
+        # Results printed before an interrupt are still numbered for ngt print.
+        if s:
+            cfg.display_index = s
+
+
+@click.command(name="index")
+@click.option(
+    "--rebuild", is_flag=True, help="Discard the index and re-read every note."
+)
+def index_cmd(rebuild):
     """
-    Search notes for a term
+    Update the search index (only changed notes are re-read).
     """
+    from noteagator.daemon import open_search_index
+
     cfg = Config()
-    s = search_files(cfg.notebook_base_dir, search_term)
-    if s:
-        cfg.display_index = s
+    with open_search_index(cfg.app_path, cfg.notebook_base_dir) as index:
+        changed = index.rebuild() if rebuild else index.refresh()
+        stats = index.stats()
+    click.echo(f"Indexed {stats['files']} notes ({changed} updated).")
 
 
 @click.command(name="jot")
@@ -31,8 +161,13 @@ def search(search_term):
 def daily_note(note):
     """
     Append text to jots/MM-DD-YYYY.md (creates if missing).
+
+    With NOTE set to -, each line read from stdin is appended as its own jot.
     """
     cfg = Config()
+    if note == "-":
+        append_jots(cfg.notebook_base_dir, click.get_binary_stream("stdin"))
+        return
     append_jot(cfg.notebook_base_dir, note)
 
 
@@ -64,6 +199,11 @@ Replacements:
 )
 @click.argument("index", type=str)
 @click.option("-c", "--copy", "copy", type=click.IntRange(1, None), default=None)
+@click.option(
+    "--copy-only",
+    is_flag=True,
+    help="Copy the -c block to the clipboard without printing the note.",
+)
 @click.option("-i", "i", help="Replacement value for the 'i' placeholder.")
 @click.option("-j", "j", help="Replacement value for the 'j' placeholder.")
 @click.option("-k", "k", help="Replacement value for the 'k' placeholder.")
@@ -77,17 +217,131 @@ Replacements:
     default=None,
     show_default=True,
 )
-def prt(index, copy, i, j, k, u, d, p, fmt):
+@click.option(
+    "--no-cache", is_flag=True, help="Render again instead of using cached output."
+)
+@click.option(
+    "--section",
+    default=None,
+    help="Print only the section under this heading (and its subsections).",
+)
+@click.option(
+    "--lines",
+    "line_range",
+    metavar="START:END",
+    default=None,
+    help="Print only these lines of the note file (inclusive; either side optional).",
+)
+def prt(index, copy, copy_only, i, j, k, u, d, p, fmt, no_cache, section, line_range):
     """
     Render a note (markdown or slim).
     """
+    from noteagator.outline import parse_line_range
+    from noteagator.render_cache import (
+        MAX_ENTRY_BYTES,
+        RenderCache,
+        terminal_signature,
+    )
+
+    if copy_only and copy is None:
+        raise click.UsageError("--copy-only needs -c N.")
+    if section is not None and line_range is not None:
+        raise click.UsageError("--section and --lines cannot be combined.")
+    lines = None
+    if line_range is not None:
+        try:
+            lines = parse_line_range(line_range)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--lines")
     cfg = Config()
-    n = Note(cfg.return_file_path(index))
-    body = format_note_body(n.body, n.metadata, i, j, k, u, d, p)
-    print_fmt = get_fmt(fmt, cfg.print_mode, n.metadata.get("format"))
+    path = cfg.return_file_path(index)
+    values = {"i": i, "j": j, "k": k, "u": u, "d": d, "p": p}
+    if copy_only:
+        _copy_block(path, copy, values)
+        return
+    if section is not None or lines is not None:
+        _print_part(cfg, path, values, copy, fmt, section, lines)
+        return
+    if os.path.getsize(path) > MAX_ENTRY_BYTES:
+        _render_note(path, values, copy, fmt, cfg.print_mode)
+        return
+    cache = RenderCache(cfg.app_path)
+    with open(path, "rb") as f:
+        content = f.read()
+    # The rendered front matter names the note, so identical notes elsewhere
+    # must not share an entry.
+    key = cache.key(
+        content,
+        path=os.path.realpath(path),
+        fmt=fmt,
+        print_mode=cfg.print_mode,
+        values=values,
+        copy=copy,
+        terminal=terminal_signature(),
+    )
+    cached = None if no_cache else cache.get(key)
+    if cached is not None:
+        cached.write_to(sys.stdout)
+        if cached.copy_text is not None:
+            import pyperclip
+
+            pyperclip.copy(cached.copy_text)
+        return
+
+    with capture_stdout() as out:
+        copied = _render_note(path, values, copy, fmt, cfg.print_mode)
+    sys.stdout.write(out.getvalue())
+    if copy is None or copied is not None:
+        cache.put(key, out.getvalue(), copied)
+
+
+def _copy_block(path, copy, values):
+    import pyperclip
+
+    n = Note(path)
+    code = code_block_text(n.body, copy)
+    if not code:
+        raise click.ClickException(f"No --copy {copy} block found.")
+    pyperclip.copy(format_note_body(code, n.metadata, **values))
+    click.echo(f"Copied code block {copy}.", err=True)
+
+
+def _print_part(cfg, path, values, copy, fmt, section, lines):
+    # Only the requested lines are read, found through the note's outline.
+    from noteagator.outline import OutlineCache
+
+    with OutlineCache(cfg.app_path) as outlines:
+        outline = outlines.get(path)
+    if section is not None:
+        try:
+            lines = outline.section(section)
+        except KeyError:
+            titles = ", ".join(repr(h.title) for h in outline.headings) or "none"
+            raise click.ClickException(
+                f"No section {section!r} in this note (headings: {titles})."
+            )
+    start, stop = outline.clamp(*lines)
+    first_block, fence = outline.open_block(start)
+    chunks = outline.read(path, start, stop)
+    if fence is not None:
+        chunks = chain([fence.text + "\n"], chunks)
+    n = Note(path)
+    chunks = format_note_chunks(chunks, n.metadata, **values)
+    if get_fmt(fmt, cfg.print_mode, n.metadata.get("format")) == "slim":
+        write_note_slim(chunks, copy, first_block=first_block)
+    else:
+        print_note_markdown("".join(chunks), copy, first_block)
+
+
+def _render_note(path, values, copy, fmt, print_mode):
+    import yaml
+
+    n = Note(path)
+    print_fmt = get_fmt(fmt, print_mode, n.metadata.get("format"))
     print(yaml.dump(n.metadata, default_flow_style=False).strip())
     print("---")
     if print_fmt == "slim":
-        print_note_slim(body, copy)
-    else:
-        print_note_markdown(body, copy)
+        chunks = format_note_chunks(n.iter_body_chunks(), n.metadata, **values)
+        return write_note_slim(chunks, copy)
+    body = format_note_body(n.body, n.metadata, **values)
+    return print_note_markdown(body, copy)
@@ -1,34 +1,188 @@
 import json
 import os
+import re
 import sys
+import tempfile
+from contextlib import contextmanager
 from functools import cached_property
 from pathlib import Path
 from types import MappingProxyType
 from typing import Any
 
+try:
+    import fcntl
+except ImportError:  # Windows: writes are atomic but not serialized.
+    fcntl = None
+
+from .display_index import DISPLAY_INDEX_FILE_NAME, DisplayIndexStore
+
 CONFIG_DIR_NAME = ".noteagator"
 DEFAULT_NOTEBOOK = "notebook"
+SESSIONS_DIR_NAME = "sessions"
+SESSION_FILE_NAME = "session.json"
+SESSION_ENV = "NGT_SESSION"
+# Keys kept per session when one is active; everything else is shared.
+SESSION_KEYS = frozenset({"cwd"})
+
+
+def _tty_name() -> str | None:
+    for fd in (0, 1, 2):
+        try:
+            return os.ttyname(fd)
+        except OSError:
+            continue
+    return None
+
+
+def session_name() -> str | None:
+    """The session named by ``NGT_SESSION``, or None for shared state.
+
+    ``NGT_SESSION=auto`` names the session after the tmux pane or, outside
+    tmux, the terminal device; any other value is used as the name.
+    """
+    value = os.environ.get(SESSION_ENV, "").strip()
+    if value.lower() == "auto":
+        value = os.environ.get("TMUX_PANE") or _tty_name() or ""
+    return re.sub(r"[^\w.-]+", "_", value).strip("_.") or None
+
+
+def _merge_changes(
+    current: dict[str, Any], data: dict[str, Any], dirty: set[str]
+) -> dict[str, Any]:
+    merged = dict(current)
+    for key in dirty:
+        if key in data:
+            merged[key] = data[key]
+        else:
+            merged.pop(key, None)
+    return merged
 
 
 class Config:
     def __init__(self, home_dir: str | None = None) -> None:
         self._home_dir = home_dir
+        self._batch_depth = 0
+        self.session = session_name()
         self.ensure_app_path()
         self.ensure_config_path()
         self._config_data: dict[str, Any] = self._get_config()
+        self._dirty: set[str] = set()
+        self._session_data: dict[str, Any] = {}
+        if self.session is not None:
+            self._session_data = self._read_json(self.session_file_path)
+        self._session_dirty: set[str] = set()
         self.ensure_config_keys()
 
-    def _get_config(self) -> dict[str, Any]:
+    @staticmethod
+    def _read_json(path: str) -> dict[str, Any]:
         try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
+            with open(path, "r", encoding="utf-8") as f:
                 data = json.load(f)
                 return data if isinstance(data, dict) else {}
         except (FileNotFoundError, json.JSONDecodeError):
             return {}
 
+    def _get_config(self) -> dict[str, Any]:
+        return self._read_json(self.config_path)
+
+    @staticmethod
+    def _write_json(path: str, data: dict[str, Any]) -> None:
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(data, file, indent=4, ensure_ascii=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
     def _write_config_file(self, config_data: dict[str, Any]) -> None:
-        with open(self.config_path, "w", encoding="utf-8") as file:
-            json.dump(config_data, file, indent=4, ensure_ascii=False)
+        self._write_json(self.config_path, config_data)
+
+    @contextmanager
+    def _locked(self):
+        """Serialize read-modify-write cycles with other ngt processes.
+
+        The lock is taken on the app directory itself, since config.json is
+        replaced (not rewritten) on every save.
+        """
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.app_path, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _save(self) -> None:
+        # Only the keys changed here are written over the file's current
+        # contents, so concurrent ngt processes do not undo each other.
+        if self._batch_depth or not (self._dirty or self._session_dirty):
+            return
+        with self._locked():
+            if self._dirty:
+                current = self._get_config()
+                merged = _merge_changes(current, self._config_data, self._dirty)
+                if merged != current:
+                    self._write_config_file(merged)
+                self._config_data, self._dirty = merged, set()
+            if self._session_dirty:
+                current = self._read_json(self.session_file_path)
+                merged = _merge_changes(
+                    current, self._session_data, self._session_dirty
+                )
+                if merged != current:
+                    os.makedirs(self.session_path, exist_ok=True)
+                    self._write_json(self.session_file_path, merged)
+                self._session_data, self._session_dirty = merged, set()
+
+    @contextmanager
+    def transaction(self):
+        """Batch several updates into a single write of config.json.
+
+        Changes made inside the block are discarded if it raises.
+        """
+        snapshot = (
+            dict(self._config_data),
+            set(self._dirty),
+            dict(self._session_data),
+            set(self._session_dirty),
+        )
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            (
+                self._config_data,
+                self._dirty,
+                self._session_data,
+                self._session_dirty,
+            ) = snapshot
+            raise
+        finally:
+            self._batch_depth -= 1
+        self._save()
+
+    def _get(self, key: str) -> Any:
+        if key in SESSION_KEYS and self._session_data.get(key):
+            return self._session_data[key]
+        return self._config_data.get(key)
+
+    def _set(self, key: str, value: Any) -> None:
+        if self.session is not None and key in SESSION_KEYS:
+            self._session_data[key] = value
+            self._session_dirty.add(key)
+        else:
+            self._config_data[key] = value
+            self._dirty.add(key)
+        self._save()
 
     @cached_property
     def app_path(self) -> str:
@@ -39,6 +193,38 @@ class Config:
     def config_path(self) -> str:
         return os.path.join(self.app_path, "config.json")
 
+    @cached_property
+    def session_path(self) -> str | None:
+        if self.session is None:
+            return None
+        return os.path.join(self.app_path, SESSIONS_DIR_NAME, self.session)
+
+    @cached_property
+    def session_file_path(self) -> str | None:
+        if self.session is None:
+            return None
+        return os.path.join(self.session_path, SESSION_FILE_NAME)
+
+    @cached_property
+    def display_index_path(self) -> str:
+        return os.path.join(self.session_path or self.app_path, DISPLAY_INDEX_FILE_NAME)
+
+    @cached_property
+    def display_index_store(self) -> DisplayIndexStore:
+        return DisplayIndexStore(self.display_index_path)
+
+    @cached_property
+    def shared_display_index_store(self) -> DisplayIndexStore:
+        return DisplayIndexStore(os.path.join(self.app_path, DISPLAY_INDEX_FILE_NAME))
+
+    @property
+    def _readable_display_index_store(self) -> DisplayIndexStore:
+        # A session that has not listed anything yet sees the shared index.
+        store = self.display_index_store
+        if self.session is not None and not store.exists():
+            return self.shared_display_index_store
+        return store
+
     @cached_property
     def default_notebook_path(self) -> str:
         path: str = os.path.join(self.app_path, DEFAULT_NOTEBOOK)
@@ -52,8 +238,9 @@ class Config:
     @config_data.setter
     def config_data(self, value: dict[str, Any]) -> None:
         data: dict = dict(value)
+        self._dirty |= self._config_data.keys() | data.keys()
         self._config_data = data
-        self._write_config_file(self._config_data)
+        self._save()
 
     @property
     def notebook_base_dir(self) -> str:
@@ -61,26 +248,28 @@ class Config:
 
     @notebook_base_dir.setter
     def notebook_base_dir(self, value: str) -> None:
-        self._config_data["base"] = value
-        self._write_config_file(self._config_data)
+        self._set("base", value)
 
     @property
     def display_index(self) -> dict[str, Any]:
-        return self._config_data.get("display_index", {})
+        return self._readable_display_index_store.load()
 
     @display_index.setter
     def display_index(self, value: dict[str, Any]) -> None:
-        self._config_data["display_index"] = value
-        self._write_config_file(self._config_data)
+        if self.session_path is not None:
+            os.makedirs(self.session_path, exist_ok=True)
+        self.display_index_store.write(value)
+
+    def display_entry(self, index) -> dict[str, Any]:
+        return self._readable_display_index_store.get(index) or {}
 
     @property
     def notebook_cwd(self) -> str:
-        return self._config_data.get("cwd")
+        return self._get("cwd")
 
     @notebook_cwd.setter
     def notebook_cwd(self, value: str) -> None:
-        self._config_data["cwd"] = value
-        self._write_config_file(self._config_data)
+        self._set("cwd", value)
 
     @property
     def print_mode(self) -> str:
@@ -88,39 +277,59 @@ class Config:
 
     @print_mode.setter
     def print_mode(self, value: str) -> None:
-        self._config_data["print_mode"] = value
-        self._write_config_file(self._config_data)
+        self._set("print_mode", value)
 
     def ensure_app_path(self) -> None:
         os.makedirs(self.app_path, exist_ok=True)
 
     def ensure_config_path(self) -> None:
-        if not os.path.exists(self.config_path):
-            nb_home = self.default_notebook_path
-            self._write_config_file({"base": nb_home, "cwd": nb_home})
+        if os.path.exists(self.config_path):
+            return
+        with self._locked():
+            if not os.path.exists(self.config_path):
+                nb_home = self.default_notebook_path
+                self._write_config_file({"base": nb_home, "cwd": nb_home})
 
     def ensure_config_keys(self) -> None:
         changed: bool = False
         if not self._config_data.get("base") or self._config_data["base"] is None:
             self._config_data["base"] = self.default_notebook_path
+            self._dirty.add("base")
             changed = True
         if not self._config_data.get("cwd") or self._config_data["cwd"] is None:
             self._config_data["cwd"] = self.default_notebook_path
+            self._dirty.add("cwd")
             changed = True
         cwd_path = Path(self._config_data.get("cwd"))
         if not cwd_path.is_dir():
             self._config_data["cwd"] = self._config_data.get("base")
+            self._dirty.add("cwd")
+            changed = True
+        session_cwd = self._session_data.get("cwd")
+        if session_cwd and not Path(session_cwd).is_dir():
+            del self._session_data["cwd"]
+            self._session_dirty.add("cwd")
             changed = True
         if (
             not self._config_data.get("print_mode")
             or self._config_data["print_mode"] is None
         ):
             self._config_data["print_mode"] = "markdown"
+        if "display_index" in self._config_data:
+            legacy = self._config_data.pop("display_index")
+            self._dirty.add("display_index")
+            store = self.shared_display_index_store
+            if isinstance(legacy, dict) and not store.exists():
+                try:
+                    store.write(legacy)
+                except ValueError:
+                    pass
+            changed = True
         if changed:
-            self._write_config_file(self._config_data)
+            self._save()
 
     def return_file_path(self, index) -> str:
-        entry = (self.display_index or {}).get(index) or {}
+        entry = self.display_entry(index)
         node_type = entry.get("type")
         path = entry.get("absolute_path")
         if node_type == "file":
@@ -0,0 +1,496 @@
+import errno
+import io
+import json
+import os
+import struct
+import sys
+import time
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+
+from .config import CONFIG_DIR_NAME, SESSION_ENV, session_name
+
+SOCKET_NAME = "ngt.sock"
+LOG_NAME = "daemon.log"
+PROTOCOL_VERSION = 2
+NO_DAEMON_ENV = "NGT_NO_DAEMON"
+CONNECT_TIMEOUT = 0.5
+START_TIMEOUT = 5.0
+# Output is sent to the client in frames of about this many characters, or
+# sooner when the command flushes.
+FRAME_CHARS = 64 * 1024
+
+# Commands that always run in the calling process.
+LOCAL_COMMANDS = {"daemon"}
+# Client environment applied to each forwarded command (terminal size, color
+# preferences, the display used for clipboard copies and the ngt session).
+FORWARDED_ENV = (
+    "COLUMNS",
+    "LINES",
+    "TERM",
+    "NO_COLOR",
+    "FORCE_COLOR",
+    "DISPLAY",
+    "WAYLAND_DISPLAY",
+    SESSION_ENV,
+)
+
+_HEADER = struct.Struct("!I")
+
+_resident: "_Resident | None" = None
+
+
+def default_app_path() -> str:
+    return os.path.join(os.path.expanduser("~"), CONFIG_DIR_NAME)
+
+
+def socket_path(app_path: str | None = None) -> str:
+    return os.path.join(app_path or default_app_path(), SOCKET_NAME)
+
+
+def _send(sock, message: dict) -> None:
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock, size: int) -> bytes | None:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(min(size - len(buf), 1 << 20))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def _recv(sock) -> dict | None:
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    data = _recv_exact(sock, _HEADER.unpack(header)[0])
+    return None if data is None else json.loads(data)
+
+
+def _connect(path: str):
+    if not os.path.exists(path):
+        return None
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(path)
+        sock.settimeout(None)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def request(message: dict, path: str | None = None) -> dict | None:
+    """Send one message to the daemon; None if it is not running."""
+    sock = _connect(path or socket_path())
+    if sock is None:
+        return None
+    with sock:
+        try:
+            _send(sock, dict(message, version=PROTOCOL_VERSION))
+            response = _recv(sock)
+        except OSError:
+            return None
+    if response is None or "error" in response:
+        return None
+    return response
+
+
+def _command_name(argv) -> str | None:
+    return next((arg for arg in argv if not arg.startswith("-")), None)
+
+
+def forward(argv, path: str | None = None) -> int | None:
+    """Run a CLI invocation in the daemon, writing its output as it arrives.
+
+    Returns the exit code, or None when the command should run in-process
+    (daemon disabled or not running, or a local-only command).
+    """
+    if os.environ.get(NO_DAEMON_ENV):
+        return None
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    name = _command_name(argv)
+    if name is None or name in LOCAL_COMMANDS:
+        return None
+    if "-" in argv:
+        # The command reads stdin, which only this process has.
+        return None
+    stdout, stderr = sys.stdout, sys.stderr
+    tty = stdout.isatty()
+    env = {key: os.environ[key] for key in FORWARDED_ENV if key in os.environ}
+    # Resolved here: the daemon has neither the caller's tty nor its tmux pane.
+    session = session_name()
+    if session is None:
+        env.pop(SESSION_ENV, None)
+    else:
+        env[SESSION_ENV] = session
+    if tty and "COLUMNS" not in env:
+        import shutil
+
+        size = shutil.get_terminal_size()
+        env.update(COLUMNS=str(size.columns), LINES=str(size.lines))
+    sock = _connect(path)
+    if sock is None:
+        return None
+    with sock:
+        message = {
+            "op": "run",
+            "argv": list(argv),
+            "cwd": os.getcwd(),
+            "tty": tty,
+            "env": env,
+            "version": PROTOCOL_VERSION,
+        }
+        try:
+            _send(sock, message)
+            frame = _recv(sock)
+        except OSError:
+            return None
+        if frame is None or "error" in frame:
+            return None
+        # Closing the socket early (reader gone, Ctrl-C) makes the daemon's
+        # next write fail, which stops the command there.
+        try:
+            while "exit_code" not in frame:
+                for key, stream in (("stdout", stdout), ("stderr", stderr)):
+                    if key in frame:
+                        stream.write(frame[key])
+                        stream.flush()
+                frame = _recv(sock)
+                if frame is None:
+                    stderr.write("ngt daemon went away before the command ended.\n")
+                    return 1
+        except BrokenPipeError:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, stdout.fileno())
+            return 0
+        except KeyboardInterrupt:
+            stderr.write("\nAborted!\n")
+            return 1
+    return frame["exit_code"]
+
+
+class _Client:
+    def __init__(self, sock) -> None:
+        self._sock = sock
+        self.gone = False
+
+    def send(self, message: dict) -> bool:
+        if self.gone:
+            return False
+        try:
+            _send(self._sock, message)
+        except OSError:
+            self.gone = True
+        return not self.gone
+
+
+class _StreamedOutput(io.TextIOBase):
+    """stdout or stderr of a forwarded command, sent to the client in frames.
+    Once the client is gone the failing flush raises BrokenPipeError, as a
+    closed pipe would, and later output is dropped."""
+
+    def __init__(self, client: _Client, name: str, tty: bool) -> None:
+        self._client = client
+        self._name = name
+        self._tty = tty
+        self._parts: list[str] = []
+        self._size = 0
+
+    def isatty(self) -> bool:
+        return self._tty
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            # Like StringIO; click probes streams with b"" to find binary ones.
+            raise TypeError(f"write() argument must be str, not {type(text)}")
+        if self._client.gone:
+            return len(text)
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= FRAME_CHARS or (self._tty and "\n" in text):
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if not self._parts:
+            return
+        data = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        if not self._client.send({self._name: data}):
+            raise BrokenPipeError(errno.EPIPE, "ngt client went away")
+
+
+@contextmanager
+def _client_context(message: dict):
+    saved_env = {key: os.environ.get(key) for key in FORWARDED_ENV}
+    saved_cwd = os.getcwd()
+    env = message.get("env") or {}
+    for key in FORWARDED_ENV:
+        if key in env:
+            os.environ[key] = env[key]
+        else:
+            os.environ.pop(key, None)
+    try:
+        os.chdir(message.get("cwd") or saved_cwd)
+    except OSError:
+        pass
+    try:
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _run(message: dict, client: _Client) -> dict:
+    import traceback
+
+    from .main import main
+
+    tty = bool(message.get("tty"))
+    out = _StreamedOutput(client, "stdout", tty)
+    err = _StreamedOutput(client, "stderr", tty)
+    with _client_context(message), redirect_stdout(out), redirect_stderr(err):
+        saved_stdin, sys.stdin = sys.stdin, io.StringIO()
+        try:
+            main.main(args=message.get("argv", []), prog_name="ngt")
+            exit_code = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdin = saved_stdin
+        for stream in (out, err):
+            try:
+                stream.flush()
+            except BrokenPipeError:
+                pass
+    return {"exit_code": exit_code}
+
+
+class _Resident:
+    def __init__(self, app_path: str) -> None:
+        self.app_path = app_path
+        self.started = time.time()
+        self.requests = 0
+        self._meta_cache = None
+        self._index = None
+        self._path_index = None
+        self._watcher = None
+        self._watching: list = []
+
+    def _subscribe(self, consumer, base: str) -> None:
+        # One watcher per base, shared by the cache and the index; each gets
+        # its own subscription so both see every change.
+        from .watcher import Watcher
+
+        if self._watcher is None or self._watcher.base != base:
+            if self._watcher is not None:
+                self._watcher.close()
+            self._watcher = Watcher(base)
+            self._watching = []
+        if not any(c is consumer for c in self._watching):
+            consumer.watch(self._watcher.subscribe())
+            self._watching.append(consumer)
+
+    def metadata_cache(self, base: str | None = None):
+        from .meta_cache import MetadataCache
+
+        if self._meta_cache is None:
+            self._meta_cache = MetadataCache(self.app_path)
+        if base is not None:
+            self._subscribe(self._meta_cache, base)
+        return self._meta_cache
+
+    def search_index(self, base: str):
+        from .search_index import SearchIndex
+
+        if self._index is not None and self._index.base != base:
+            self._index.close()
+            self._index = None
+        if self._index is None:
+            self._index = SearchIndex(self.app_path, base)
+        else:
+            self._index.sync()
+        self._subscribe(self._index, base)
+        return self._index
+
+    def path_index(self, base: str):
+        from .path_index import PathIndex
+
+        if self._path_index is not None and self._path_index.base != base:
+            self._path_index.close()
+            self._path_index = None
+        if self._path_index is None:
+            self._path_index = PathIndex(self.app_path, base)
+        return self._path_index
+
+    def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.close()
+        if self._meta_cache is not None:
+            self._meta_cache.close()
+        if self._index is not None:
+            self._index.close()
+        if self._path_index is not None:
+            self._path_index.close()
+
+
+@contextmanager
+def open_metadata_cache(app_path: str, base: str | None = None):
+    """The daemon's open metadata cache, or a fresh one outside the daemon.
+
+    Passing ``base`` lets the daemon's cache refresh from a watcher on it.
+    """
+    if _resident is not None and _resident.app_path == app_path:
+        cache = _resident.metadata_cache(base)
+        try:
+            yield cache
+        finally:
+            cache.commit()
+        return
+    from .meta_cache import MetadataCache
+
+    with MetadataCache(app_path) as cache:
+        yield cache
+
+
+@contextmanager
+def open_search_index(app_path: str, base: str):
+    """The daemon's open search index, or a fresh one outside the daemon."""
+    if _resident is not None and _resident.app_path == app_path:
+        yield _resident.search_index(base)
+        return
+    from .search_index import SearchIndex
+
+    index = SearchIndex(app_path, base)
+    try:
+        yield index
+    finally:
+        index.close()
+
+
+@contextmanager
+def open_path_index(app_path: str, base: str):
+    """The daemon's open path index, or a fresh one outside the daemon."""
+    if _resident is not None and _resident.app_path == app_path:
+        yield _resident.path_index(base)
+        return
+    from .path_index import PathIndex
+
+    index = PathIndex(app_path, base)
+    try:
+        yield index
+    finally:
+        index.close()
+
+
+def _handle(message: dict | None, client: _Client) -> tuple[dict, bool]:
+    if not message or message.get("version") != PROTOCOL_VERSION:
+        return {"error": f"expected protocol version {PROTOCOL_VERSION}"}, False
+    op = message.get("op")
+    if op == "run":
+        _resident.requests += 1
+        return _run(message, client), False
+    status = {
+        "pid": os.getpid(),
+        "started": _resident.started,
+        "requests": _resident.requests,
+    }
+    if op == "status":
+        return status, False
+    if op == "stop":
+        return status, True
+    return {"error": f"unknown op {op!r}"}, False
+
+
+def serve(app_path: str | None = None) -> None:
+    """Serve forwarded commands until asked to stop (blocking)."""
+    import signal
+    import socket
+    import threading
+
+    global _resident
+    app_path = app_path or default_app_path()
+    path = socket_path(app_path)
+    if request({"op": "status"}, path) is not None:
+        raise RuntimeError(f"ngt daemon already running on {path}")
+    if os.path.exists(path):
+        os.unlink(path)
+    os.makedirs(app_path, exist_ok=True)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)
+    server.listen(16)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    _resident = _Resident(app_path)
+    try:
+        stop = False
+        while not stop:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    client = _Client(conn)
+                    response, stop = _handle(_recv(conn), client)
+                    client.send(response)
+                except Exception:
+                    import traceback
+
+                    traceback.print_exc()
+    finally:
+        server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+        _resident.close()
+        _resident = None
+
+
+def start() -> dict | None:
+    """Launch the daemon in the background and wait until it answers."""
+    import subprocess
+
+    app_path = default_app_path()
+    os.makedirs(app_path, exist_ok=True)
+    env = dict(os.environ, **{NO_DAEMON_ENV: "1"})
+    with open(os.path.join(app_path, LOG_NAME), "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "noteagator.main", "daemon", "start", "-f"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            env=env,
+            start_new_session=True,
+        )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        status = request({"op": "status"}, socket_path(app_path))
+        if status is not None:
+            return status
+        time.sleep(0.05)
+    return None
@@ -0,0 +1,119 @@
+import os
+import struct
+import tempfile
+from typing import Any
+
+DISPLAY_INDEX_FILE_NAME = "display_index.bin"
+
+# Magic, record count, count + 1 offsets, then "<type>\0<path>" records.
+_MAGIC = b"NGTDIDX1"
+_COUNT = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+_HEADER_SIZE = len(_MAGIC) + _COUNT.size
+
+
+def _as_number(index) -> int | None:
+    try:
+        number = int(index)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+class DisplayIndexStore:
+    def __init__(self, path: str) -> None:
+        self._path = path
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def exists(self) -> bool:
+        return os.path.exists(self._path)
+
+    def write(self, entries: dict[Any, dict[str, Any]]) -> None:
+        numbered: dict[int, dict[str, Any]] = {}
+        for key, entry in entries.items():
+            number = _as_number(key)
+            if number is None:
+                raise ValueError(
+                    f"Display index keys must be positive integers: {key!r}"
+                )
+            numbered[number] = entry
+        count = max(numbered, default=0)
+        records = []
+        for number in range(1, count + 1):
+            entry = numbered.get(number)
+            if entry is None:
+                records.append(b"")
+                continue
+            record = f"{entry.get('type', '')}\0{entry.get('absolute_path', '')}"
+            records.append(record.encode("utf-8", errors="surrogateescape"))
+
+        offset = _HEADER_SIZE + _OFFSET.size * (count + 1)
+        offsets = [offset]
+        for record in records:
+            offset += len(record)
+            offsets.append(offset)
+
+        directory = os.path.dirname(self._path) or "."
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=".display_index.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_MAGIC)
+                f.write(_COUNT.pack(count))
+                f.write(b"".join(_OFFSET.pack(o) for o in offsets))
+                f.write(b"".join(records))
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def _decode(record: bytes) -> dict[str, Any] | None:
+        if not record:
+            return None
+        text = record.decode("utf-8", errors="surrogateescape")
+        node_type, _, path = text.partition("\0")
+        return {"type": node_type, "absolute_path": path}
+
+    def get(self, index) -> dict[str, Any] | None:
+        number = _as_number(index)
+        if number is None:
+            return None
+        try:
+            with open(self._path, "rb") as f:
+                header = f.read(_HEADER_SIZE)
+                if len(header) < _HEADER_SIZE or not header.startswith(_MAGIC):
+                    return None
+                (count,) = _COUNT.unpack_from(header, len(_MAGIC))
+                if number > count:
+                    return None
+                f.seek(_HEADER_SIZE + _OFFSET.size * (number - 1))
+                start, end = struct.unpack("<QQ", f.read(_OFFSET.size * 2))
+                f.seek(start)
+                return self._decode(f.read(end - start))
+        except (OSError, struct.error):
+            return None
+
+    def load(self) -> dict[str, dict[str, Any]]:
+        try:
+            with open(self._path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return {}
+        if len(data) < _HEADER_SIZE or not data.startswith(_MAGIC):
+            return {}
+        (count,) = _COUNT.unpack_from(data, len(_MAGIC))
+        offsets = [
+            _OFFSET.unpack_from(data, _HEADER_SIZE + _OFFSET.size * i)[0]
+            for i in range(count + 1)
+        ]
+        entries = {}
+        for number in range(1, count + 1):
+            entry = self._decode(data[offsets[number - 1] : offsets[number]])
+            if entry is not None:
+                entries[str(number)] = entry
+        return entries
@@ -1,11 +1,30 @@
+import mmap
 import os
 import sys
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+try:
+    import fcntl
+except ImportError:  # Windows: appends are not locked.
+    fcntl = None
+
+from .ignore import IgnoreRules, is_binary_file
 from .note import Note
 from .print_utils import add_colors
+from .query import Query, Term, compile_term, count_terms, rank_documents
+
+MMAP_THRESHOLD = 64 * 1024
+FLUSH_EVERY = 64
+FOLDER_EMOJI = "📁"
+FILE_EMOJI = "📄"
+# Directories modified this recently are listed again on the next refresh, in
+# case another change lands within the filesystem's mtime granularity.
+RACY_NS = 2_000_000_000
 
 
 class bcolors:
@@ -20,70 +39,217 @@ class bcolors:
     UNDERLINE = "\033[4m"
 
 
-def print_directory_structure(
-    c_cwd: str, c_base: str, max_depth=None
-) -> dict[str, Any]:
-    path = c_cwd
-    base = c_base
-    note_dir = path.replace(base, "/").replace("\\", "/").replace("//", "/")
-    print(f"Notebook Directory: {bcolors.BLUE}{note_dir}{bcolors.ENDC}")
-    folder_emoji = "📁"
-    file_emoji = "📄"
-    structure = {}
-    index_counter = 1
+def _list_directory(current_path: str, ignore=None):
+    try:
+        with os.scandir(current_path) as it:
+            entries = [e for e in it if not (e.is_dir() and e.name == ".git")]
+    except PermissionError:
+        return None
+    if ignore is not None:
+        entries = [
+            e
+            for e in entries
+            if not ignore.ignored(e.path, e.is_dir(), check_parents=False)
+        ]
 
-    def traverse_and_print(current_path, current_depth, indent=0):
-        nonlocal index_counter
+    dirs = sorted((e for e in entries if e.is_dir()), key=lambda e: e.name.lower())
+    files = sorted((e for e in entries if e.is_file()), key=lambda e: e.name.lower())
+    return [("dir", e) for e in dirs] + [("file", e) for e in files]
 
-        if max_depth is not None and current_depth > max_depth:
-            return
 
-        if current_depth > 0:
-            print(
-                " " * indent
-                + f"{index_counter} {folder_emoji} {os.path.basename(current_path)}"
-            )
-            structure[index_counter] = {"type": "dir", "absolute_path": current_path}
-            index_counter += 1
+def walk_tree(path: str, max_depth=None, list_directory=None, ignore=None):
+    # Depth first with an explicit stack of (depth, indent, children) frames, so
+    # deep notebooks cannot hit the recursion limit. Yields each node as
+    # (indent, type, absolute_path, name) in display order. ``list_directory``
+    # is called with each directory and the depth of its children.
+    if max_depth is not None and max_depth <= 0:
+        return
+    if list_directory is None:
 
-        if max_depth is None or current_depth < max_depth:
-            try:
-                with os.scandir(current_path) as it:
-                    entries = [e for e in it if not (e.is_dir() and e.name == ".git")]
-            except PermissionError:
-                return
+        def list_directory(directory: str, depth: int):
+            return _list_directory(directory, ignore)
 
-            dirs = sorted(
-                (e for e in entries if e.is_dir()), key=lambda e: e.name.lower()
-            )
-            files = sorted(
-                (e for e in entries if e.is_file()), key=lambda e: e.name.lower()
-            )
+    children = list_directory(path, 0)
+    if children is None:
+        return
+    stack = [(0, 0, iter(children))]
+    while stack:
+        depth, indent, items = stack[-1]
+        item = next(items, None)
+        if item is None:
+            stack.pop()
+            continue
+        node_type, entry = item
+        yield indent + 2, node_type, entry.path, entry.name
+        if node_type == "dir" and (max_depth is None or depth + 1 < max_depth):
+            grandchildren = list_directory(entry.path, depth + 1)
+            if grandchildren is not None:
+                stack.append((depth + 1, indent + 2, iter(grandchildren)))
+
+
+def _prefetch_note(path: str, stamp, meta_cache) -> tuple:
+    if meta_cache is None:
+        return (return_description(path),)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+    if stamp == (st.st_mtime_ns, st.st_size):
+        return st, None
+    from .meta_cache import read_metadata
+
+    return st, read_metadata(path)
+
+
+class _TreePrefetcher:
+    """Lists directories and reads front matter ahead of a ``walk_tree``.
+
+    When a directory's listing is handed to the walker, the listings of its
+    subdirectories and the front matter of its files are queued on the pool,
+    so slow filesystem round-trips overlap while the walk itself (and so the
+    output order) stays sequential. The metadata cache is only touched from
+    the walking thread.
+    """
+
+    def __init__(self, pool, max_depth=None, meta_cache=None, ignore=None) -> None:
+        self._pool = pool
+        self._max_depth = max_depth
+        self._meta_cache = meta_cache
+        self._ignore = ignore
+        self._listings: dict[str, Any] = {}
+        self._notes: dict[str, Any] = {}
+
+    def list_directory(self, path: str, depth: int):
+        future = self._listings.pop(path, None)
+        if future is None:
+            children = _list_directory(path, self._ignore)
+        else:
+            children = future.result()
+        if not children:
+            return children
+        descend = self._max_depth is None or depth + 1 < self._max_depth
+        stamps = {}
+        if self._meta_cache is not None:
+            stamps = self._meta_cache.stamps(path)
+        for node_type, entry in children:
+            if node_type == "dir":
+                if descend:
+                    self._listings[entry.path] = self._pool.submit(
+                        _list_directory, entry.path, self._ignore
+                    )
+            else:
+                self._notes[entry.path] = self._pool.submit(
+                    _prefetch_note,
+                    entry.path,
+                    stamps.get(entry.path),
+                    self._meta_cache,
+                )
+        return children
+
+    def description(self, path: str) -> str:
+        future = self._notes.pop(path, None)
+        try:
+            prefetched = None if future is None else future.result()
+        except Exception:
+            prefetched = None
+        if prefetched is None:
+            return return_description(path, self._meta_cache)
+        if self._meta_cache is None:
+            return prefetched[0]
+        return return_description(path, self._meta_cache, *prefetched)
 
-            for entry in dirs:
-                traverse_and_print(entry.path, current_depth + 1, indent + 2)
 
-            for entry in files:
-                entry_path = entry.path
-                description = return_description(entry_path)
-                print(
-                    " " * (indent + 2)
-                    + f"{index_counter} {file_emoji} {entry.name} {description}"
+def iter_directory_structure(
+    path: str, max_depth=None, meta_cache=None, jobs=1, ignore=None
+):
+    if jobs > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        pool = ThreadPoolExecutor(max_workers=jobs)
+        prefetcher = _TreePrefetcher(pool, max_depth, meta_cache, ignore)
+        nodes = walk_tree(path, max_depth, prefetcher.list_directory)
+        describe = prefetcher.description
+    else:
+        pool = None
+        nodes = walk_tree(path, max_depth, ignore=ignore)
+
+        def describe(entry_path: str) -> str:
+            return return_description(entry_path, meta_cache)
+
+    try:
+        index_counter = 1
+        for indent, node_type, entry_path, name in nodes:
+            if node_type == "dir":
+                line = " " * indent + f"{index_counter} {FOLDER_EMOJI} {name}"
+            else:
+                description = describe(entry_path)
+                line = (
+                    " " * indent + f"{index_counter} {FILE_EMOJI} {name} {description}"
                 )
-                structure[index_counter] = {"type": "file", "absolute_path": entry_path}
-                index_counter += 1
+            yield index_counter, {"type": node_type, "absolute_path": entry_path}, line
+            index_counter += 1
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
 
-    traverse_and_print(path, current_depth=0)
+def _discard_stdout() -> None:
+    # The reader went away (e.g. `ngt ls -R | head`); point stdout at devnull
+    # so the interpreter does not raise again when it flushes at exit.
+    try:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    except (AttributeError, OSError, ValueError):
+        pass
+
+
+def print_directory_structure(
+    c_cwd: str, c_base: str, max_depth=None, meta_cache=None, jobs: int = 1
+) -> dict[str, Any]:
+    path = c_cwd
+    base = c_base
+    ignore = IgnoreRules(base)
+    note_dir = path.replace(base, "/").replace("\\", "/").replace("//", "/")
+    structure = {}
+    pending: dict[int, dict[str, Any]] = {}
+    lines = [f"Notebook Directory: {bcolors.BLUE}{note_dir}{bcolors.ENDC}"]
+    last_flush = time.monotonic()
+
+    def flush() -> None:
+        nonlocal last_flush
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+        structure.update(pending)
+        lines.clear()
+        pending.clear()
+        last_flush = time.monotonic()
+
+    try:
+        flush()
+        for index, entry, line in iter_directory_structure(
+            path, max_depth, meta_cache, jobs, ignore
+        ):
+            lines.append(line)
+            pending[index] = entry
+            if len(lines) >= FLUSH_EVERY or time.monotonic() - last_flush > 0.1:
+                flush()
+        if lines:
+            flush()
+    except BrokenPipeError:
+        _discard_stdout()
     return structure
 
 
-def return_description(entry_path: str) -> str:
+def return_description(entry_path: str, meta_cache=None, st=None, meta=None) -> str:
     try:
-        n = Note(entry_path)
-        if not n.description:
+        if meta_cache is not None:
+            description = meta_cache.description(entry_path, st, meta)
+        else:
+            description = Note(entry_path).description
+        if not description:
             return ""
         else:
-            return f" - {add_colors(n.description)}"
+            return f" - {add_colors(description)}"
     except Exception:
         return ""
 
@@ -100,50 +266,304 @@ def resolve_cd_target(
     return cwd
 
 
-def search_files(path: str, search_term: str, exclude_dirs=None) -> dict[str, Any]:
+def walk_files(path: str, exclude_dirs=None, ignore=None):
     exclude_dirs = set(exclude_dirs or {".git"})
-    search_term_lower = search_term.lower()
-    index = 1
-    display_index = {}
-
     for root, dirs, files in os.walk(path, topdown=True):
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
-        for file in files:
+        dirs[:] = sorted(
+            d
+            for d in dirs
+            if d not in exclude_dirs
+            and not (
+                ignore is not None
+                and ignore.ignored(os.path.join(root, d), True, check_parents=False)
+            )
+        )
+        for file in sorted(files):
             if file == ".git":
                 continue
-
             file_path = os.path.join(root, file)
-            try:
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    for line in f:
-                        if search_term_lower in line.lower():
-                            rel_path = (
-                                file_path.replace(path, "/")
-                                .replace("//", "/")
-                                .replace("\\", "/")
-                            )
-                            print(f"{index} {rel_path} {return_description(file_path)}")
-                            display_index[index] = {
-                                "type": "file",
-                                "absolute_path": file_path,
-                            }
-                            index += 1
-                            break
-            except Exception as e:
-                print(f"Error reading file '{file_path}': {e}")
+            if ignore is not None and ignore.ignored(
+                file_path, False, check_parents=False
+            ):
+                continue
+            yield file_path
+
+
+def list_dir(directory: str, ignore: IgnoreRules) -> dict[str, bool] | None:
+    # Entry path -> is_dir. Symlinked directories are not followed, like
+    # os.walk, so links cannot loop.
+    try:
+        with os.scandir(directory) as it:
+            entries = {}
+            for entry in it:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file():
+                    continue
+                if ignore.ignored(entry.path, is_dir, check_parents=False):
+                    continue
+                entries[entry.path] = is_dir
+    except OSError:
+        return None
+    return entries
+
+
+def files_under(path: str, ignore=None):
+    if os.path.isdir(path):
+        if ignore is not None and ignore.ignored(path, True):
+            return []
+        return walk_files(path, ignore=ignore)
+    if not os.path.isfile(path):
+        return []
+    if ignore is not None and ignore.ignored(path, False):
+        return []
+    return [path]
+
+
+def path_range(path: str) -> tuple[str, str]:
+    # Bounds of the paths strictly below ``path``, for SQL range queries.
+    return path + os.sep, path + chr(ord(os.sep) + 1)
+
+
+def walk_sort_key(path: str, file_path: str) -> tuple:
+    parts = os.path.relpath(file_path, path).split(os.sep)
+    return tuple((1, p) for p in parts[:-1]) + ((0, parts[-1]),)
+
+
+def relative_note_path(path: str, file_path: str) -> str:
+    return file_path.replace(path, "/").replace("//", "/").replace("\\", "/")
+
+
+@contextmanager
+def open_buffer(file_path: str):
+    # Small files are read in one call; larger ones are mapped so the matcher
+    # scans the page cache directly. Empty files yield b"" (mmap rejects them).
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            yield f.read()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield buf
+
+
+def file_contains(file_path: str, search_term: str) -> bool:
+    pattern = compile_term(search_term)
+    with open_buffer(file_path) as buf:
+        return bool(buf) and pattern.search(buf) is not None
 
+
+def print_search_hit(
+    path: str, file_path: str, index: int, meta_cache=None
+) -> dict[str, Any]:
+    rel_path = relative_note_path(path, file_path)
+    print(f"{index} {rel_path} {return_description(file_path, meta_cache)}")
+    return {"type": "file", "absolute_path": file_path}
+
+
+def iter_search_results(path: str, file_paths, meta_cache=None):
+    for index, file_path in enumerate(file_paths, start=1):
+        hit = print_search_hit(path, file_path, index, meta_cache)
+        sys.stdout.flush()
+        yield index, hit
+
+
+def iter_path_results(path: str, entries, meta_cache=None):
+    """Like :func:`iter_search_results` for ``(absolute_path, is_dir)`` pairs;
+    directories are listed the way ``ls`` shows them, for ``ngt cd``."""
+    for index, (entry_path, is_dir) in enumerate(entries, start=1):
+        if is_dir:
+            rel_path = relative_note_path(path, entry_path)
+            print(f"{index} {FOLDER_EMOJI} {rel_path}")
+            hit = {"type": "dir", "absolute_path": entry_path}
+        else:
+            hit = print_search_hit(path, entry_path, index, meta_cache)
+        sys.stdout.flush()
+        yield index, hit
+
+
+def collect_results(hits, display_index: dict[str, Any]) -> dict[str, Any]:
+    """Drain ``(index, entry)`` pairs into ``display_index`` as they are
+    printed; a reader that goes away (``| head``) ends the search early."""
+    try:
+        for index, entry in hits:
+            display_index[index] = entry
+    except BrokenPipeError:
+        _discard_stdout()
     return display_index
 
 
-def append_jot(base_path: str | Path, text: str) -> None:
-    now = datetime.now()
+def ordered_map(func, items, jobs: int = 1):
+    if jobs <= 1:
+        yield from map(func, items)
+        return
+    from concurrent.futures import ThreadPoolExecutor
+
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= jobs * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # A consumer that stops early leaves queued reads that are not needed.
+        pool.shutdown(cancel_futures=True)
+
+
+def scan_query(
+    file_path: str, query: Query, count: bool = False
+) -> tuple[dict[Term, int], int]:
+    with open_buffer(file_path) as buf:
+        if not buf:
+            return {}, 0
+        return count_terms(buf, query, count), len(buf)
+
+
+def _scan_file(file_path: str, query: Query, count: bool, sniff: bool = False):
+    try:
+        if sniff and is_binary_file(file_path):
+            return file_path, None, 0, None
+        term = query.single_text_term
+        if term is not None and not count:
+            return file_path, {term: int(file_contains(file_path, term.text))}, 0, None
+        counts, size = scan_query(file_path, query, count)
+        return file_path, counts, size, None
+    except Exception as e:
+        return file_path, {}, 0, e
+
+
+def iter_search_files(
+    path: str,
+    search_term: str | Query,
+    exclude_dirs=None,
+    jobs: int = 1,
+    meta_cache=None,
+    rank: bool = False,
+    limit: int | None = None,
+    only_paths=None,
+):
+    """Yield ``(index, entry)`` for each match as it is printed. Without
+    ``rank`` the walk stops as soon as ``limit`` matches are found."""
+    query = (
+        search_term if isinstance(search_term, Query) else Query.from_text(search_term)
+    )
+    index = 1
+    ranked_docs = []
+    doc_freq: Counter = Counter()
+    total_docs = 0
+    total_length = 0
+
+    file_paths = walk_files(path, exclude_dirs, IgnoreRules(path))
+    if only_paths is not None:
+        file_paths = (p for p in file_paths if p in only_paths)
+    # Binary files are skipped: by their cached classification when there is
+    # a metadata cache, otherwise by sniffing each file's header.
+    if meta_cache is not None:
+        file_paths = (p for p in file_paths if not meta_cache.is_binary(p))
+    sniff = meta_cache is None
+    scanned = ordered_map(
+        lambda file_path: _scan_file(file_path, query, rank, sniff), file_paths, jobs
+    )
+    for file_path, counts, size, error in scanned:
+        if error is not None:
+            print(f"Error reading file '{file_path}': {error}")
+        elif counts is None:
+            continue
+        elif rank:
+            total_docs += 1
+            total_length += size
+            doc_freq.update(t for t, n in counts.items() if n)
+            if query.matches(counts):
+                ranked_docs.append((file_path, counts, size))
+        elif query.matches(counts):
+            hit = print_search_hit(path, file_path, index, meta_cache)
+            sys.stdout.flush()
+            yield index, hit
+            if limit is not None and index >= limit:
+                return
+            index += 1
+
+    if rank:
+        avg_length = total_length / total_docs if total_docs else 0.0
+        ranked = rank_documents(ranked_docs, doc_freq, total_docs, avg_length)
+        yield from iter_search_results(path, ranked[:limit], meta_cache)
+
+
+def search_files(
+    path: str,
+    search_term: str | Query,
+    exclude_dirs=None,
+    jobs: int = 1,
+    meta_cache=None,
+    rank: bool = False,
+    limit: int | None = None,
+    only_paths=None,
+) -> dict[str, Any]:
+    return dict(
+        iter_search_files(
+            path, search_term, exclude_dirs, jobs, meta_cache, rank, limit, only_paths
+        )
+    )
+
+
+def _jot_dir(base_path: str | Path) -> Path:
     note_dir = Path(base_path).expanduser().resolve() / "jots"
     note_dir.mkdir(parents=True, exist_ok=True)
-    note_file = note_dir / f"{now.strftime('%m-%d-%Y')}.md"
+    return note_dir
+
+
+def format_jot(text: str) -> str:
     prefix = "\n"
     suffix = "" if text.endswith("\n") else "\n"
-    with open(note_file, "a", encoding="utf-8") as f:
-        f.write(f"{prefix}{text}{suffix}")
+    return f"{prefix}{text}{suffix}"
+
+
+def _append_locked(path: Path, text: str) -> None:
+    # An exclusive advisory lock keeps concurrent jotters from interleaving
+    # partial entries; it is released when the file is closed.
+    with open(path, "a", encoding="utf-8") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        f.write(text)
+        f.flush()
+
+
+def append_jot(base_path: str | Path, text: str) -> None:
+    note_file = _jot_dir(base_path) / f"{datetime.now().strftime('%m-%d-%Y')}.md"
+    _append_locked(note_file, format_jot(text))
+
+
+def append_jots(base_path: str | Path, stream, chunk_size: int = 64 * 1024) -> int:
+    """Append each non-blank line of the binary ``stream`` as its own jot.
+
+    Lines are written in batches of whatever input is available, one locked
+    append per batch, so piping many entries costs one process and few
+    writes. Returns the number of entries written.
+    """
+    note_dir = _jot_dir(base_path)
+    read = getattr(stream, "read1", stream.read)
+    pending = b""
+    count = 0
+    while True:
+        data = read(chunk_size)
+        if data:
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+        else:
+            lines, pending = [pending], b""
+        entries = [
+            format_jot(line.decode("utf-8", errors="replace").rstrip("\r"))
+            for line in lines
+            if line.strip()
+        ]
+        if entries:
+            note_file = note_dir / f"{datetime.now().strftime('%m-%d-%Y')}.md"
+            _append_locked(note_file, "".join(entries))
+            count += len(entries)
+        if not data:
+            return count
 
 
 def verify_path(path: str) -> str:
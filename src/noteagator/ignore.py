@@ -0,0 +1,184 @@
+import os
+import re
+from typing import NamedTuple
+
+IGNORE_FILE_NAMES = (".gitignore", ".ngtignore")
+ALWAYS_IGNORED = frozenset({".git"})
+SNIFF_BYTES = 8192
+
+# Formats whose first bytes can pass for text.
+_BINARY_MAGIC = (
+    b"%PDF-",
+    b"\x89PNG",
+    b"GIF87a",
+    b"GIF89a",
+    b"\xff\xd8\xff",
+    b"PK\x03\x04",
+    b"\x1f\x8b",
+    b"BZh",
+    b"\xfd7zXZ\x00",
+    b"7z\xbc\xaf\x27\x1c",
+    b"Rar!\x1a\x07",
+    b"\x7fELF",
+    b"OggS",
+    b"ID3",
+    b"RIFF",
+    b"\x00\x00\x01\x00",
+)
+_TEXT_CONTROL = frozenset(b"\t\n\r\f\b\x1b")
+
+
+def looks_binary(header: bytes) -> bool:
+    if not header:
+        return False
+    if b"\x00" in header or header.startswith(_BINARY_MAGIC):
+        return True
+    control = sum(1 for b in header if b < 32 and b not in _TEXT_CONTROL)
+    return control * 10 > len(header)
+
+
+def is_binary_file(path: str) -> bool:
+    with open(path, "rb") as f:
+        return looks_binary(f.read(SNIFF_BYTES))
+
+
+def _glob_to_regex(pattern: str) -> str:
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end
+        elif c == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class _Rule(NamedTuple):
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+    def matches(self, relative: str, is_dir: bool) -> bool:
+        return (is_dir or not self.dir_only) and bool(self.regex.fullmatch(relative))
+
+
+def parse_rules(text: str) -> list[_Rule]:
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate or line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        regex = _glob_to_regex(line.lstrip("/"))
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        try:
+            rules.append(_Rule(re.compile(regex, re.DOTALL), negate, dir_only))
+        except re.error:
+            continue
+    return rules
+
+
+class IgnoreRules:
+    """``.gitignore`` and ``.ngtignore`` files under ``base``, applied as git
+    does (``.ngtignore`` wins within a directory) and loaded lazily."""
+
+    def __init__(self, base: str) -> None:
+        self.base = os.path.abspath(base)
+        self._rules: dict[str, list[_Rule]] = {}
+
+    def _load(self, directory: str) -> list[_Rule]:
+        rules = self._rules.get(directory)
+        if rules is None:
+            rules = []
+            for name in IGNORE_FILE_NAMES:
+                try:
+                    with open(
+                        os.path.join(directory, name), encoding="utf-8", errors="ignore"
+                    ) as f:
+                        rules.extend(parse_rules(f.read()))
+                except OSError:
+                    continue
+            self._rules[directory] = rules
+        return rules
+
+    def _matches(self, path: str, is_dir: bool) -> bool:
+        directory = os.path.dirname(path)
+        while True:
+            rules = self._load(directory)
+            if rules:
+                relative = os.path.relpath(path, directory).replace(os.sep, "/")
+                for rule in reversed(rules):
+                    if rule.matches(relative, is_dir):
+                        return not rule.negate
+            if directory == self.base or len(directory) <= len(self.base):
+                return False
+            directory = os.path.dirname(directory)
+
+    def ignored(self, path: str, is_dir: bool, check_parents: bool = True) -> bool:
+        """Whether ``path`` is excluded. Walkers that prune ignored directories
+        can pass ``check_parents=False`` to test just the entry itself."""
+        path = os.path.abspath(path)
+        if os.path.basename(path) in ALWAYS_IGNORED:
+            return True
+        if check_parents:
+            relative = os.path.relpath(path, self.base)
+            if relative.startswith(os.pardir):
+                return False
+            parts = relative.split(os.sep)
+            parent = self.base
+            for part in parts[:-1]:
+                parent = os.path.join(parent, part)
+                if part in ALWAYS_IGNORED or self._matches(parent, True):
+                    return True
+        return self._matches(path, is_dir)
+
+
+def ignore_stamp(directory: str) -> str:
+    """Mtime and size of the ignore files in ``directory``, to spot edits."""
+    stamps = []
+    for name in IGNORE_FILE_NAMES:
+        try:
+            st = os.stat(os.path.join(directory, name))
+        except OSError:
+            stamps.append("-")
+            continue
+        stamps.append(f"{st.st_mtime_ns}:{st.st_size}")
+    return ",".join(stamps)
+
+
+def touches_ignore_files(paths) -> bool:
+    """Whether a change to ``paths`` can change which files are ignored."""
+    return any(os.path.basename(p) in IGNORE_FILE_NAMES for p in paths)
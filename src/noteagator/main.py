@@ -1,18 +1,47 @@
 from __future__ import annotations
 
+import importlib
+
 import click
 
-from noteagator.commands.dir import cd_cmd, ls_cmd, set_notebook_base, show_base
-from noteagator.commands.notes import daily_note, prt, search, set_print_mode
+LAZY_COMMANDS = {
+    "set-base": "noteagator.commands.dir:set_notebook_base",
+    "show-base": "noteagator.commands.dir:show_base",
+    "ls": "noteagator.commands.dir:ls_cmd",
+    "print": "noteagator.commands.notes:prt",
+    "cd": "noteagator.commands.dir:cd_cmd",
+    "find": "noteagator.commands.dir:find_cmd",
+    "search": "noteagator.commands.notes:search",
+    "index": "noteagator.commands.notes:index_cmd",
+    "jot": "noteagator.commands.notes:daily_note",
+    "print-mode": "noteagator.commands.notes:set_print_mode",
+    "daemon": "noteagator.commands.daemon:daemon_group",
+}
+
+
+class LazyGroup(click.Group):
+    """Group that imports a subcommand's module only when it is invoked."""
 
+    def __init__(self, *args, lazy_commands: dict[str, str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
 
-class OrderedGroup(click.Group):
     def list_commands(self, ctx):
-        return list(self.commands.keys())
+        return list(self.commands.keys()) + [
+            name for name in self.lazy_commands if name not in self.commands
+        ]
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            module_name, attr = self.lazy_commands[cmd_name].split(":")
+            command = getattr(importlib.import_module(module_name), attr)
+            self.add_command(command, cmd_name)
+        return super().get_command(ctx, cmd_name)
 
 
 @click.group(
-    cls=OrderedGroup,
+    cls=LazyGroup,
+    lazy_commands=LAZY_COMMANDS,
     context_settings={"help_option_names": ["-h", "--help"]},
     epilog="""\b
 Examples:
@@ -20,8 +49,12 @@ Examples:
   ngt show-base
   cd "$(ngt show-base)"; ls; code -n .
   ngt jot "standup: shipped auth refactor"
+  deploy.sh | ngt jot -
   ngt print 3
   ngt search k8s
+  ngt find deploy
+  ngt index --rebuild
+  ngt daemon start
   ngt cd 1
   ngt ls
 """,
@@ -30,15 +63,5 @@ def main() -> None:
     """noteagator CLI."""
 
 
-main.add_command(set_notebook_base)
-main.add_command(show_base)
-main.add_command(ls_cmd)
-main.add_command(prt)
-main.add_command(cd_cmd)
-main.add_command(search)
-main.add_command(daily_note)
-main.add_command(set_print_mode)
-
-
 if __name__ == "__main__":
     main()
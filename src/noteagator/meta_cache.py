@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+from typing import Any
+
+from .fsutils import files_under, path_range, walk_sort_key
+from .ignore import IgnoreRules, is_binary_file, touches_ignore_files
+from .note import Note
+from .query import MetaFilter, flatten_metadata
+
+CACHE_FILE_NAME = "metadata_cache.sqlite3"
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta_values (
+    path TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS meta_values_key_value ON meta_values (key, value);
+CREATE INDEX IF NOT EXISTS meta_values_path ON meta_values (path);
+CREATE TABLE IF NOT EXISTS kinds (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    binary INTEGER NOT NULL
+);
+"""
+
+
+def read_metadata(path: str) -> dict[str, Any]:
+    try:
+        meta = dict(Note(path).metadata)
+    except Exception:
+        return {}
+    meta.pop("note", None)
+    return meta
+
+
+class MetadataCache:
+    """Front matter of every note seen by ``ls`` or ``search``, keyed by path,
+    mtime and size so a note's YAML is only parsed again after it changes.
+    """
+
+    def __init__(self, app_path: str) -> None:
+        self._cache_path = os.path.join(app_path, CACHE_FILE_NAME)
+        self._conn = sqlite3.connect(self._cache_path)
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            self._conn.executescript(
+                "DROP TABLE IF EXISTS notes; DROP TABLE IF EXISTS meta_values;"
+            )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+        self._watch = None
+
+    def __enter__(self) -> "MetadataCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+    def _store(
+        self, path: str, st: os.stat_result, meta: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        if meta is None:
+            meta = read_metadata(path)
+        meta = json.loads(json.dumps(meta, default=str))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO notes (path, mtime_ns, size, metadata) "
+            "VALUES (?, ?, ?, ?)",
+            (path, st.st_mtime_ns, st.st_size, json.dumps(meta, ensure_ascii=False)),
+        )
+        self._conn.execute("DELETE FROM meta_values WHERE path = ?", (path,))
+        self._conn.executemany(
+            "INSERT INTO meta_values (path, key, value) VALUES (?, ?, ?)",
+            ((path, key, value) for key, value in flatten_metadata(meta)),
+        )
+        return meta
+
+    def get(
+        self,
+        path: str,
+        st: os.stat_result | None = None,
+        meta: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Front matter of ``path``. ``st`` and ``meta`` may be passed in when
+        they were already read (e.g. by a prefetching thread); ``meta`` is
+        only used if the cached entry is out of date."""
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return {}
+        row = self._conn.execute(
+            "SELECT mtime_ns, size, metadata FROM notes WHERE path = ?", (path,)
+        ).fetchone()
+        if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return json.loads(row[2])
+        return self._store(path, st, meta)
+
+    def is_binary(self, path: str, st: os.stat_result | None = None) -> bool:
+        """Whether ``path`` looks binary, sniffed once per mtime and size."""
+        try:
+            if st is None:
+                st = os.stat(path)
+            row = self._conn.execute(
+                "SELECT mtime_ns, size, binary FROM kinds WHERE path = ?", (path,)
+            ).fetchone()
+            if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+                return bool(row[2])
+            binary = is_binary_file(path)
+        except OSError:
+            return False
+        self._conn.execute(
+            "INSERT OR REPLACE INTO kinds (path, mtime_ns, size, binary) "
+            "VALUES (?, ?, ?, ?)",
+            (path, st.st_mtime_ns, st.st_size, int(binary)),
+        )
+        return binary
+
+    def stamps(self, directory: str) -> dict[str, tuple[int, int]]:
+        """Cached ``(mtime_ns, size)`` of the notes directly in ``directory``."""
+        prefix = os.path.join(directory, "")
+        rows = self._conn.execute(
+            "SELECT path, mtime_ns, size FROM notes "
+            "WHERE path >= ? AND path < ? AND instr(substr(path, ?), ?) = 0",
+            (*path_range(directory), len(prefix) + 1, os.sep),
+        )
+        return {path: (mtime_ns, size) for path, mtime_ns, size in rows}
+
+    def watch(self, subscription) -> None:
+        """Let ``refresh`` re-read only the paths a watcher saw change."""
+        self._watch = subscription
+
+    def _reconcile(self, path: str, ignore: IgnoreRules | None = None) -> int:
+        known = {
+            p: (mtime_ns, size)
+            for p, mtime_ns, size in self._conn.execute(
+                "SELECT path, mtime_ns, size FROM notes "
+                "WHERE path = ? OR (path >= ? AND path < ?)",
+                (path, *path_range(path)),
+            )
+        }
+        changed = 0
+        for file_path in files_under(path, ignore):
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            if known.pop(file_path, None) != (st.st_mtime_ns, st.st_size):
+                self._store(file_path, st)
+                changed += 1
+        for file_path in known:
+            self.forget(file_path)
+            changed += 1
+        return changed
+
+    def refresh(self, base: str) -> int:
+        paths: tuple[str, ...] = (base,)
+        if self._watch is not None and self._watch.base == base:
+            changes = self._watch.drain()
+            if not changes.rescan and not touches_ignore_files(changes.paths):
+                paths = changes.paths
+        ignore = IgnoreRules(base)
+        changed = sum(self._reconcile(path, ignore) for path in paths)
+        self._conn.commit()
+        return changed
+
+    def _match(self, meta_filter: MetaFilter) -> set[str]:
+        if meta_filter.value is None:
+            where, args = "key = ?", (meta_filter.key,)
+        elif meta_filter.prefix:
+            where = "key = ? AND value >= ? AND value < ?"
+            args = (
+                meta_filter.key,
+                meta_filter.value,
+                meta_filter.value + "\U0010ffff",
+            )
+        else:
+            where, args = "key = ? AND value = ?", (meta_filter.key, meta_filter.value)
+        rows = self._conn.execute(
+            "SELECT DISTINCT path FROM meta_values WHERE " + where, args
+        )
+        return {path for (path,) in rows}
+
+    def find(self, base: str, meta_filters) -> list[str]:
+        prefix = os.path.join(base, "")
+        paths: set[str] | None = None
+        for meta_filter in meta_filters:
+            found = self._match(meta_filter)
+            paths = found if paths is None else paths & found
+            if not paths:
+                return []
+        return sorted(
+            (p for p in paths or () if p.startswith(prefix)),
+            key=lambda p: walk_sort_key(base, p),
+        )
+
+    def description(
+        self,
+        path: str,
+        st: os.stat_result | None = None,
+        meta: dict[str, Any] | None = None,
+    ) -> str:
+        description = self.get(path, st, meta).get("description")
+        return description if isinstance(description, str) else ""
+
+    def forget(self, path: str) -> None:
+        self._conn.execute("DELETE FROM notes WHERE path = ?", (path,))
+        self._conn.execute("DELETE FROM kinds WHERE path = ?", (path,))
+        self._conn.execute("DELETE FROM meta_values WHERE path = ?", (path,))
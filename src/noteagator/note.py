@@ -3,14 +3,10 @@ from functools import cached_property
 from pathlib import Path
 from typing import Any, Dict
 
-import yaml
+_YAML_FENCE_OPEN_RE = re.compile(r"^(?:\ufeff)?---[ \t]*\r?\n")
 
 _YAML_FRONT_MATTER_RE = re.compile(
-    r"^(?:\ufeff)?---[ \t]*\r?\n"
-    r"(?P<meta>.*?)"
-    r"(?:\r?\n)?"
-    r"---[ \t]*\r?\n"
-    r"(?P<body>.*)\Z",
+    r"^(?:\ufeff)?---[ \t]*\r?\n(?P<meta>.*?)(?:\r?\n)?---[ \t]*\r?\n",
     re.DOTALL,
 )
 
@@ -18,17 +14,36 @@ _YAML_FRONT_MATTER_RE = re.compile(
 class Note:
     def __init__(self, note_path: str) -> None:
         self._note_path = note_path
-        self._raw_note: str = Path(note_path).read_text(encoding="utf-8")
-        self._match = _YAML_FRONT_MATTER_RE.match(self._raw_note)
+        self._raw_note: str | None = None
+        self._match = self._read_front_matter()
+
+    def _read_front_matter(self) -> re.Match | None:
+        # Only the header is read here; the rest of the file is loaded the
+        # first time body or raw_note is accessed.
+        with open(self._note_path, "r", encoding="utf-8") as f:
+            header = f.readline()
+            if not _YAML_FENCE_OPEN_RE.match(header):
+                return None
+            for line in f:
+                header += line
+                if "---" in line:
+                    match = _YAML_FRONT_MATTER_RE.match(header)
+                    if match:
+                        return match
+        return None
 
     @property
     def raw_note(self) -> str:
+        if self._raw_note is None:
+            self._raw_note = Path(self._note_path).read_text(encoding="utf-8")
         return self._raw_note
 
     @cached_property
     def metadata(self) -> Dict[str, Any]:
         if not self._match:
             return {"note": self._note_path}
+        import yaml
+
         yaml_text = self._match.group("meta")
         try:
             meta = yaml.safe_load(yaml_text)
@@ -43,13 +58,37 @@ class Note:
     def body(self) -> str:
         if not self._match:
             return self.raw_note
-        body = self._match.group("body")
+        body = self.raw_note[self._match.end() :]
         if body.startswith("\r\n"):
             body = body[2:]
         elif body.startswith("\n"):
             body = body[1:]
         return body
 
+    def iter_body_chunks(self, size: int = 64 * 1024):
+        """Yield the body in pieces of about ``size`` characters that end on
+        line boundaries, read from disk so a huge note is never held whole."""
+        if self._raw_note is not None:
+            if self.body:
+                yield self.body
+            return
+        with open(self._note_path, "r", encoding="utf-8") as f:
+            if self._match:
+                f.read(self._match.end())
+                first = f.readline()
+                if first and first != "\n":
+                    yield first
+            while True:
+                lines = f.readlines(size)
+                if not lines:
+                    break
+                yield "".join(lines)
+
+    @property
+    def front_matter_lines(self) -> int:
+        """Number of lines taken by the front matter (0 without one)."""
+        return self._match.group(0).count("\n") if self._match else 0
+
     @cached_property
     def description(self) -> str:
         return self.metadata.get("description", "")
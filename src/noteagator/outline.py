@@ -0,0 +1,212 @@
+import json
+import os
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from .note import Note
+
+CACHE_FILE_NAME = "outline_cache.sqlite3"
+SCHEMA_VERSION = 1
+LINE_STRIDE = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outlines (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    outline TEXT NOT NULL
+);
+"""
+
+_FENCE = b"```"
+_HEADING_RE = re.compile(rb"^(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*\r?\n?$")
+
+
+class Heading(NamedTuple):
+    level: int
+    title: str
+    line: int
+    offset: int
+
+
+class Fence(NamedTuple):
+    line: int
+    offset: int
+    text: str
+
+
+def parse_line_range(spec: str) -> tuple[int, int | None]:
+    """``START:END`` (inclusive, either side optional) or a single line, as a
+    1-based ``(start, stop)`` with ``stop`` exclusive (None for the end)."""
+    start_text, sep, end_text = spec.partition(":")
+    try:
+        start = int(start_text) if start_text.strip() else 1
+        if not sep:
+            end = start
+        else:
+            end = int(end_text) if end_text.strip() else None
+    except ValueError:
+        raise ValueError(f"Invalid line range {spec!r}: expected START:END.")
+    if start < 1 or (end is not None and end < start):
+        raise ValueError(f"Invalid line range {spec!r}.")
+    return start, None if end is None else end + 1
+
+
+@dataclass
+class Outline:
+    """Where things are in a note, so part of it can be printed by seeking.
+    Line numbers are 1-based file lines."""
+
+    body_line: int
+    lines: int
+    offsets: list[int]
+    headings: list[Heading]
+    fences: list[Fence]
+
+    @classmethod
+    def scan(cls, path: str) -> "Outline":
+        skip = Note(path).front_matter_lines
+        body_line = skip + 1
+        offsets: list[int] = []
+        headings: list[Heading] = []
+        fences: list[Fence] = []
+        in_code = False
+        offset = 0
+        number = 0
+        with open(path, "rb") as f:
+            for number, line in enumerate(f, 1):
+                if (number - 1) % LINE_STRIDE == 0:
+                    offsets.append(offset)
+                if number <= skip:
+                    pass
+                elif number == body_line and skip and line in (b"\n", b"\r\n"):
+                    body_line += 1
+                elif line.startswith(_FENCE):
+                    text = line.rstrip(b"\r\n").decode("utf-8", "replace")
+                    fences.append(Fence(number, offset, text))
+                    in_code = not in_code
+                elif not in_code and line.startswith(b"#"):
+                    match = _HEADING_RE.match(line)
+                    if match:
+                        title = (match.group(2) or b"").decode("utf-8", "replace")
+                        headings.append(
+                            Heading(len(match.group(1)), title, number, offset)
+                        )
+                offset += len(line)
+        return cls(body_line, number, offsets, headings, fences)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            [self.body_line, self.lines, self.offsets, self.headings, self.fences],
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def from_json(cls, data: str) -> "Outline":
+        body_line, lines, offsets, headings, fences = json.loads(data)
+        return cls(
+            body_line,
+            lines,
+            offsets,
+            [Heading(*h) for h in headings],
+            [Fence(*f) for f in fences],
+        )
+
+    def section(self, title: str) -> tuple[int, int]:
+        """Lines ``(start, stop)`` of the first heading titled ``title`` (case
+        insensitive, else the first containing it) up to the next heading of
+        the same or a higher level."""
+        wanted = title.strip().lower()
+        found = next(
+            (h for h in self.headings if h.title.lower() == wanted), None
+        ) or next((h for h in self.headings if wanted in h.title.lower()), None)
+        if found is None:
+            raise KeyError(title)
+        stop = next(
+            (
+                h.line
+                for h in self.headings
+                if h.line > found.line and h.level <= found.level
+            ),
+            self.lines + 1,
+        )
+        return found.line, stop
+
+    def clamp(self, start: int, stop: int | None) -> tuple[int, int]:
+        """Limit a line range to the note's body."""
+        last = self.lines + 1
+        start = min(max(start, self.body_line), last)
+        stop = last if stop is None else min(max(stop, start), last)
+        return start, stop
+
+    def seek_point(self, line: int) -> tuple[int, int]:
+        """The closest known ``(line, offset)`` at or before ``line``."""
+        index = min((line - 1) // LINE_STRIDE, len(self.offsets) - 1)
+        if index < 0:
+            return 1, 0
+        best = (index * LINE_STRIDE + 1, self.offsets[index])
+        for known in (*self.headings, *self.fences):
+            if best[0] < known.line <= line:
+                best = (known.line, known.offset)
+        return best
+
+    def open_block(self, line: int) -> tuple[int, Fence | None]:
+        """Number of the first code block at or after ``line``, and the
+        opening fence when ``line`` falls inside that block."""
+        before = sum(1 for fence in self.fences if fence.line < line)
+        if before % 2:
+            return (before + 1) // 2, self.fences[before - 1]
+        return before // 2 + 1, None
+
+    def read(self, path: str, start: int, stop: int, size: int = 64 * 1024):
+        """Yield lines ``start`` to ``stop - 1`` as text in pieces of about
+        ``size`` bytes that end on line boundaries."""
+        line, offset = self.seek_point(start)
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for _ in range(start - line):
+                f.readline()
+            remaining = stop - start
+            while remaining > 0:
+                lines = f.readlines(size)[:remaining]
+                if not lines:
+                    break
+                remaining -= len(lines)
+                yield b"".join(lines).decode("utf-8")
+
+
+class OutlineCache:
+    def __init__(self, app_path: str) -> None:
+        self._conn = sqlite3.connect(os.path.join(app_path, CACHE_FILE_NAME))
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS outlines")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "OutlineCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+    def get(self, path: str) -> Outline:
+        st = os.stat(path)
+        row = self._conn.execute(
+            "SELECT mtime_ns, size, outline FROM outlines WHERE path = ?", (path,)
+        ).fetchone()
+        if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return Outline.from_json(row[2])
+        outline = Outline.scan(path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO outlines (path, mtime_ns, size, outline) "
+            "VALUES (?, ?, ?, ?)",
+            (path, st.st_mtime_ns, st.st_size, outline.to_json()),
+        )
+        return outline
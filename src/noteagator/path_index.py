@@ -0,0 +1,247 @@
+import math
+import os
+import sqlite3
+import time
+from typing import NamedTuple
+
+from .fsutils import RACY_NS, list_dir, path_range
+from .ignore import IgnoreRules, ignore_stamp
+
+INDEX_FILE_NAME = "path_index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    ignore_stamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paths (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent TEXT NOT NULL,
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS paths_parent ON paths (parent);
+CREATE TABLE IF NOT EXISTS trigrams (
+    gram TEXT NOT NULL,
+    path_id INTEGER NOT NULL,
+    PRIMARY KEY (gram, path_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS trigrams_path ON trigrams (path_id);
+"""
+
+
+class Match(NamedTuple):
+    path: str
+    is_dir: bool
+    score: float
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _term_score(term: str, fuzzy: str | None) -> tuple[str, list[str]]:
+    # 4: file name starts with the term, 3: contains it, 2: path contains it.
+    sql = (
+        "CASE WHEN instr(p.name, ?) = 1 THEN 4.0 "
+        "WHEN instr(p.name, ?) > 0 THEN 3.0 "
+        f"WHEN instr(p.key, ?) > 0 THEN 2.0 ELSE {fuzzy or 0.0} END"
+    )
+    return sql, [term, term, term]
+
+
+class PathIndex:
+    """On-disk trigram index of the notebook's relative paths.
+
+    ``refresh`` stats the known directories (and their ignore files) and only
+    lists the ones that changed; ``rebuild`` walks the whole notebook again.
+    """
+
+    def __init__(self, app_path: str, base: str) -> None:
+        self._base = base
+        self._conn = sqlite3.connect(os.path.join(app_path, INDEX_FILE_NAME))
+        self._conn.executescript(_SCHEMA)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'base'")
+        found = row.fetchone()
+        if found is None or found[0] != base:
+            with self._conn:
+                self._clear()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('base', ?)",
+                    (base,),
+                )
+
+    def __enter__(self) -> "PathIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def base(self) -> str:
+        return self._base
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _clear(self) -> None:
+        self._conn.execute("DELETE FROM trigrams")
+        self._conn.execute("DELETE FROM paths")
+        self._conn.execute("DELETE FROM dirs")
+
+    def _key(self, path: str) -> str:
+        return os.path.relpath(path, self._base).replace(os.sep, "/").lower()
+
+    def _add(self, path: str, is_dir: bool) -> None:
+        key = self._key(path)
+        cur = self._conn.execute(
+            "INSERT INTO paths (path, parent, key, name, is_dir) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (path, os.path.dirname(path), key, key.rpartition("/")[2], int(is_dir)),
+        )
+        self._conn.executemany(
+            "INSERT INTO trigrams (gram, path_id) VALUES (?, ?)",
+            ((gram, cur.lastrowid) for gram in trigrams(key)),
+        )
+
+    def _drop(self, path: str, below_only: bool = False) -> int:
+        # Removes everything under ``path`` (and ``path`` itself unless
+        # ``below_only``); returns how many entries went.
+        where = "(path >= ? AND path < ?)"
+        args: tuple = path_range(path)
+        if not below_only:
+            where, args = f"(path = ? OR {where})", (path, *args)
+        ids = [
+            (path_id,)
+            for (path_id,) in self._conn.execute(
+                f"SELECT id FROM paths WHERE {where}", args
+            )
+        ]
+        self._conn.executemany("DELETE FROM trigrams WHERE path_id = ?", ids)
+        self._conn.execute(f"DELETE FROM paths WHERE {where}", args)
+        self._conn.execute(f"DELETE FROM dirs WHERE {where}", args)
+        return len(ids)
+
+    def _record_dir(self, directory: str, st: os.stat_result) -> None:
+        mtime_ns = st.st_mtime_ns
+        if time.time_ns() - mtime_ns < RACY_NS:
+            mtime_ns = -1
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dirs (path, mtime_ns, ignore_stamp) "
+            "VALUES (?, ?, ?)",
+            (directory, mtime_ns, ignore_stamp(directory)),
+        )
+
+    def _sync(self, pending: list[str], ignore: IgnoreRules) -> int:
+        # Re-lists each pending directory against its indexed children. New
+        # subdirectories are queued in turn, so a fresh subtree is walked.
+        changed = 0
+        while pending:
+            directory = pending.pop()
+            try:
+                st = os.stat(directory)
+            except OSError:
+                st = None
+            entries = None if st is None else list_dir(directory, ignore)
+            if entries is None:
+                changed += self._drop(directory, below_only=directory == self._base)
+                continue
+            known = dict(
+                self._conn.execute(
+                    "SELECT path, is_dir FROM paths WHERE parent = ?", (directory,)
+                )
+            )
+            for path, was_dir in known.items():
+                if entries.get(path) != was_dir:
+                    changed += self._drop(path)
+            for path, is_dir in entries.items():
+                if known.get(path) == is_dir:
+                    continue
+                self._add(path, is_dir)
+                changed += 1
+                if is_dir:
+                    pending.append(path)
+            self._record_dir(directory, st)
+        return changed
+
+    def refresh(self) -> int:
+        ignore = IgnoreRules(self._base)
+        with self._conn:
+            dirs = self._conn.execute("SELECT path, mtime_ns, ignore_stamp FROM dirs")
+            pending = []
+            stale_rules = []
+            for directory, mtime_ns, stamp in dirs.fetchall():
+                try:
+                    st = os.stat(directory)
+                except OSError:
+                    pending.append(directory)
+                    continue
+                if ignore_stamp(directory) != stamp:
+                    stale_rules.append(directory)
+                elif st.st_mtime_ns != mtime_ns:
+                    pending.append(directory)
+            if not self._conn.execute(
+                "SELECT 1 FROM dirs WHERE path = ?", (self._base,)
+            ).fetchone():
+                pending.append(self._base)
+            changed = 0
+            for directory in stale_rules:
+                # The rules apply to the whole subtree: list it all again.
+                changed += self._drop(directory, below_only=True)
+                pending.append(directory)
+            return changed + self._sync(sorted(set(pending), reverse=True), ignore)
+
+    def rebuild(self) -> int:
+        with self._conn:
+            self._clear()
+            return self._sync([self._base], IgnoreRules(self._base))
+
+    def find(self, query: str, limit: int | None = None) -> list[Match]:
+        """Best matches for the whitespace-separated terms of ``query``.
+
+        A path matches when it contains every term, or shares at least half
+        of the trigrams of each term of three or more characters. Terms in
+        the file name score highest; ties go to the shorter path. SQLite does
+        the counting, scoring and ordering so only the results come back.
+        """
+        terms = list(dict.fromkeys(query.lower().split()))
+        if not terms:
+            return []
+        joins, scores, conditions = [], [], []
+        join_args: list = []
+        score_args: list = []
+        condition_args: list = []
+        for term in terms:
+            grams = trigrams(term)
+            fuzzy = None
+            if grams:
+                alias = f"t{len(joins)}"
+                joins.append(
+                    f"JOIN (SELECT path_id, COUNT(*) AS n FROM trigrams "
+                    f"WHERE gram IN ({','.join('?' * len(grams))}) "
+                    f"GROUP BY path_id HAVING n >= ?) {alias} "
+                    f"ON {alias}.path_id = p.id"
+                )
+                join_args += [*grams, math.ceil(len(grams) / 2)]
+                fuzzy = f"{alias}.n * 1.0 / {len(grams)}"
+            else:
+                conditions.append("instr(p.key, ?) > 0")
+                condition_args.append(term)
+            sql, args = _term_score(term, fuzzy)
+            scores.append(sql)
+            score_args += args
+        rows = self._conn.execute(
+            f"SELECT p.path, p.is_dir, {' + '.join(scores)} AS score "
+            f"FROM paths p {' '.join(joins)} "
+            f"WHERE {' AND '.join(conditions) or 1} "
+            "ORDER BY score DESC, length(p.key), p.key LIMIT ?",
+            score_args + join_args + condition_args + [-1 if limit is None else limit],
+        )
+        return [Match(path, bool(is_dir), score) for path, is_dir, score in rows]
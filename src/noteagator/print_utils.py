@@ -1,8 +1,11 @@
+import io
 import re
+import sys
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
-import pyperclip
-
 NOTE_COLORS = {
     "<red>": "\033[91m",
     "<blue>": "\033[94m",
@@ -11,90 +14,228 @@ NOTE_COLORS = {
 }
 
 
+class CapturedOutput(io.StringIO):
+    """In-memory stdout that reports the tty-ness of the stream it stands in
+    for, so rich and click colour their output exactly as they would there."""
+
+    def __init__(self, tty: bool) -> None:
+        super().__init__()
+        self._tty = tty
+
+    def isatty(self) -> bool:
+        return self._tty
+
+
+@contextmanager
+def capture_stdout():
+    captured = CapturedOutput(sys.stdout.isatty())
+    with redirect_stdout(captured):
+        yield captured
+
+
+@lru_cache(maxsize=64)
+def _compile_substitutions(pairs: tuple[tuple[str, str], ...]):
+    table = dict(pairs)
+    # Longest first, so a key that is a prefix of another never shadows it.
+    alternatives = sorted(table, key=len, reverse=True)
+    return re.compile("|".join(re.escape(k) for k in alternatives)), table
+
+
+def substitute(text: str, pairs: tuple[tuple[str, str], ...]) -> str:
+    """Replace every key of ``pairs`` in one pass over ``text``.
+
+    Replacements are never re-scanned, so one substitution's output cannot be
+    matched by another key.
+    """
+    if not pairs:
+        return text
+    pattern, table = _compile_substitutions(pairs)
+    return pattern.sub(lambda m: table[m.group()], text)
+
+
+def placeholder_pairs(
+    replace_placeholders_dict: dict[str, Any], meta_data: dict[str, Any]
+) -> list[tuple[str, str]]:
+    placeholders = meta_data.get("placeholders")
+    if placeholders is None:
+        return []
+    table: dict[str, str] = {}
+    for key, value in replace_placeholders_dict.items():
+        if value is not None and placeholders.get(key) is not None:
+            source = str(placeholders[key])
+            if source:
+                table.setdefault(source, str(value))
+    return list(table.items())
+
+
 def add_colors(text: str) -> str:
-    for key, value in NOTE_COLORS.items():
-        text = text.replace(key, str(value))
-    return text
+    return substitute(text, tuple(NOTE_COLORS.items()))
 
 
 def replace_placeholders(
     body: str, replace_placeholders_dict: dict[str, Any], meta_data: dict[str, Any]
 ) -> str:
-    for key, value in replace_placeholders_dict.items():
-        if value is not None and meta_data.get("placeholders") is not None:
-            if meta_data.get("placeholders").get(key) is not None:
-                body = body.replace(str(meta_data["placeholders"][key]), str(value))
-    return body
+    return substitute(
+        body, tuple(placeholder_pairs(replace_placeholders_dict, meta_data))
+    )
 
 
-def get_code_by_number_markdown(text: str, copy_number: str) -> str:
-    pattern = r"--copy (\d+)\n```(.*?)\n(.*?)\n```"
+FENCE = "```"
 
-    matches = re.findall(pattern, text, re.DOTALL)
-    for match in matches:
-        if int(match[0]) == int(copy_number):
-            return match[2]
 
-    return None
+@dataclass(frozen=True)
+class CodeBlock:
+    """A fenced code block, as character offsets into the note body.
+
+    ``start``/``end`` span the fence lines too; ``content_start`` and
+    ``content_end`` span just the code. A block left open runs to the end.
+    """
+
+    number: int
+    language: str
+    start: int
+    content_start: int
+    content_end: int
+    end: int
+
+    def content(self, text: str) -> str:
+        return "\n".join(text[self.content_start : self.content_end].splitlines())
 
 
-def add_copy_markers_markdown(input_string: str) -> str:
-    pattern = r"```(.*?)\n(.*?)\n```"
+def iter_lines(text: str):
+    """Yield ``(offset, line)`` for each line, without its line ending."""
+    offset = 0
+    size = len(text)
+    while offset < size:
+        newline = text.find("\n", offset)
+        if newline < 0:
+            newline = size
+        yield offset, text[offset:newline]
+        offset = newline + 1
 
-    def replace(match):
-        language = match.group(1).strip()
-        block_content = match.group(2)
-        replace.counter += 1
-        return f"--copy {replace.counter}\n```{language}\n{block_content}\n```"
 
-    replace.counter = 0
-    modified_string = re.sub(pattern, replace, input_string, flags=re.DOTALL)
+def find_code_blocks(text: str, first: int = 1) -> list[CodeBlock]:
+    """Fenced blocks of ``text``, numbered from ``first``."""
+    blocks: list[CodeBlock] = []
+    opened: tuple[int, str, int] | None = None
+    for offset, line in iter_lines(text):
+        if not line.startswith(FENCE):
+            continue
+        if opened is None:
+            opened = (offset, line[len(FENCE) :].strip(), offset + len(line) + 1)
+        else:
+            start, language, content_start = opened
+            end = min(offset + len(line) + 1, len(text))
+            blocks.append(
+                CodeBlock(
+                    first + len(blocks), language, start, content_start, offset, end
+                )
+            )
+            opened = None
+    if opened is not None:
+        start, language, content_start = opened
+        content_start = min(content_start, len(text))
+        blocks.append(
+            CodeBlock(
+                first + len(blocks),
+                language,
+                start,
+                content_start,
+                len(text),
+                len(text),
+            )
+        )
+    return blocks
+
+
+def code_block_text(text: str, number, blocks: list[CodeBlock] | None = None):
+    """Code of block ``number`` (1-based), or None if there is no such block."""
+    if blocks is None:
+        blocks = find_code_blocks(text)
+    number = int(number)
+    first = blocks[0].number if blocks else 1
+    if first <= number < first + len(blocks):
+        return blocks[number - first].content(text)
+    return None
 
-    return modified_string
+
+# Public API for scripts; ngt resolves --copy through code_block_text.
+def get_code_by_number_markdown(text: str, copy_number: str) -> str:
+    return code_block_text(text, copy_number)
 
 
-def print_note_markdown(markdown: str, copy: str) -> None:
+def add_copy_markers_markdown(
+    input_string: str, blocks: list[CodeBlock] | None = None
+) -> str:
+    if blocks is None:
+        blocks = find_code_blocks(input_string)
+    parts = []
+    previous = 0
+    for block in blocks:
+        parts.append(input_string[previous : block.start])
+        parts.append(f"--copy {block.number}\n")
+        previous = block.start
+    parts.append(input_string[previous:])
+    return "".join(parts)
+
+
+def print_note_markdown(markdown: str, copy: str, first_block: int = 1) -> str | None:
+    import pyperclip
     from rich.console import Console
     from rich.markdown import Markdown
 
-    markdown = add_copy_markers_markdown(markdown)
+    blocks = find_code_blocks(markdown, first_block)
     console = Console()
-    md = Markdown(markdown)
-    console.print(md)
+    console.print(Markdown(add_copy_markers_markdown(markdown, blocks)))
     if copy:
-        pyperclip.copy(get_code_by_number_markdown(markdown, copy))
+        chunk = code_block_text(markdown, copy, blocks)
+        if not chunk:
+            print(f"No --copy {copy} block found.")
+            return None
+        pyperclip.copy(chunk)
+        return chunk
+    return None
 
 
-def add_copy_markers_slim(markdown_content: str) -> str:
-    lines = markdown_content.splitlines()
-    out = []
-    in_code = False
-    first_in_block = False
-    block_idx = 1
-
-    def indent_for(i: int) -> str:
-        return " " * len(f"--copy {i} ")
-
-    for line in lines:
-        if line.startswith("```"):
-            if not in_code:
-                in_code = True
-                first_in_block = True
+class _SlimRenderer:
+    def __init__(
+        self, copy: int | None = None, copied: list | None = None, first_block: int = 1
+    ) -> None:
+        self.copy = copy
+        self.copied = copied
+        self.in_code = False
+        self.first_in_block = False
+        self.block_idx = first_block
+
+    def render(self, chunk: str) -> list[str]:
+        out = []
+        for line in chunk.splitlines():
+            if line.startswith(FENCE):
+                if not self.in_code:
+                    self.in_code = True
+                    self.first_in_block = True
+                else:
+                    self.in_code = False
+                    self.block_idx += 1
+                continue
+
+            if self.in_code:
+                if self.copied is not None and self.block_idx == self.copy:
+                    self.copied.append(line)
+                if self.first_in_block:
+                    out.append(f"--copy {self.block_idx} $ {line}")
+                    self.first_in_block = False
+                else:
+                    out.append(" " * len(f"--copy {self.block_idx} ") + f"$ {line}")
             else:
-                in_code = False
-                block_idx += 1
-            continue
+                out.append(line)
+        return out
 
-        if in_code:
-            if first_in_block:
-                out.append(f"--copy {block_idx} $ {line}")
-                first_in_block = False
-            else:
-                out.append(f"{indent_for(block_idx)}$ {line}")
-        else:
-            out.append(line)
 
-    return "\n".join(out)
+# Public API for scripts, with extract_copy_block below; ngt itself streams
+# through write_note_slim.
+def add_copy_markers_slim(markdown_content: str) -> str:
+    return "\n".join(_SlimRenderer().render(markdown_content))
 
 
 def extract_copy_block(slim_text: str, copy_id: int) -> str:
@@ -120,27 +261,70 @@ def extract_copy_block(slim_text: str, copy_id: int) -> str:
     return "\n".join(buf)
 
 
-def print_note_slim(body: str, copy: int | None) -> None:
-    slim = add_copy_markers_slim(body)
-    print(slim)
+def write_note_slim(
+    chunks, copy: int | None, out=None, first_block: int = 1
+) -> str | None:
+    """Stream the slim rendering of ``chunks`` to ``out`` (stdout), copying
+    block ``copy`` to the clipboard from the same pass. Blocks are numbered
+    from ``first_block``."""
+    out = out or sys.stdout
+    copied: list[str] = []
+    renderer = _SlimRenderer(copy, copied, first_block)
+    wrote = False
+    for chunk in chunks:
+        lines = renderer.render(chunk)
+        if lines:
+            out.write("\n".join(lines) + "\n")
+            wrote = True
+    if not wrote:
+        out.write("\n")
 
     if copy is not None:
+        import pyperclip
+
         try:
-            chunk = extract_copy_block(slim, int(copy))
+            chunk = "\n".join(copied)
             if not chunk:
                 raise ValueError(f"No --copy {copy} block found.")
             pyperclip.copy(chunk)
+            return chunk
         except Exception as e:
-            print(e)
+            print(e, file=out)
+    return None
+
+
+def print_note_slim(body: str, copy: int | None) -> str | None:
+    return write_note_slim([body], copy)
+
+
+def _note_substitutions(
+    meta_data: dict[str, Any], replace_placeholders_dict: dict[str, Any]
+) -> tuple[tuple[str, str], ...]:
+    table = dict(placeholder_pairs(replace_placeholders_dict, meta_data))
+    # Colour tags were historically substituted first, so they win a clash.
+    table.update(NOTE_COLORS)
+    return tuple(table.items())
 
 
 def format_note_body(
     body: str, meta_data: dict[str, Any], i: str, j: str, k: str, u: str, d: str, p: str
 ) -> str:
     replace_placeholders_dict = {"i": i, "j": j, "k": k, "u": u, "d": d, "p": p}
-    body = add_colors(body)
-    body = replace_placeholders(body, replace_placeholders_dict, meta_data)
-    return body
+    return substitute(body, _note_substitutions(meta_data, replace_placeholders_dict))
+
+
+def format_note_chunks(
+    chunks, meta_data: dict[str, Any], i: str, j: str, k: str, u: str, d: str, p: str
+):
+    """``format_note_body`` applied to pieces of the body that end on line
+    boundaries, for streaming renderers."""
+    replace_placeholders_dict = {"i": i, "j": j, "k": k, "u": u, "d": d, "p": p}
+    pairs = _note_substitutions(meta_data, replace_placeholders_dict)
+    if any("\n" in key for key, _ in pairs):
+        yield substitute("".join(chunks), pairs)
+        return
+    for chunk in chunks:
+        yield substitute(chunk, pairs)
 
 
 def get_fmt(cli_fmt, config_fmt, note_fmt):
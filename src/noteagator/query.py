@@ -0,0 +1,214 @@
+import math
+import re
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Sequence
+
+OR_KEYWORD = "OR"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _case_variants(char: str) -> set[str]:
+    variants = {char, char.lower(), char.upper(), char.title()}
+    return {v for v in variants if len(v) == 1 and v.lower() == char.lower()}
+
+
+@lru_cache(maxsize=32)
+def compile_term(search_term: str) -> re.Pattern[bytes]:
+    needle = search_term.lower()
+    if needle.isascii():
+        return re.compile(re.escape(needle.encode("ascii")), re.IGNORECASE)
+    parts = []
+    for char in needle:
+        encoded = sorted(re.escape(v.encode("utf-8")) for v in _case_variants(char))
+        parts.append(
+            encoded[0] if len(encoded) == 1 else b"(?:%s)" % b"|".join(encoded)
+        )
+    return re.compile(b"".join(parts))
+
+
+@lru_cache(maxsize=32)
+def compile_regex(source: str) -> re.Pattern[bytes]:
+    try:
+        return re.compile(source.encode("utf-8"), re.IGNORECASE | re.MULTILINE)
+    except re.error as e:
+        raise ValueError(f"Invalid regular expression /{source}/: {e}") from e
+
+
+@dataclass(frozen=True)
+class Term:
+    text: str
+    regex: bool = False
+
+    @cached_property
+    def pattern(self) -> re.Pattern[bytes]:
+        return compile_regex(self.text) if self.regex else compile_term(self.text)
+
+    def __str__(self) -> str:
+        return f"/{self.text}/" if self.regex else self.text
+
+
+def _parse_term(arg: str) -> Term:
+    if len(arg) > 2 and arg.startswith("/") and arg.endswith("/"):
+        compile_regex(arg[1:-1])
+        return Term(arg[1:-1], regex=True)
+    return Term(arg)
+
+
+class Query:
+    """Search terms combined as an OR of AND clauses.
+
+    Each argument is one term: a plain (possibly multi-word) substring, or a
+    ``/regex/``. Consecutive terms must all match; a bare ``OR`` argument
+    starts a new alternative, so ``kubectl OR helm rollback`` matches notes
+    containing "kubectl", or both "helm" and "rollback".
+    """
+
+    def __init__(self, clauses: Sequence[Sequence[Term]]) -> None:
+        self.clauses = [tuple(c) for c in clauses if c]
+        if not self.clauses:
+            raise ValueError("Empty search query.")
+
+    @classmethod
+    def parse(cls, args: Sequence[str]) -> "Query":
+        clauses: list[list[Term]] = [[]]
+        for arg in args:
+            if arg == OR_KEYWORD:
+                clauses.append([])
+            else:
+                clauses[-1].append(_parse_term(arg))
+        return cls(clauses)
+
+    @classmethod
+    def from_text(cls, search_term: str) -> "Query":
+        return cls([[Term(search_term)]])
+
+    @cached_property
+    def terms(self) -> tuple[Term, ...]:
+        return tuple(dict.fromkeys(t for clause in self.clauses for t in clause))
+
+    @property
+    def single_text_term(self) -> Term | None:
+        if len(self.terms) == 1 and not self.terms[0].regex:
+            return self.terms[0]
+        return None
+
+    def matches(self, counts: dict[Term, int]) -> bool:
+        return any(all(counts.get(t) for t in clause) for clause in self.clauses)
+
+    def __str__(self) -> str:
+        return f" {OR_KEYWORD} ".join(
+            " ".join(str(t) for t in clause) for clause in self.clauses
+        )
+
+
+def count_terms(buf, query: Query, count: bool = False) -> dict[Term, int]:
+    if count:
+        return {t: sum(1 for _ in t.pattern.finditer(buf)) for t in query.terms}
+    counts: dict[Term, int] = {}
+    for clause in query.clauses:
+        for term in clause:
+            if term not in counts:
+                counts[term] = 1 if term.pattern.search(buf) else 0
+            if not counts[term]:
+                break
+        else:
+            return counts
+    return counts
+
+
+def bm25_scores(
+    docs: Sequence[tuple[dict[Term, int], int]],
+    doc_freq: dict[Term, int],
+    total_docs: int,
+    avg_length: float,
+) -> list[float]:
+    idf = {
+        term: math.log(1 + (total_docs - n + 0.5) / (n + 0.5))
+        for term, n in doc_freq.items()
+    }
+    avg_length = avg_length or 1.0
+    scores = []
+    for counts, length in docs:
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+        scores.append(
+            sum(
+                idf.get(term, 0.0) * tf * (BM25_K1 + 1) / (tf + norm)
+                for term, tf in counts.items()
+                if tf
+            )
+        )
+    return scores
+
+
+def rank_documents(
+    docs: Sequence[tuple[str, dict[Term, int], int]],
+    doc_freq: dict[Term, int],
+    total_docs: int,
+    avg_length: float,
+) -> list[str]:
+    scores = bm25_scores(
+        [(counts, length) for _, counts, length in docs],
+        doc_freq,
+        total_docs,
+        avg_length,
+    )
+    order = sorted(range(len(docs)), key=lambda i: -scores[i])
+    return [docs[i][0] for i in order]
+
+
+@dataclass(frozen=True)
+class MetaFilter:
+    """A front matter condition from ``--meta``.
+
+    ``key`` requires the key to exist, ``key=value`` an equal value (any
+    element, for lists) and ``key=prefix*`` a value starting with prefix.
+    Nested keys are addressed with dots (``owner.team=sre``); values compare
+    case-insensitively.
+    """
+
+    key: str
+    value: str | None = None
+    prefix: bool = False
+
+    @classmethod
+    def parse(cls, spec: str) -> "MetaFilter":
+        key, sep, value = spec.partition("=")
+        key = key.strip()
+        if not key:
+            raise ValueError(f"Invalid --meta filter {spec!r}: missing key.")
+        if not sep:
+            return cls(key)
+        if value.endswith("*"):
+            return cls(key, value[:-1].lower(), prefix=True)
+        return cls(key, value.lower())
+
+    def __str__(self) -> str:
+        if self.value is None:
+            return self.key
+        return f"{self.key}={self.value}{'*' if self.prefix else ''}"
+
+
+def flatten_metadata(meta: dict, prefix: str = "") -> list[tuple[str, str | None]]:
+    rows: list[tuple[str, str | None]] = []
+    for key, value in meta.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            rows.append((path, None))
+            rows.extend(flatten_metadata(value, f"{path}."))
+        elif isinstance(value, list):
+            rows.append((path, None))
+            rows.extend(
+                (path, str(v).lower())
+                for v in value
+                if v is not None and not isinstance(v, (dict, list))
+            )
+        elif value is None:
+            rows.append((path, None))
+        else:
+            if isinstance(value, bool):
+                value = "true" if value else "false"
+            rows.append((path, str(value).lower()))
+    return rows
@@ -0,0 +1,140 @@
+import codecs
+import hashlib
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+RENDER_CACHE_DIR_NAME = "render_cache"
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+# Notes bigger than this are streamed straight to stdout and never cached.
+MAX_ENTRY_BYTES = MAX_CACHE_BYTES // 4
+# Bump whenever a renderer's output changes so stale entries stop matching.
+RENDERER_VERSION = 3
+
+# Environment that changes how rich and click colour and lay out output.
+_TERMINAL_ENV = ("TERM", "COLORTERM", "NO_COLOR", "FORCE_COLOR")
+# Each entry starts with the length of the clipboard text (-1 for none),
+# followed by that text and then the rendered output, all UTF-8.
+_COPY_LENGTH = struct.Struct("<q")
+
+
+def terminal_signature() -> dict:
+    return {
+        "tty": sys.stdout.isatty(),
+        "columns": shutil.get_terminal_size().columns,
+        "env": {key: os.environ.get(key) for key in _TERMINAL_ENV},
+    }
+
+
+class CachedRender:
+    def __init__(self, file, copy_text: str | None) -> None:
+        self._file = file
+        self.copy_text = copy_text
+
+    def write_to(self, stream) -> None:
+        with self._file:
+            buffer = getattr(stream, "buffer", None)
+            if buffer is not None:
+                stream.flush()
+                shutil.copyfileobj(self._file, buffer)
+                buffer.flush()
+                return
+            decoder = codecs.getincrementaldecoder("utf-8")("surrogateescape")
+            for chunk in iter(lambda: self._file.read(64 * 1024), b""):
+                stream.write(decoder.decode(chunk))
+            stream.write(decoder.decode(b"", final=True))
+
+
+class RenderCache:
+    """Rendered ``ngt print`` output on disk, evicted least recently used first.
+
+    Entries are keyed by a hash of the note's bytes plus every option that
+    affects rendering, so an edited note or a different terminal simply
+    misses. A hit refreshes the entry's mtime, which eviction orders by.
+    """
+
+    def __init__(self, app_path: str, max_bytes: int = MAX_CACHE_BYTES) -> None:
+        self._dir = os.path.join(app_path, RENDER_CACHE_DIR_NAME)
+        self._max_bytes = max_bytes
+
+    @staticmethod
+    def key(content: bytes, **params) -> str:
+        digest = hashlib.blake2b(content, digest_size=20)
+        digest.update(
+            json.dumps([RENDERER_VERSION, params], sort_keys=True).encode("utf-8")
+        )
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._dir, key)
+
+    def get(self, key: str) -> CachedRender | None:
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        try:
+            (length,) = _COPY_LENGTH.unpack(f.read(_COPY_LENGTH.size))
+            copy_text = None
+            if length >= 0:
+                copy_text = f.read(length).decode("utf-8", errors="surrogateescape")
+            os.utime(path)
+        except (OSError, struct.error, UnicodeDecodeError):
+            f.close()
+            return None
+        return CachedRender(f, copy_text)
+
+    def put(self, key: str, output: str, copy_text: str | None = None) -> bool:
+        data = output.encode("utf-8", errors="surrogateescape")
+        copied = (
+            b""
+            if copy_text is None
+            else copy_text.encode("utf-8", errors="surrogateescape")
+        )
+        size = _COPY_LENGTH.size + len(copied) + len(data)
+        if size > self._max_bytes:
+            return False
+        os.makedirs(self._dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_COPY_LENGTH.pack(-1 if copy_text is None else len(copied)))
+                f.write(copied)
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._evict()
+        return True
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        with os.scandir(self._dir) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                total += st.st_size
+        if total <= self._max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self._max_bytes:
+                break
+
+    def clear(self) -> None:
+        shutil.rmtree(self._dir, ignore_errors=True)
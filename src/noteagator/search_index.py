@@ -0,0 +1,432 @@
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from typing import Any
+
+from .fsutils import (
+    RACY_NS,
+    file_contains,
+    files_under,
+    list_dir,
+    open_buffer,
+    path_range,
+    scan_query,
+    walk_sort_key,
+)
+from .ignore import (
+    SNIFF_BYTES,
+    IgnoreRules,
+    ignore_stamp,
+    looks_binary,
+    touches_ignore_files,
+)
+from .query import Query, Term, rank_documents
+
+INDEX_FILE_NAME = "search_index.sqlite3"
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    token TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term_id, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    ignore_stamp TEXT NOT NULL
+);
+"""
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """On-disk inverted index of the notebook, keyed by path, mtime and size.
+
+    ``refresh`` re-tokenizes only notes whose mtime or size changed since the
+    last pass and lists only directories whose mtime or ignore files changed;
+    ``rebuild`` discards everything and reads every note again.
+    Binary files keep a row with ``length`` -1 and no postings, so they are
+    not read again until they change.
+    """
+
+    def __init__(self, app_path: str, base: str) -> None:
+        self._base = base
+        self._index_path = os.path.join(app_path, INDEX_FILE_NAME)
+        self._conn = sqlite3.connect(self._index_path)
+        self._conn.executescript(_SCHEMA)
+        self._term_ids: dict[str, int] | None = None
+        self._watch = None
+        self._stale = True
+        self._data_version = self._get_data_version()
+        self._check_base()
+
+    @property
+    def base(self) -> str:
+        return self._base
+
+    @property
+    def index_path(self) -> str:
+        return self._index_path
+
+    def _get_data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_base(self) -> None:
+        if self._get_meta("base") != self._base:
+            self._clear()
+            with self._conn:
+                self._set_meta("base", self._base)
+
+    def sync(self) -> None:
+        """Drop in-memory state if another connection wrote to the index."""
+        version = self._get_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self._term_ids = None
+            self._check_base()
+
+    def watch(self, subscription) -> None:
+        """Let ``refresh`` re-read only the paths a watcher saw change."""
+        if subscription is not None and subscription.base != self._base:
+            raise ValueError(f"Watcher is for {subscription.base}, not {self._base}")
+        self._watch = subscription
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _get_meta(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,))
+        found = row.fetchone()
+        return found[0] if found else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _clear(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM terms")
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM dirs")
+        self._term_ids = None
+        self._stale = True
+
+    def _term_id(self, token: str) -> int:
+        if self._term_ids is None:
+            self._term_ids = dict(self._conn.execute("SELECT token, id FROM terms"))
+        term_id = self._term_ids.get(token)
+        if term_id is None:
+            cur = self._conn.execute("INSERT INTO terms (token) VALUES (?)", (token,))
+            term_id = self._term_ids[token] = cur.lastrowid
+        return term_id
+
+    def _drop_file(self, file_id: int) -> None:
+        self._conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _index_file(self, file_path: str, st: os.stat_result, file_id) -> None:
+        with open(file_path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+            if looks_binary(head):
+                counts: Counter = Counter()
+                length = -1
+            else:
+                text = (head + f.read()).decode("utf-8", errors="ignore")
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+        if file_id is not None:
+            self._conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+            self._conn.execute(
+                "UPDATE files SET mtime_ns = ?, size = ?, length = ? WHERE id = ?",
+                (st.st_mtime_ns, st.st_size, length, file_id),
+            )
+        else:
+            cur = self._conn.execute(
+                "INSERT INTO files (path, mtime_ns, size, length) VALUES (?, ?, ?, ?)",
+                (file_path, st.st_mtime_ns, st.st_size, length),
+            )
+            file_id = cur.lastrowid
+        self._conn.executemany(
+            "INSERT INTO postings (term_id, file_id, tf) VALUES (?, ?, ?)",
+            ((self._term_id(token), file_id, tf) for token, tf in counts.items()),
+        )
+
+    def _known(self, path: str | None = None) -> dict[str, tuple[int, int, int]]:
+        sql = "SELECT id, path, mtime_ns, size FROM files"
+        if path is None:
+            rows = self._conn.execute(sql)
+        else:
+            rows = self._conn.execute(
+                sql + " WHERE path = ? OR (path >= ? AND path < ?)",
+                (path, *path_range(path)),
+            )
+        return {p: (mtime_ns, size, file_id) for file_id, p, mtime_ns, size in rows}
+
+    def _reconcile(self, known, file_paths) -> int:
+        changed = 0
+        for file_path in file_paths:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            row = known.pop(file_path, None)
+            if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+                continue
+            try:
+                self._index_file(file_path, st, row[2] if row else None)
+            except OSError:
+                if row:
+                    known[file_path] = row
+                continue
+            changed += 1
+        for row in known.values():
+            self._drop_file(row[2])
+            changed += 1
+        return changed
+
+    def _walk(self, known, ignore: IgnoreRules) -> list[str]:
+        # Unchanged directories keep their indexed entries; _reconcile still
+        # stats each note for in-place edits.
+        recorded = {
+            path: (mtime_ns, stamp)
+            for path, mtime_ns, stamp in self._conn.execute(
+                "SELECT path, mtime_ns, ignore_stamp FROM dirs"
+            )
+        }
+        notes: dict[str, list[str]] = {}
+        for path in known:
+            notes.setdefault(os.path.dirname(path), []).append(path)
+        subdirs: dict[str, list[str]] = {}
+        for path in recorded:
+            subdirs.setdefault(os.path.dirname(path), []).append(path)
+        file_paths: list[str] = []
+        visited = []
+        pending = [(self._base, False)]
+        while pending:
+            directory, relist = pending.pop()
+            try:
+                st = os.stat(directory)
+            except OSError:
+                continue
+            stamp = ignore_stamp(directory)
+            row = recorded.get(directory)
+            relist = relist or (row is not None and row[1] != stamp)
+            if relist or row is None or row[0] != st.st_mtime_ns:
+                entries = list_dir(directory, ignore)
+                if entries is None:
+                    continue
+                file_paths += [p for p, is_dir in entries.items() if not is_dir]
+                children = [p for p, is_dir in entries.items() if is_dir]
+            else:
+                file_paths += notes.get(directory, ())
+                children = subdirs.get(directory, [])
+            mtime_ns = st.st_mtime_ns
+            if time.time_ns() - mtime_ns < RACY_NS:
+                mtime_ns = -1
+            visited.append((directory, mtime_ns, stamp))
+            pending += [(child, relist) for child in children]
+        self._conn.execute("DELETE FROM dirs")
+        self._conn.executemany(
+            "INSERT INTO dirs (path, mtime_ns, ignore_stamp) VALUES (?, ?, ?)",
+            visited,
+        )
+        return file_paths
+
+    def refresh(self) -> int:
+        changes = self._watch.drain() if self._watch is not None else None
+        ignore = IgnoreRules(self._base)
+        with self._conn:
+            if (
+                changes is None
+                or changes.rescan
+                or self._stale
+                or touches_ignore_files(changes.paths)
+            ):
+                known = self._known()
+                changed = self._reconcile(known, self._walk(known, ignore))
+                self._stale = False
+            else:
+                changed = sum(
+                    self._reconcile(self._known(path), files_under(path, ignore))
+                    for path in changes.paths
+                )
+            if changed:
+                self._conn.execute(
+                    "DELETE FROM terms WHERE id NOT IN "
+                    "(SELECT DISTINCT term_id FROM postings)"
+                )
+                self._term_ids = None
+        return changed
+
+    def rebuild(self) -> int:
+        self._clear()
+        return self.refresh()
+
+    def _files_for_token(self, token: str, left_open: bool, right_open: bool):
+        if left_open and right_open:
+            where, args = "instr(t.token, ?) > 0", (token,)
+        elif left_open:
+            where, args = "substr(t.token, ?) = ?", (-len(token), token)
+        elif right_open:
+            where = "t.token >= ? AND t.token < ?"
+            args = (token, token + "\U0010ffff")
+        else:
+            where, args = "t.token = ?", (token,)
+        rows = self._conn.execute(
+            "SELECT DISTINCT p.file_id FROM terms t "
+            "JOIN postings p ON p.term_id = t.id WHERE " + where,
+            args,
+        )
+        return {file_id for (file_id,) in rows}
+
+    def _paths(self, file_ids=None) -> list[str]:
+        rows = self._conn.execute("SELECT id, path FROM files WHERE length >= 0")
+        return [
+            path for file_id, path in rows if file_ids is None or file_id in file_ids
+        ]
+
+    def _candidate_ids(self, search_term: str) -> tuple[set[int] | None, bool]:
+        # Returns the files that can contain search_term (None meaning every
+        # file) and whether a hit still has to be confirmed against the text.
+        needle = search_term.lower()
+        spans = [(m.start(), m.end()) for m in _TOKEN_RE.finditer(needle)]
+        if not spans:
+            return None, True
+        file_ids: set[int] | None = None
+        for start, end in spans:
+            found = self._files_for_token(
+                needle[start:end], left_open=start == 0, right_open=end == len(needle)
+            )
+            file_ids = found if file_ids is None else file_ids & found
+            if not file_ids:
+                return set(), False
+        exact = len(spans) == 1 and spans[0] == (0, len(needle))
+        return file_ids, not exact
+
+    def candidates(self, search_term: str) -> tuple[list[str], bool]:
+        file_ids, needs_verify = self._candidate_ids(search_term)
+        return self._paths(file_ids), needs_verify
+
+    def _query_candidates(self, query: Query) -> list[str]:
+        file_ids: set[int] = set()
+        for clause in query.clauses:
+            clause_ids: set[int] | None = None
+            for term in clause:
+                if term.regex:
+                    continue
+                found, _ = self._candidate_ids(term.text)
+                if found is not None:
+                    clause_ids = found if clause_ids is None else clause_ids & found
+            if clause_ids is None:
+                return self._paths()
+            file_ids |= clause_ids
+        return self._paths(file_ids)
+
+    def iter_search(self, search_term: str | Query, only_paths=None):
+        """Yield matching paths in walk order, reading each candidate only
+        when the caller asks for the next match."""
+        if isinstance(search_term, Query) and search_term.single_text_term:
+            search_term = search_term.single_text_term.text
+        if isinstance(search_term, Query):
+            paths = self._query_candidates(search_term)
+
+            def verify(path: str) -> bool:
+                counts, _ = scan_query(path, search_term)
+                return search_term.matches(counts)
+
+        else:
+            paths, needs_verify = self.candidates(search_term)
+
+            def verify(path: str) -> bool:
+                return not needs_verify or file_contains(path, search_term)
+
+        for path in sorted(paths, key=lambda p: walk_sort_key(self._base, p)):
+            if only_paths is not None and path not in only_paths:
+                continue
+            try:
+                if verify(path):
+                    yield path
+            except OSError:
+                continue
+
+    def search(self, search_term: str | Query, only_paths=None) -> list[str]:
+        return list(self.iter_search(search_term, only_paths))
+
+    def _doc_freq(self, term: Term, known: dict, only_paths=None) -> int:
+        # Exact postings answer directly; otherwise check the candidates.
+        if term.regex:
+            file_ids, needs_verify = None, True
+        else:
+            file_ids, needs_verify = self._candidate_ids(term.text)
+        paths = [
+            p for p in self._paths(file_ids) if only_paths is None or p in only_paths
+        ]
+        if not needs_verify:
+            return len(paths)
+        found = 0
+        for path in paths:
+            if path in known:
+                found += bool(known[path].get(term))
+                continue
+            try:
+                with open_buffer(path) as buf:
+                    found += bool(buf) and term.pattern.search(buf) is not None
+            except OSError:
+                continue
+        return found
+
+    def ranked(self, query: Query, only_paths=None) -> list[str]:
+        """Matches ordered by BM25 with document frequencies and lengths taken
+        over the whole indexed notebook, as ``search_files(rank=True)`` does."""
+        known = {}
+        docs = []
+        for path in sorted(
+            self._query_candidates(query), key=lambda p: walk_sort_key(self._base, p)
+        ):
+            if only_paths is not None and path not in only_paths:
+                continue
+            try:
+                counts, size = scan_query(path, query, count=True)
+            except OSError:
+                continue
+            known[path] = counts
+            if query.matches(counts):
+                docs.append((path, counts, size))
+        doc_freq = {t: self._doc_freq(t, known, only_paths) for t in query.terms}
+        rows = self._conn.execute("SELECT path, size FROM files WHERE length >= 0")
+        sizes = [size for p, size in rows if only_paths is None or p in only_paths]
+        avg_length = sum(sizes) / len(sizes) if sizes else 0.0
+        return rank_documents(docs, doc_freq, len(sizes), avg_length)
+
+    def stats(self) -> dict[str, Any]:
+        files, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM files WHERE length >= 0"
+        ).fetchone()
+        (terms,) = self._conn.execute("SELECT COUNT(*) FROM terms").fetchone()
+        return {"files": files, "terms": terms, "tokens": total}
@@ -0,0 +1,272 @@
+import os
+import struct
+import sys
+import threading
+from typing import NamedTuple
+
+from .fsutils import walk_files
+
+EXCLUDED_DIRS = {".git"}
+POLL_INTERVAL = 1.0
+
+# inotify(7) constants.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+_EVENT = struct.Struct("iIII")
+
+
+class Changes(NamedTuple):
+    paths: tuple[str, ...]
+    rescan: bool
+
+
+def collapse_paths(paths) -> tuple[str, ...]:
+    """Sorted paths with any path below another one in the set dropped."""
+    kept: list[str] = []
+    for path in sorted(paths):
+        if kept and (path == kept[-1] or path.startswith(kept[-1] + os.sep)):
+            continue
+        kept.append(path)
+    return tuple(kept)
+
+
+def _watched_dirs(base: str):
+    for root, dirs, _ in os.walk(base, topdown=True):
+        dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
+        yield root
+
+
+class _InotifyBackend:
+    def __init__(self, base: str) -> None:
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        self._paths: dict[int, str] = {}
+        self._wds: dict[str, int] = {}
+        try:
+            for directory in _watched_dirs(base):
+                self._add_watch(directory)
+        except OSError:
+            self.close()
+            raise
+        self._base_wd = self._wds.get(base)
+
+    def _add_watch(self, directory: str) -> None:
+        import ctypes
+
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            if os.path.isdir(directory):
+                raise OSError(errno, f"inotify_add_watch failed for {directory}")
+            return
+        self._paths[wd] = directory
+        self._wds[directory] = wd
+
+    def _forget_tree(self, directory: str) -> None:
+        prefix = directory + os.sep
+        for path in [p for p in self._wds if p == directory or p.startswith(prefix)]:
+            wd = self._wds.pop(path)
+            self._paths.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def read(self) -> tuple[set[str], bool]:
+        paths: set[str] = set()
+        rescan = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, size = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset : offset + size].rstrip(b"\0"))
+                offset += size
+                rescan |= self._handle(wd, mask, name, paths)
+        return paths, rescan
+
+    def _handle(self, wd: int, mask: int, name: str, paths: set[str]) -> bool:
+        if mask & IN_Q_OVERFLOW:
+            return True
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF) and wd == self._base_wd:
+            return True
+        if mask & IN_IGNORED:
+            directory = self._paths.pop(wd, None)
+            if directory is not None:
+                self._wds.pop(directory, None)
+            return False
+        directory = self._paths.get(wd)
+        if directory is None or not name or name in EXCLUDED_DIRS:
+            return False
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                self._forget_tree(path)
+                paths.add(path)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    for subdir in _watched_dirs(path):
+                        self._add_watch(subdir)
+                except OSError:
+                    return True
+                paths.add(path)
+        else:
+            paths.add(path)
+        return False
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingBackend:
+    def __init__(self, base: str, interval: float) -> None:
+        self._base = base
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._pending: set[str] = set()
+        self._snapshot = self._scan()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="ngt-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        for path in walk_files(self._base):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def poll_now(self) -> None:
+        current = self._scan()
+        previous, self._snapshot = self._snapshot, current
+        changed = {
+            path
+            for path in previous.keys() | current.keys()
+            if previous.get(path) != current.get(path)
+        }
+        if changed:
+            with self._lock:
+                self._pending |= changed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.poll_now()
+
+    def read(self) -> tuple[set[str], bool]:
+        with self._lock:
+            paths, self._pending = self._pending, set()
+        return paths, False
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class Subscription:
+    """One consumer's view of a watcher: the changes since its last drain.
+
+    A new subscription starts out asking for a full rescan, since the
+    consumer has not been reconciled against the tree yet.
+    """
+
+    def __init__(self, watcher: "Watcher") -> None:
+        self._watcher = watcher
+        self._paths: set[str] = set()
+        self._rescan = True
+
+    @property
+    def base(self) -> str:
+        return self._watcher.base
+
+    def _add(self, paths: set[str], rescan: bool) -> None:
+        self._paths |= paths
+        self._rescan |= rescan
+
+    def drain(self) -> Changes:
+        self._watcher.poll()
+        changes = Changes(collapse_paths(self._paths), self._rescan)
+        self._paths = set()
+        self._rescan = False
+        return changes
+
+
+class Watcher:
+    """Paths changed under ``base``, from inotify or, elsewhere, mtime polling."""
+
+    def __init__(
+        self, base: str, polling: bool = False, poll_interval: float = POLL_INTERVAL
+    ) -> None:
+        self.base = base
+        self._subscriptions: list[Subscription] = []
+        self._backend = None
+        if not polling and sys.platform.startswith("linux"):
+            try:
+                self._backend = _InotifyBackend(base)
+            except (OSError, AttributeError):
+                self._backend = None
+        if self._backend is None:
+            self._backend = _PollingBackend(base, poll_interval)
+
+    @property
+    def kind(self) -> str:
+        return "inotify" if isinstance(self._backend, _InotifyBackend) else "polling"
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def poll(self) -> None:
+        paths, rescan = self._backend.read()
+        if paths or rescan:
+            for subscription in self._subscriptions:
+                subscription._add(paths, rescan)
+
+    def close(self) -> None:
+        self._backend.close()
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
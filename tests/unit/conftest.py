@@ -0,0 +1,42 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from noteagator.config import Config
+
+
+@pytest.fixture
+def make_file():
+    def make(p: Path, data: str | bytes = "note\n") -> str:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, bytes):
+            p.write_bytes(data)
+        else:
+            p.write_text(data, encoding="utf-8")
+        return str(p)
+
+    return make
+
+
+@pytest.fixture
+def shift_mtime():
+    def shift(*paths, seconds: float = 1.0) -> None:
+        # Forward to make a change visible, or back past the racy window.
+        for p in paths:
+            st = os.stat(p)
+            mtime_ns = st.st_mtime_ns + int(seconds * 1_000_000_000)
+            os.utime(p, ns=(st.st_atime_ns, mtime_ns))
+
+    return shift
+
+
+@pytest.fixture
+def printed_note(tmp_path, monkeypatch, make_file, printed_note_text) -> Path:
+    # Display entry 1 for ngt print; each module supplies printed_note_text.
+    monkeypatch.setenv("HOME", str(tmp_path))
+    note = Path(make_file(tmp_path / "nb" / "a.md", printed_note_text))
+    cfg = Config()
+    cfg.notebook_base_dir = str(note.parent)
+    cfg.display_index = {"1": {"type": "file", "absolute_path": str(note)}}
+    return note
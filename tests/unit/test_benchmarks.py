@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks.notebook import NotebookShape, generate_notebook
+from benchmarks.run import main
+from noteagator.note import Note
+
+
+def list_files(root):
+    return sorted(
+        os.path.relpath(os.path.join(d, f), root)
+        for d, _, files in os.walk(root)
+        for f in files
+    )
+
+
+def test_generate_notebook_shape(tmp_path):
+    shape = NotebookShape(notes=40, depth=2, fanout=3, binary_ratio=0.25, seed=1)
+    counts = generate_notebook(str(tmp_path), shape)
+
+    files = list_files(tmp_path)
+    assert len(files) == 40
+    assert counts["notes"] + counts["binary"] == 40
+    assert counts["binary"] == sum(f.endswith(".png") for f in files) > 0
+    assert all(f.count(os.sep) == 2 for f in files)
+
+
+def test_generate_notebook_is_deterministic(tmp_path):
+    shape = NotebookShape(notes=15, front_matter="rich", seed=7)
+    generate_notebook(str(tmp_path / "a"), shape)
+    generate_notebook(str(tmp_path / "b"), shape)
+    for rel in list_files(tmp_path / "a"):
+        assert (tmp_path / "a" / rel).read_bytes() == (
+            tmp_path / "b" / rel
+        ).read_bytes()
+
+
+@pytest.mark.parametrize(
+    "style,keys",
+    [("simple", {"description"}), ("rich", {"placeholders", "format", "tags"})],
+)
+def test_front_matter_styles(tmp_path, style, keys):
+    generate_notebook(
+        str(tmp_path), NotebookShape(notes=3, depth=0, front_matter=style)
+    )
+    note = Note(str(tmp_path / "note0000000.md"))
+    assert keys <= set(note.metadata)
+
+
+def test_run_emits_json_results(tmp_path):
+    out = tmp_path / "results.json"
+    result = CliRunner().invoke(
+        main,
+        [
+            "--notes",
+            "12",
+            "--repeat",
+            "1",
+            "--sample",
+            "3",
+            "--only",
+            "ls_recursive",
+            "--only",
+            "search_scan",
+            "--only",
+            "render_slim",
+            "-o",
+            str(out),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    report = json.loads(out.read_text())
+    assert set(report["results"]) == {"ls_recursive", "search_scan", "render_slim"}
+    assert report["shape"]["notes"] == 12
+    assert all(r["min_s"] >= 0 for r in report["results"].values())
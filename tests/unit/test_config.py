@@ -3,7 +3,7 @@ from pathlib import Path
 
 import pytest
 
-from noteagator.config import Config
+from noteagator.config import Config, session_name
 
 
 def read_cfg(cfg) -> dict:
@@ -12,7 +12,8 @@ def read_cfg(cfg) -> dict:
 
 
 @pytest.fixture
-def cfg(tmp_path) -> Config:
+def cfg(tmp_path, monkeypatch) -> Config:
+    monkeypatch.delenv("NGT_SESSION", raising=False)
     fake_home = tmp_path / "home"
     fake_home.mkdir()
     return Config(home_dir=str(fake_home))
@@ -91,7 +92,24 @@ def test_display_index_round_trip_persists(cfg: Config, tmp_path: Path):
     }
     cfg.display_index = payload
     assert cfg.display_index == payload
-    assert read_cfg(cfg)["display_index"] == payload
+    assert "display_index" not in read_cfg(cfg)
+
+    reopened = Config(home_dir=str(Path(cfg.app_path).parent))
+    assert reopened.display_index == payload
+    assert reopened.display_entry("2") == payload["2"]
+    assert reopened.display_entry("3") == {}
+
+
+def test_legacy_display_index_is_moved_out_of_config(cfg: Config, tmp_path: Path):
+    legacy = {"1": {"type": "dir", "absolute_path": str(tmp_path)}}
+    data = read_cfg(cfg)
+    data["display_index"] = legacy
+    with open(cfg.config_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    migrated = Config(home_dir=str(Path(cfg.app_path).parent))
+    assert "display_index" not in read_cfg(migrated)
+    assert migrated.display_entry(1) == legacy["1"]
 
 
 def test_return_file_path_valid_file(cfg: Config, tmp_path: Path):
@@ -113,3 +131,171 @@ def test_return_file_path_non_file_raises(cfg: Config, tmp_path: Path):
     with pytest.raises(SystemExit) as exc:
         cfg.return_file_path("2")
     assert "Invalid Selection" in str(exc.value)
+
+
+@pytest.fixture
+def writes(cfg: Config, monkeypatch) -> list:
+    calls = []
+    real = cfg._write_config_file
+
+    def counting(data):
+        calls.append(dict(data))
+        real(data)
+
+    monkeypatch.setattr(cfg, "_write_config_file", counting)
+    return calls
+
+
+def test_transaction_coalesces_updates_into_one_write(cfg: Config, writes, tmp_path):
+    with cfg.transaction():
+        cfg.notebook_base_dir = str(tmp_path)
+        cfg.notebook_cwd = str(tmp_path)
+        cfg.print_mode = "slim"
+        assert writes == []
+
+    assert len(writes) == 1
+    data = read_cfg(cfg)
+    assert data["base"] == data["cwd"] == str(tmp_path)
+    assert data["print_mode"] == "slim"
+
+
+def test_nested_transactions_write_once_at_outermost_exit(cfg: Config, writes):
+    with cfg.transaction():
+        with cfg.transaction():
+            cfg.print_mode = "slim"
+        assert writes == []
+    assert len(writes) == 1
+
+
+def test_transaction_rolls_back_on_error(cfg: Config, writes, tmp_path):
+    before = read_cfg(cfg)
+    with pytest.raises(RuntimeError):
+        with cfg.transaction():
+            cfg.notebook_cwd = str(tmp_path)
+            raise RuntimeError("boom")
+
+    assert writes == []
+    assert cfg.notebook_cwd == before["cwd"]
+    assert read_cfg(cfg) == before
+
+
+def test_unchanged_values_skip_the_write(cfg: Config, writes):
+    cfg.print_mode = "slim"
+    writes.clear()
+    cfg.notebook_base_dir = cfg.notebook_base_dir
+    with cfg.transaction():
+        cfg.notebook_cwd = cfg.notebook_cwd
+    assert writes == []
+
+
+def test_construction_does_not_rewrite_complete_config(cfg: Config, monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        Config, "_write_config_file", lambda self, data: calls.append(data)
+    )
+    Config(home_dir=str(Path(cfg.app_path).parent))
+    assert calls == []
+
+
+def test_write_is_atomic_and_leaves_no_temp_files(cfg: Config, monkeypatch):
+    before = read_cfg(cfg)
+
+    def fail_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("noteagator.config.json.dump", fail_dump)
+    with pytest.raises(OSError):
+        cfg.print_mode = "slim"
+
+    assert read_cfg(cfg) == before
+    assert sorted(p.name for p in Path(cfg.app_path).iterdir()) == [
+        "config.json",
+        "notebook",
+    ]
+
+
+def test_saves_merge_with_changes_from_other_processes(cfg: Config, tmp_path):
+    other = Config(home_dir=str(Path(cfg.app_path).parent))
+    cfg.notebook_cwd = str(tmp_path)
+    other.print_mode = "slim"
+    data = read_cfg(cfg)
+    assert data["cwd"] == str(tmp_path)
+    assert data["print_mode"] == "slim"
+    assert other.notebook_cwd == str(tmp_path)
+
+
+def _set_many(home, worker, count):
+    cfg = Config(home_dir=home)
+    for n in range(count):
+        cfg._set(f"w{worker}", n)
+
+
+def test_concurrent_writers_do_not_lose_updates(cfg: Config):
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("fork")
+    home = str(Path(cfg.app_path).parent)
+    procs = [ctx.Process(target=_set_many, args=(home, w, 30)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+    data = read_cfg(cfg)
+    assert [data[f"w{w}"] for w in range(4)] == [29] * 4
+    assert data["base"] == cfg.default_notebook_path
+
+
+@pytest.mark.parametrize(
+    "value, tmux, expected",
+    [
+        ("", None, None),
+        ("work", None, "work"),
+        ("a/b c", None, "a_b_c"),
+        ("auto", "%3", "3"),
+    ],
+)
+def test_session_name(monkeypatch, value, tmux, expected):
+    monkeypatch.setenv("NGT_SESSION", value)
+    if tmux is None:
+        monkeypatch.delenv("TMUX_PANE", raising=False)
+    else:
+        monkeypatch.setenv("TMUX_PANE", tmux)
+    assert session_name() == expected
+
+
+def test_sessions_keep_their_own_cwd_and_display_index(cfg: Config, monkeypatch):
+    home = str(Path(cfg.app_path).parent)
+    shared_dir = Path(home) / "shared"
+    one_dir = Path(home) / "one"
+    shared_dir.mkdir()
+    one_dir.mkdir()
+    cfg.notebook_cwd = str(shared_dir)
+    cfg.display_index = {"1": {"type": "dir", "absolute_path": str(shared_dir)}}
+
+    monkeypatch.setenv("NGT_SESSION", "one")
+    one = Config(home_dir=home)
+    assert one.notebook_cwd == str(shared_dir)
+    assert one.display_entry(1)["absolute_path"] == str(shared_dir)
+    one.notebook_cwd = str(one_dir)
+    one.display_index = {"1": {"type": "dir", "absolute_path": str(one_dir)}}
+    assert Config(home_dir=home).notebook_cwd == str(one_dir)
+    assert read_cfg(cfg)["cwd"] == str(shared_dir)
+
+    monkeypatch.setenv("NGT_SESSION", "two")
+    two = Config(home_dir=home)
+    assert two.notebook_cwd == str(shared_dir)
+    assert two.display_entry(1)["absolute_path"] == str(shared_dir)
+
+    monkeypatch.delenv("NGT_SESSION")
+    assert Config(home_dir=home).display_entry(1)["absolute_path"] == str(shared_dir)
+
+
+def test_session_cwd_that_was_removed_falls_back(cfg: Config, monkeypatch):
+    home = str(Path(cfg.app_path).parent)
+    gone = Path(home) / "gone"
+    gone.mkdir()
+    monkeypatch.setenv("NGT_SESSION", "one")
+    Config(home_dir=home).notebook_cwd = str(gone)
+    gone.rmdir()
+    assert Config(home_dir=home).notebook_cwd == cfg.notebook_cwd
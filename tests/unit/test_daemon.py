@@ -0,0 +1,157 @@
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from noteagator import cli, daemon, fsutils
+from noteagator.config import Config
+
+
+@pytest.fixture
+def home(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv(daemon.NO_DAEMON_ENV, raising=False)
+    base = tmp_path / "nb"
+    base.mkdir()
+    (base / "a.md").write_text("---\ndescription: Pods\n---\nkubectl\n")
+    Config().notebook_base_dir = str(base)
+    return tmp_path
+
+
+@pytest.fixture
+def server(home):
+    path = daemon.socket_path()
+    thread = threading.Thread(target=daemon.serve, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while daemon.request({"op": "status"}, path) is None:
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.01)
+    yield path
+    daemon.request({"op": "stop"}, path)
+    thread.join(5)
+
+
+def test_forward_without_daemon_runs_locally(home):
+    assert daemon.forward(["show-base"]) is None
+
+
+def test_cli_checks_the_daemon_socket_path(home):
+    assert cli._socket_path() == daemon.socket_path()
+
+
+@pytest.mark.parametrize("argv", [[], ["--help"], ["daemon", "status"]])
+def test_local_commands_are_not_forwarded(server, argv):
+    assert daemon.forward(argv, server) is None
+
+
+def test_opt_out_env_runs_locally(server, monkeypatch):
+    monkeypatch.setenv(daemon.NO_DAEMON_ENV, "1")
+    assert daemon.forward(["show-base"], server) is None
+
+
+def test_forward_runs_command_in_daemon(server, home, capsys):
+    assert daemon.forward(["show-base"], server) == 0
+    assert capsys.readouterr().out == f"{home / 'nb'}\n"
+    assert daemon.request({"op": "status"}, server)["requests"] == 1
+
+
+def test_forward_reports_usage_errors(server, capsys):
+    assert daemon.forward(["cd"], server) == 2
+    assert "Missing argument" in capsys.readouterr().err
+
+
+def test_daemon_keeps_index_open_between_commands(server, home, capsys):
+    assert daemon.forward(["search", "kubectl"], server) == 0
+    index = daemon._resident._index
+    (home / "nb" / "b.md").write_text("kubectl again\n")
+    assert daemon.forward(["search", "kubectl"], server) == 0
+    assert daemon._resident._index is index
+    assert daemon._resident._watcher.base == str(home / "nb")
+    out = capsys.readouterr().out.splitlines()
+    assert out == ["1 /a.md  - Pods", "1 /a.md  - Pods", "2 /b.md "]
+    assert Config().display_entry("2")["absolute_path"].endswith("b.md")
+
+
+def test_stop_removes_socket(server):
+    assert daemon.request({"op": "stop"}, server)["pid"]
+    deadline = time.monotonic() + 5
+    while Path(server).exists():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert daemon.request({"op": "status"}, server) is None
+
+
+def test_open_helpers_outside_daemon_use_fresh_instances(home):
+    app_path = daemon.default_app_path()
+    with daemon.open_search_index(app_path, str(home / "nb")) as index:
+        assert index.refresh() == 1
+    with daemon.open_metadata_cache(app_path) as cache:
+        assert cache.description(str(home / "nb" / "a.md")) == "Pods"
+
+
+def test_commands_reading_stdin_are_not_forwarded(server):
+    assert daemon.forward(["jot", "-"], server) is None
+
+
+@pytest.fixture
+def gated_hits(home, monkeypatch):
+    # Several matching notes; every search hit after the first waits for the
+    # test to open the gate, so it can observe the command mid-flight.
+    for n in range(2, 6):
+        (home / "nb" / f"{n}.md").write_text("kubectl\n")
+    gate = threading.Event()
+    printed = []
+    real = fsutils.print_search_hit
+
+    def print_hit(*args):
+        if printed:
+            printed.append(gate.wait(5))
+        else:
+            printed.append(True)
+        return real(*args)
+
+    monkeypatch.setattr(fsutils, "print_search_hit", print_hit)
+    return gate, printed
+
+
+class _FirstLine(io.StringIO):
+    def __init__(self, gate) -> None:
+        super().__init__()
+        self._gate = gate
+
+    def write(self, text: str) -> int:
+        if "\n" in text:
+            self._gate.set()
+        return super().write(text)
+
+
+def test_forward_streams_output_before_command_ends(server, gated_hits, monkeypatch):
+    gate, printed = gated_hits
+    out = _FirstLine(gate)
+    monkeypatch.setattr(sys, "stdout", out)
+    assert daemon.forward(["search", "--scan", "kubectl"], server) == 0
+    assert printed == [True] * 5
+    assert out.getvalue().splitlines()[0] == "1 /2.md "
+
+
+def test_client_going_away_stops_command(server, gated_hits):
+    gate, printed = gated_hits
+    sock = daemon._connect(server)
+    daemon._send(
+        sock,
+        {
+            "op": "run",
+            "argv": ["search", "--scan", "kubectl"],
+            "version": daemon.PROTOCOL_VERSION,
+        },
+    )
+    assert daemon._recv(sock)["stdout"].startswith("1 /2.md")
+    sock.close()
+    gate.set()
+    assert daemon.request({"op": "status"}, server)["requests"] == 1
+    assert len(printed) == 2
+    assert list(Config().display_index) == ["1"]
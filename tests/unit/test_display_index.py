@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from noteagator.display_index import DisplayIndexStore
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> DisplayIndexStore:
+    return DisplayIndexStore(str(tmp_path / "display_index.bin"))
+
+
+def test_missing_store_is_empty(store):
+    assert not store.exists()
+    assert store.load() == {}
+    assert store.get("1") is None
+
+
+def test_round_trip_with_int_keys_returns_string_keys(store):
+    store.write(
+        {
+            1: {"type": "dir", "absolute_path": "/nb/a"},
+            2: {"type": "file", "absolute_path": "/nb/a/ü note.md"},
+        }
+    )
+    assert store.load() == {
+        "1": {"type": "dir", "absolute_path": "/nb/a"},
+        "2": {"type": "file", "absolute_path": "/nb/a/ü note.md"},
+    }
+
+
+def test_get_reads_single_entry(store):
+    store.write(
+        {n: {"type": "file", "absolute_path": f"/nb/{n}.md"} for n in range(1, 5001)}
+    )
+    assert store.get("4123") == {"type": "file", "absolute_path": "/nb/4123.md"}
+    assert store.get(1) == {"type": "file", "absolute_path": "/nb/1.md"}
+    assert store.get("5001") is None
+
+
+@pytest.mark.parametrize("index", ["0", "-1", "abc", "", None, "..", "/"])
+def test_get_rejects_non_positive_or_non_numeric(store, index):
+    store.write({1: {"type": "file", "absolute_path": "/nb/1.md"}})
+    assert store.get(index) is None
+
+
+def test_gaps_are_empty_entries(store):
+    store.write({"2": {"type": "dir", "absolute_path": "/nb"}})
+    assert store.get("1") is None
+    assert store.get("2") == {"type": "dir", "absolute_path": "/nb"}
+    assert store.load() == {"2": {"type": "dir", "absolute_path": "/nb"}}
+
+
+def test_write_replaces_previous_index(store):
+    store.write(
+        {
+            1: {"type": "file", "absolute_path": "/a"},
+            2: {"type": "file", "absolute_path": "/b"},
+        }
+    )
+    store.write({1: {"type": "dir", "absolute_path": "/c"}})
+    assert store.load() == {"1": {"type": "dir", "absolute_path": "/c"}}
+
+
+def test_non_numeric_keys_raise(store):
+    with pytest.raises(ValueError):
+        store.write({"x": {"type": "file", "absolute_path": "/a"}})
+    assert not store.exists()
+
+
+def test_corrupt_file_reads_as_empty(store):
+    Path(store.path).write_bytes(b"not an index")
+    assert store.load() == {}
+    assert store.get("1") is None
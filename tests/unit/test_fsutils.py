@@ -1,5 +1,8 @@
+import inspect
+import io
 import os
 import pathlib
+import sys
 
 import pytest
 
@@ -15,7 +18,7 @@ def make_file(p: pathlib.Path, text: str = "dummy"):
 
 @pytest.fixture(autouse=True)
 def stub_return_description(monkeypatch):
-    monkeypatch.setattr(fsutils, "return_description", lambda path: " - desc")
+    monkeypatch.setattr(fsutils, "return_description", lambda path, *_: " - desc")
     yield
 
 
@@ -107,3 +110,191 @@ def test_print_directory_structure_structure_indices_are_sequential(tmp_path):
         assert v["type"] in {"dir", "file"}
         assert isinstance(v["absolute_path"], str)
         assert os.path.isabs(v["absolute_path"])
+
+
+@pytest.mark.parametrize("jobs", [2, 8])
+def test_search_files_parallel_matches_sequential(tmp_path, capsys, jobs):
+    for n in range(40):
+        text = "needle here" if n % 3 == 0 else "nothing"
+        make_file(tmp_path / f"d{n % 4}" / f"note{n:02}.md", text)
+
+    sequential = fsutils.search_files(str(tmp_path), "NEEDLE")
+    seq_out = capsys.readouterr().out
+    parallel = fsutils.search_files(str(tmp_path), "NEEDLE", jobs=jobs)
+    par_out = capsys.readouterr().out
+
+    assert parallel == sequential
+    assert par_out == seq_out
+    assert list(parallel) == list(range(1, 15))
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_search_files_stops_reading_at_limit(tmp_path, capsys, monkeypatch, jobs):
+    for n in range(200):
+        make_file(tmp_path / f"note{n:03}.md", "needle")
+    scanned = []
+    real = fsutils._scan_file
+    monkeypatch.setattr(
+        fsutils, "_scan_file", lambda p, *a: scanned.append(p) or real(p, *a)
+    )
+
+    hits = fsutils.iter_search_files(str(tmp_path), "needle", jobs=jobs, limit=2)
+    assert next(hits)[0] == 1
+    assert capsys.readouterr().out.startswith("1 /note000.md")
+    assert [i for i, _ in hits] == [2]
+    assert len(scanned) <= 2 + jobs * 4
+
+
+def test_collect_results_keeps_hits_before_a_closed_pipe(monkeypatch):
+    monkeypatch.setattr(fsutils, "_discard_stdout", lambda: None)
+
+    def hits():
+        yield 1, {"absolute_path": "a"}
+        raise BrokenPipeError
+
+    assert fsutils.collect_results(hits(), {}) == {1: {"absolute_path": "a"}}
+
+
+def test_search_files_parallel_reports_unreadable_files(tmp_path, capsys, monkeypatch):
+    make_file(tmp_path / "ok.md", "needle")
+    make_file(tmp_path / "bad.md", "needle")
+
+    real = fsutils.file_contains
+
+    def flaky(path, term):
+        if path.endswith("bad.md"):
+            raise OSError("boom")
+        return real(path, term)
+
+    monkeypatch.setattr(fsutils, "file_contains", flaky)
+    result = fsutils.search_files(str(tmp_path), "needle", jobs=2)
+    out = capsys.readouterr().out
+
+    assert "Error reading file" in out and "boom" in out
+    assert [v["absolute_path"] for v in result.values()] == [str(tmp_path / "ok.md")]
+
+
+def test_file_contains_is_case_insensitive_for_ascii_and_unicode(tmp_path):
+    f = make_file(tmp_path / "n.md", "Kubectl GET pods\nÉcole Ünïcode\n")
+    assert fsutils.file_contains(str(f), "kubectl get")
+    assert fsutils.file_contains(str(f), "ÉCOLE ü")
+    assert fsutils.file_contains(str(f), "école")
+    assert not fsutils.file_contains(str(f), "kubectl pods")
+
+
+def test_file_contains_handles_empty_files(tmp_path):
+    f = make_file(tmp_path / "empty.md", "")
+    assert not fsutils.file_contains(str(f), "x")
+
+
+def test_print_directory_structure_handles_trees_deeper_than_recursion_limit(
+    tmp_path, capsys
+):
+    deep = tmp_path
+    for n in range(120):
+        deep = deep / "d"
+    make_file(deep / "leaf.md", "x")
+
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 60)
+    try:
+        structure = print_directory_structure(str(tmp_path), str(tmp_path))
+    finally:
+        sys.setrecursionlimit(old_limit)
+    capsys.readouterr()
+
+    assert len(structure) == 121
+    assert structure[121] == {"type": "file", "absolute_path": str(deep / "leaf.md")}
+
+
+class ClosingPipe:
+    def __init__(self, writes_before_close: int):
+        self.chunks = []
+        self.remaining = writes_before_close
+
+    def write(self, text):
+        if self.remaining == 0:
+            raise BrokenPipeError
+        self.remaining -= 1
+        self.chunks.append(text)
+
+    def flush(self):
+        pass
+
+
+def test_print_directory_structure_stops_when_pipe_closes(tmp_path, monkeypatch):
+    for n in range(50):
+        make_file(tmp_path / f"note{n:02}.md", "x")
+    described = []
+    monkeypatch.setattr(
+        fsutils, "return_description", lambda path, *_: described.append(path) or ""
+    )
+    monkeypatch.setattr(fsutils, "FLUSH_EVERY", 4)
+    pipe = ClosingPipe(writes_before_close=2)
+    monkeypatch.setattr(sys, "stdout", pipe)
+
+    structure = print_directory_structure(str(tmp_path), str(tmp_path))
+
+    written = pipe.chunks[1].splitlines()
+    assert written[0].startswith("  1 📄 note00.md")
+    assert list(structure) == list(range(1, len(written) + 1))
+    assert len(described) < 10
+
+
+def test_iter_directory_structure_is_lazy(tmp_path, monkeypatch):
+    for n in range(5):
+        make_file(tmp_path / f"n{n}.md", "x")
+    it = fsutils.iter_directory_structure(str(tmp_path))
+    index, entry, line = next(it)
+    assert index == 1
+    assert entry == {"type": "file", "absolute_path": str(tmp_path / "n0.md")}
+    assert line == "  1 📄 n0.md  - desc"
+
+
+def _jot_file(base: pathlib.Path) -> pathlib.Path:
+    (path,) = (base / "jots").iterdir()
+    return path
+
+
+def test_append_jots_writes_one_entry_per_line_in_batches(tmp_path, monkeypatch):
+    writes = []
+    real_append = fsutils._append_locked
+    monkeypatch.setattr(
+        fsutils,
+        "_append_locked",
+        lambda path, text: writes.append(text) or real_append(path, text),
+    )
+    stream = io.BytesIO(b"first\r\n\n  \nsecond\nthird without newline")
+    assert fsutils.append_jots(tmp_path, stream, chunk_size=8) == 3
+    assert _jot_file(tmp_path).read_text(encoding="utf-8") == (
+        "\nfirst\n\nsecond\n\nthird without newline\n"
+    )
+    assert len(writes) <= 3
+    assert fsutils.append_jots(tmp_path, io.BytesIO(b"a\nb\nc\n")) == 3
+    assert len(writes) <= 4
+
+
+def _jot_worker(base, tag, count):
+    lines = b"".join(b"%s-%d-%s\n" % (tag, n, tag * 5000) for n in range(count))
+    fsutils.append_jots(base, io.BytesIO(lines), chunk_size=20000)
+
+
+def test_concurrent_jotters_never_interleave_entries(tmp_path):
+    import multiprocessing
+
+    ctx = multiprocessing.get_context("fork" if sys.platform != "win32" else None)
+    procs = [
+        ctx.Process(target=_jot_worker, args=(str(tmp_path), tag, 40))
+        for tag in (b"a", b"b", b"c", b"d")
+    ]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+    entries = _jot_file(tmp_path).read_text(encoding="utf-8").split("\n\n")
+    entries = [e.strip("\n") for e in entries]
+    assert len(entries) == 160
+    for entry in entries:
+        tag, _, body = entry.split("-")
+        assert body == tag * 5000
@@ -0,0 +1,146 @@
+from pathlib import Path
+
+import pytest
+
+import noteagator.meta_cache as meta_cache
+from noteagator.fsutils import print_directory_structure, search_files, walk_files
+from noteagator.ignore import IgnoreRules, looks_binary, parse_rules
+from noteagator.meta_cache import MetadataCache
+from noteagator.query import Query
+from noteagator.search_index import SearchIndex
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"kubectl" * 10
+
+
+@pytest.mark.parametrize(
+    "pattern, path, is_dir, expected",
+    [
+        ("*.log", "a.log", False, True),
+        ("*.log", "deep/er/a.log", False, True),
+        ("*.log", "a.logx", False, False),
+        ("build/", "build", True, True),
+        ("build/", "build", False, False),
+        ("/top.md", "top.md", False, True),
+        ("/top.md", "sub/top.md", False, False),
+        ("docs/*.md", "docs/a.md", False, True),
+        ("docs/*.md", "docs/x/a.md", False, False),
+        ("docs/**/*.md", "docs/x/y/a.md", False, True),
+        ("**/cache", "a/b/cache", True, True),
+        ("a/**", "a/b/c", False, True),
+        ("file?.txt", "file1.txt", False, True),
+        ("file[!0-9].txt", "file1.txt", False, False),
+        ("file[!0-9].txt", "filex.txt", False, True),
+        ("\\#hash", "#hash", False, True),
+    ],
+)
+def test_patterns_follow_gitignore_syntax(pattern, path, is_dir, expected):
+    (rule,) = parse_rules(pattern)
+    assert rule.matches(path, is_dir) is expected
+
+
+def test_comments_blank_lines_and_negation(tmp_path, make_file):
+    make_file(tmp_path / ".gitignore", "# comment\n\n*.md\n!keep.md\n")
+    rules = IgnoreRules(str(tmp_path))
+    assert rules.ignored(str(tmp_path / "a.md"), False)
+    assert not rules.ignored(str(tmp_path / "keep.md"), False)
+
+
+def test_deeper_and_ngtignore_rules_take_precedence(tmp_path, make_file):
+    make_file(tmp_path / ".gitignore", "*.tmp\nvendor/\n")
+    make_file(tmp_path / ".ngtignore", "!important.tmp\n")
+    make_file(tmp_path / "sub" / ".gitignore", "!*.tmp\n")
+    rules = IgnoreRules(str(tmp_path))
+    assert rules.ignored(str(tmp_path / "x.tmp"), False)
+    assert not rules.ignored(str(tmp_path / "important.tmp"), False)
+    assert not rules.ignored(str(tmp_path / "sub" / "x.tmp"), False)
+    assert rules.ignored(str(tmp_path / "vendor" / "a" / "note.md"), False)
+    assert not rules.ignored(
+        str(tmp_path / "vendor" / "a" / "note.md"), False, check_parents=False
+    )
+    assert rules.ignored(str(tmp_path / ".git"), True)
+
+
+def test_looks_binary():
+    assert not looks_binary(b"")
+    assert not looks_binary("plain text ✓\n\tindent\r\n\x1b[31m".encode())
+    assert looks_binary(b"text\x00more")
+    assert looks_binary(b"%PDF-1.7\n")
+    assert looks_binary(PNG)
+    assert looks_binary(bytes(range(1, 32)) * 4)
+
+
+@pytest.fixture
+def notebook(tmp_path: Path, make_file) -> Path:
+    base = tmp_path / "nb"
+    make_file(base / ".gitignore", "node_modules/\n*.log\n")
+    make_file(base / ".ngtignore", "drafts/\n")
+    make_file(base / "a.md", "kubectl\n")
+    make_file(base / "b.log", "kubectl\n")
+    make_file(base / "img.png", PNG)
+    make_file(base / "drafts" / "c.md", "kubectl\n")
+    make_file(base / "node_modules" / "pkg" / "readme.md", "kubectl\n")
+    make_file(base / "sub" / "d.md", "kubectl\n")
+    return base
+
+
+def names(display_index) -> list[str]:
+    return [Path(v["absolute_path"]).name for v in display_index.values()]
+
+
+def test_walk_files_prunes_ignored_paths(notebook):
+    found = [
+        Path(p).name for p in walk_files(str(notebook), ignore=IgnoreRules(notebook))
+    ]
+    assert found == [".gitignore", ".ngtignore", "a.md", "img.png", "d.md"]
+
+
+def test_search_skips_ignored_and_binary_files(tmp_path, notebook, capsys, monkeypatch):
+    query = Query.parse(["kubectl"])
+    assert names(search_files(str(notebook), query)) == ["a.md", "d.md"]
+
+    sniffed = []
+    real = meta_cache.is_binary_file
+    monkeypatch.setattr(
+        meta_cache, "is_binary_file", lambda p: sniffed.append(p) or real(p)
+    )
+    with MetadataCache(str(tmp_path)) as cache:
+        for _ in range(2):
+            assert names(search_files(str(notebook), query, meta_cache=cache)) == [
+                "a.md",
+                "d.md",
+            ]
+    assert sorted(Path(p).name for p in sniffed) == [
+        ".gitignore",
+        ".ngtignore",
+        "a.md",
+        "d.md",
+        "img.png",
+    ]
+    capsys.readouterr()
+
+
+def test_index_skips_ignored_and_binary_files(tmp_path, notebook, make_file):
+    index = SearchIndex(str(tmp_path), str(notebook))
+    index.refresh()
+    query = Query.parse(["/kubectl/"])
+    assert [Path(p).name for p in index.search(query)] == ["a.md", "d.md"]
+    assert index.stats()["files"] == 4
+    assert index.refresh() == 0
+
+    make_file(notebook / ".ngtignore", "drafts/\nsub/\n")
+    index.refresh()
+    assert [Path(p).name for p in index.search(query)] == ["a.md"]
+    index.close()
+
+
+def test_ls_hides_ignored_entries(notebook, capsys):
+    structure = print_directory_structure(str(notebook), str(notebook), max_depth=None)
+    assert names(structure) == [
+        "sub",
+        "d.md",
+        ".gitignore",
+        ".ngtignore",
+        "a.md",
+        "img.png",
+    ]
+    capsys.readouterr()
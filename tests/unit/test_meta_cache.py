@@ -0,0 +1,248 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+import noteagator.meta_cache as meta_cache
+from noteagator.fsutils import (
+    print_directory_structure,
+    return_description,
+    search_files,
+)
+from noteagator.meta_cache import MetadataCache
+from noteagator.query import MetaFilter, Query, flatten_metadata
+from noteagator.search_index import SearchIndex
+
+
+@pytest.fixture
+def cache(tmp_path: Path):
+    c = MetadataCache(str(tmp_path))
+    yield c
+    c.close()
+
+
+@pytest.fixture
+def count_parses(monkeypatch):
+    calls = []
+    real = meta_cache.read_metadata
+
+    def counting(path):
+        calls.append(path)
+        return real(path)
+
+    monkeypatch.setattr(meta_cache, "read_metadata", counting)
+    return calls
+
+
+def test_get_returns_front_matter_without_note_key(cache, tmp_path, make_file):
+    path = make_file(
+        tmp_path / "a.md",
+        "---\ndescription: Hi\nformat: slim\nplaceholders:\n  i: foo\n---\nbody\n",
+    )
+    assert cache.get(path) == {
+        "description": "Hi",
+        "format": "slim",
+        "placeholders": {"i": "foo"},
+    }
+    assert cache.description(path) == "Hi"
+
+
+def test_unchanged_note_is_parsed_once(cache, tmp_path, count_parses, make_file):
+    path = make_file(tmp_path / "a.md", "---\ndescription: Hi\n---\nbody\n")
+    cache.get(path)
+    cache.get(path)
+    assert count_parses == [path]
+
+
+def test_changed_note_is_parsed_again(
+    cache, tmp_path, count_parses, make_file, shift_mtime
+):
+    path = make_file(tmp_path / "a.md", "---\ndescription: Old\n---\nbody\n")
+    assert cache.description(path) == "Old"
+    make_file(tmp_path / "a.md", "---\ndescription: New\n---\nbody\n")
+    shift_mtime(path)
+    assert cache.description(path) == "New"
+    assert len(count_parses) == 2
+
+
+def test_cache_persists_across_instances(tmp_path, count_parses, make_file):
+    path = make_file(tmp_path / "a.md", "---\ndescription: Hi\n---\nbody\n")
+    with MetadataCache(str(tmp_path)) as first:
+        first.get(path)
+    with MetadataCache(str(tmp_path)) as second:
+        assert second.description(path) == "Hi"
+    assert count_parses == [path]
+
+
+def test_unreadable_and_missing_notes_have_empty_metadata(cache, tmp_path):
+    binary = tmp_path / "img.png"
+    binary.write_bytes(b"\x89PNG\r\n\x1a\n\xff\xfe")
+    assert cache.get(str(binary)) == {}
+    assert cache.get(str(tmp_path / "missing.md")) == {}
+
+
+def test_non_json_yaml_values_are_stored_as_text(cache, tmp_path, make_file):
+    path = make_file(tmp_path / "a.md", "---\ncreated: 2024-01-02\n---\nbody\n")
+    cache.get(path)
+    assert cache.get(path) == {"created": "2024-01-02"}
+
+
+def test_return_description_uses_cache(cache, tmp_path, make_file):
+    path = make_file(tmp_path / "a.md", "---\ndescription: <red>Hi<end>\n---\n")
+    assert return_description(path, cache) == return_description(path)
+    assert return_description(path, cache).startswith(" - ")
+    plain = make_file(tmp_path / "b.md", "no front matter\n")
+    assert return_description(plain, cache) == ""
+
+
+@pytest.mark.parametrize(
+    "spec, expected",
+    [
+        ("tags", MetaFilter("tags")),
+        ("tags=K8s", MetaFilter("tags", "k8s")),
+        ("owner.team=sre*", MetaFilter("owner.team", "sre", prefix=True)),
+        ("archived=", MetaFilter("archived", "")),
+    ],
+)
+def test_meta_filter_parse(spec, expected):
+    assert MetaFilter.parse(spec) == expected
+
+
+def test_meta_filter_parse_rejects_missing_key():
+    with pytest.raises(ValueError):
+        MetaFilter.parse("=x")
+
+
+def test_flatten_metadata():
+    rows = flatten_metadata(
+        {"tags": ["K8s", 2], "owner": {"team": "SRE"}, "draft": True, "x": None}
+    )
+    assert rows == [
+        ("tags", None),
+        ("tags", "k8s"),
+        ("tags", "2"),
+        ("owner", None),
+        ("owner.team", "sre"),
+        ("draft", "true"),
+        ("x", None),
+    ]
+
+
+@pytest.fixture
+def tagged(tmp_path: Path, make_file) -> Path:
+    base = tmp_path / "nb"
+    base.mkdir()
+    make_file(
+        base / "a.md",
+        "---\ndescription: Deploy app\ntags: [k8s, prod]\nowner:\n  team: sre\n"
+        "---\nkubectl rollout\n",
+    )
+    make_file(
+        base / "b.md",
+        "---\ndescription: Deploy db\ntags: k8s\n---\nkubectl apply\n",
+    )
+    make_file(base / "c.md", "---\ndescription: Backups\n---\nkubectl cp\n")
+    make_file(base / "d.md", "no front matter, kubectl\n")
+    return base
+
+
+def names(paths):
+    return [Path(p).name for p in paths]
+
+
+@pytest.mark.parametrize(
+    "specs, expected",
+    [
+        (["tags=k8s"], ["a.md", "b.md"]),
+        (["tags=PROD"], ["a.md"]),
+        (["tags"], ["a.md", "b.md"]),
+        (["owner.team=sre"], ["a.md"]),
+        (["owner"], ["a.md"]),
+        (["description=deploy*"], ["a.md", "b.md"]),
+        (["description=deploy*", "tags=prod"], ["a.md"]),
+        (["tags=missing"], []),
+    ],
+)
+def test_find_by_metadata(cache, tagged, specs, expected):
+    cache.refresh(str(tagged))
+    filters = [MetaFilter.parse(s) for s in specs]
+    assert names(cache.find(str(tagged), filters)) == expected
+
+
+def test_refresh_picks_up_changes_and_deletions(cache, tagged, make_file, shift_mtime):
+    base = str(tagged)
+    cache.refresh(base)
+    filters = [MetaFilter.parse("tags=k8s")]
+    make_file(tagged / "c.md", "---\ntags: [k8s]\n---\n")
+    shift_mtime(str(tagged / "c.md"))
+    (tagged / "a.md").unlink()
+    cache.refresh(base)
+    assert names(cache.find(base, filters)) == ["b.md", "c.md"]
+
+
+def test_old_schema_is_rebuilt(tmp_path, tagged):
+    db = sqlite3.connect(tmp_path / "metadata_cache.sqlite3")
+    db.execute("CREATE TABLE notes (path TEXT PRIMARY KEY, junk TEXT)")
+    db.commit()
+    db.close()
+    with MetadataCache(str(tmp_path)) as c:
+        c.refresh(str(tagged))
+        assert names(c.find(str(tagged), [MetaFilter("tags", "prod")])) == ["a.md"]
+
+
+def test_meta_filters_restrict_text_search(tmp_path, cache, tagged, capsys):
+    cache.refresh(str(tagged))
+    only = set(cache.find(str(tagged), [MetaFilter("tags", "k8s")]))
+    query = Query.parse(["kubectl"])
+    scanned = search_files(str(tagged), query, only_paths=only)
+    assert names(v["absolute_path"] for v in scanned.values()) == ["a.md", "b.md"]
+    index = SearchIndex(str(tmp_path), str(tagged))
+    index.refresh()
+    assert names(index.search(query, only)) == ["a.md", "b.md"]
+    assert names(index.search(Query.parse(["kubectl", "OR", "cp"]), only)) == [
+        "a.md",
+        "b.md",
+    ]
+    index.close()
+    capsys.readouterr()
+
+
+@pytest.fixture
+def tree(tmp_path: Path, make_file) -> Path:
+    base = tmp_path / "nb"
+    for d in ("b", "A", "A/deep", "A/deep/er", "c"):
+        (base / d).mkdir(parents=True)
+    for n, d in enumerate(("", "b", "A", "A/deep", "A/deep/er", "c")):
+        for m in range(3):
+            body = f"---\ndescription: note {n}-{m} <red>x<end>\n---\nbody\n"
+            if m == 1:
+                body = "no front matter\n"
+            make_file(base / d / f"N{m}.md", body)
+    return base
+
+
+def test_stamps_cover_only_direct_children(cache, tree):
+    for path in (tree / "N0.md", tree / "A" / "N0.md"):
+        cache.get(str(path))
+    assert list(cache.stamps(str(tree))) == [str(tree / "N0.md")]
+
+
+@pytest.mark.parametrize("max_depth", [None, 1, 2])
+def test_prefetched_listing_is_identical_to_sequential(
+    cache, tree, capsys, max_depth, shift_mtime
+):
+    def listing(jobs, meta_cache):
+        structure = print_directory_structure(
+            str(tree), str(tree), max_depth, meta_cache, jobs=jobs
+        )
+        return capsys.readouterr().out, structure
+
+    expected = listing(1, None)
+    assert "note 0-0" in expected[0]
+    assert listing(4, None) == expected
+    assert listing(4, cache) == expected
+    shift_mtime(str(tree / "A" / "N0.md"))
+    (tree / "c" / "N2.md").unlink()
+    expected = listing(1, None)
+    assert listing(4, cache) == expected
+    assert listing(1, cache) == expected
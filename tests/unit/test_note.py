@@ -1,5 +1,8 @@
+import re
 from pathlib import Path
 
+import pytest
+
 from noteagator.note import Note
 
 
@@ -125,3 +128,64 @@ def test_raw_note_setter_reparses_and_invalidates_cache(tmp_path: Path):
     assert n.metadata == {"title": "Second", "description": "changed", "note": path}
     assert n.body == "two\n"
     assert n.description == "changed"
+
+
+def test_metadata_is_read_without_loading_body(tmp_path: Path, monkeypatch):
+    raw = "---\ndescription: Big\n---\n" + "log line\n" * 10000
+    path = _mk(tmp_path, raw)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("body should not be read")
+
+    monkeypatch.setattr(Path, "read_text", fail)
+    n = Note(path)
+    assert n.description == "Big"
+    assert n.metadata == {"description": "Big", "note": path}
+    monkeypatch.undo()
+
+    assert n.body == "log line\n" * 10000
+    assert n.raw_note == raw
+
+
+HEADER_CASES = [
+    "---\ntitle: a---\nbody\n",
+    "---\r\ntitle: crlf\r\n---\r\n\r\nbody\r\n",
+    "---   \ntitle: spaces\n---\t\nbody",
+    "---\ntitle: no closing newline\n---",
+    "---\n---\n---\nbody\n",
+    "--- \n",
+    "body first\n---\ntitle: late\n---\n",
+]
+
+
+@pytest.mark.parametrize("raw", HEADER_CASES)
+def test_header_only_read_matches_full_parse(tmp_path: Path, raw: str):
+    full_re = re.compile(
+        r"^(?:\ufeff)?---[ \t]*\r?\n(?P<meta>.*?)(?:\r?\n)?"
+        r"---[ \t]*\r?\n(?P<body>.*)\Z",
+        re.DOTALL,
+    )
+    path = _mk(tmp_path, raw)
+    text = Path(path).read_text(encoding="utf-8")
+    n = Note(path)
+    m = full_re.match(text)
+    if m is None:
+        assert n.metadata == {"note": path}
+        assert n.body == text
+    else:
+        body = m.group("body")
+        body = body[1:] if body.startswith("\n") else body
+        assert n.body == body
+
+
+@pytest.mark.parametrize(
+    "raw", HEADER_CASES + ["---\na: 1\n---\n\n\nbody\n", "---\na: 1\n---\n", ""]
+)
+def test_iter_body_chunks_matches_body(tmp_path: Path, raw: str):
+    path = _mk(tmp_path, raw)
+    chunks = list(Note(path).iter_body_chunks(size=4))
+    assert "".join(chunks) == Note(path).body
+    assert all(c.endswith("\n") for c in chunks[:-1])
+    loaded = Note(path)
+    loaded.raw_note
+    assert "".join(loaded.iter_body_chunks()) == loaded.body
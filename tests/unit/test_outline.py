@@ -0,0 +1,162 @@
+import os
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import noteagator.commands.notes as notes
+import noteagator.outline as outline_mod
+from noteagator.outline import Outline, OutlineCache, parse_line_range
+
+NOTE = """---
+description: runbook
+placeholders:
+  i: HOST
+---
+
+# Runbook
+intro
+```bash
+ssh HOST
+```
+## Deploy
+deploy HOST
+```bash
+# not a heading
+kubectl apply
+```
+## Rollback
+```bash
+kubectl rollout undo
+```
+### Verify
+check
+# Appendix
+end
+"""
+
+
+@pytest.fixture
+def note(tmp_path: Path) -> Path:
+    path = tmp_path / "nb" / "runbook.md"
+    path.parent.mkdir()
+    path.write_text(NOTE, encoding="utf-8")
+    return path
+
+
+def file_lines(start: int, stop: int) -> str:
+    return "".join(NOTE.splitlines(keepends=True)[start - 1 : stop - 1])
+
+
+def test_scan_finds_body_headings_and_fences(note):
+    outline = Outline.scan(str(note))
+    assert outline.body_line == 7
+    assert outline.lines == 25
+    assert [(h.level, h.title, h.line) for h in outline.headings] == [
+        (1, "Runbook", 7),
+        (2, "Deploy", 12),
+        (2, "Rollback", 18),
+        (3, "Verify", 22),
+        (1, "Appendix", 24),
+    ]
+    assert [f.line for f in outline.fences] == [9, 11, 14, 17, 19, 21]
+    assert Outline.from_json(outline.to_json()) == outline
+
+
+def test_section_runs_to_next_heading_of_same_or_higher_level(note):
+    outline = Outline.scan(str(note))
+    assert outline.section("rollback") == (18, 24)
+    assert outline.section("Verify") == (22, 24)
+    assert outline.section("pend") == (24, 26)
+    with pytest.raises(KeyError):
+        outline.section("missing")
+
+
+@pytest.mark.parametrize("stride", [1, 2, 32])
+def test_read_returns_exactly_the_requested_lines(note, monkeypatch, stride):
+    monkeypatch.setattr(outline_mod, "LINE_STRIDE", stride)
+    outline = Outline.scan(str(note))
+    for start in range(1, 27):
+        for stop in (start, start + 1, start + 5, 27):
+            got = "".join(outline.read(str(note), start, stop, size=8))
+            assert got == file_lines(start, stop), (start, stop)
+
+
+def test_open_block_reports_numbering_and_enclosing_fence(note):
+    outline = Outline.scan(str(note))
+    assert outline.open_block(12) == (2, None)
+    assert outline.open_block(16) == (2, outline.fences[2])
+    assert outline.open_block(25) == (4, None)
+
+
+@pytest.mark.parametrize(
+    "spec, expected",
+    [("120:180", (120, 181)), ("5", (5, 6)), ("10:", (10, None)), (":3", (1, 4))],
+)
+def test_parse_line_range(spec, expected):
+    assert parse_line_range(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["x", "5:2", "0:3", "1:y"])
+def test_parse_line_range_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_line_range(spec)
+
+
+def test_cache_rescans_only_after_the_note_changes(tmp_path, note, monkeypatch):
+    scans = []
+    real_scan = Outline.scan.__func__
+
+    def counting_scan(cls, path):
+        scans.append(path)
+        return real_scan(cls, path)
+
+    monkeypatch.setattr(Outline, "scan", classmethod(counting_scan))
+    with OutlineCache(str(tmp_path)) as cache:
+        first = cache.get(str(note))
+    with OutlineCache(str(tmp_path)) as cache:
+        assert cache.get(str(note)) == first
+        assert len(scans) == 1
+        note.write_text(NOTE + "# More\n", encoding="utf-8")
+        os.utime(note, ns=(1, 1))
+        assert cache.get(str(note)).headings[-1].title == "More"
+    assert len(scans) == 2
+
+
+@pytest.fixture
+def printed_note_text() -> str:
+    return NOTE
+
+
+def test_print_section_and_lines(printed_note, monkeypatch):
+    copied = []
+    monkeypatch.setattr("pyperclip.copy", copied.append)
+    runner = CliRunner()
+    result = runner.invoke(
+        notes.prt, ["1", "--section", "Deploy", "--format", "slim", "-i", "web"]
+    )
+    assert result.exit_code == 0, result.output
+    assert result.output == (
+        "## Deploy\n"
+        "deploy web\n"
+        "--copy 2 $ # not a heading\n"
+        "         $ kubectl apply\n"
+    )
+    result = runner.invoke(
+        notes.prt, ["1", "--lines", "16:20", "--format", "slim", "-c", "2"]
+    )
+    assert result.exit_code == 0, result.output
+    assert result.output == (
+        "--copy 2 $ kubectl apply\n## Rollback\n--copy 3 $ kubectl rollout undo\n"
+    )
+    assert copied == ["kubectl apply"]
+
+
+def test_print_part_errors(printed_note):
+    runner = CliRunner()
+    missing = runner.invoke(notes.prt, ["1", "--section", "nope"])
+    assert missing.exit_code == 1
+    assert "'Rollback'" in missing.output
+    assert runner.invoke(notes.prt, ["1", "--lines", "9:2"]).exit_code == 2
+    both = runner.invoke(notes.prt, ["1", "--lines", "1:2", "--section", "Deploy"])
+    assert both.exit_code == 2
@@ -0,0 +1,129 @@
+import os
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import noteagator.commands.dir as dir_cmds
+import noteagator.path_index as path_index
+from noteagator.config import Config
+from noteagator.path_index import PathIndex
+
+
+@pytest.fixture
+def notebook(tmp_path: Path, make_file) -> Path:
+    base = tmp_path / "nb"
+    make_file(base / "k8s" / "rollout.md")
+    make_file(base / "k8s" / "deploy.md")
+    make_file(base / "net" / "netcat.md")
+    make_file(base / "deployment-notes.md")
+    make_file(base / "build" / "deploy.log")
+    make_file(base / ".gitignore", "build/\n")
+    return base
+
+
+@pytest.fixture
+def index(tmp_path: Path, notebook: Path):
+    idx = PathIndex(str(tmp_path), str(notebook))
+    idx.refresh()
+    yield idx
+    idx.close()
+
+
+def found(index, query, limit=None):
+    return [os.path.relpath(m.path, index.base) for m in index.find(query, limit=limit)]
+
+
+def test_file_name_matches_rank_before_directory_matches(index):
+    assert found(index, "deploy") == [
+        os.path.join("k8s", "deploy.md"),
+        "deployment-notes.md",
+    ]
+    assert found(index, "k8s") == [
+        "k8s",
+        os.path.join("k8s", "deploy.md"),
+        os.path.join("k8s", "rollout.md"),
+    ]
+    assert found(index, "k8s", limit=1) == ["k8s"]
+
+
+def test_typos_match_through_shared_trigrams(index):
+    assert found(index, "rolout") == [os.path.join("k8s", "rollout.md")]
+    assert found(index, "k8s netcat") == []
+    assert found(index, "zzzz") == []
+
+
+def test_scores_prefer_file_names(index):
+    scores = {
+        os.path.relpath(m.path, index.base): m.score for m in index.find("deploy")
+    }
+    assert scores == {os.path.join("k8s", "deploy.md"): 4.0, "deployment-notes.md": 4.0}
+    assert [m.score for m in index.find("ploy")] == [3.0, 3.0]
+    assert [m.score for m in index.find("net cat")] == [7.0]
+    assert [m.score for m in index.find("deplyo")] == [0.5, 0.5]
+
+
+def test_refresh_lists_only_changed_directories(
+    index, notebook, monkeypatch, make_file, shift_mtime
+):
+    shift_mtime(notebook, *(p for p in notebook.rglob("*") if p.is_dir()), seconds=-10)
+    index.refresh()
+    listed = []
+    real = path_index.list_dir
+    monkeypatch.setattr(
+        path_index, "list_dir", lambda d, ignore: listed.append(d) or real(d, ignore)
+    )
+
+    assert index.refresh() == 0
+    assert listed == []
+
+    make_file(notebook / "net" / "dig.md")
+    (notebook / "k8s" / "rollout.md").rename(notebook / "k8s" / "restart.md")
+    assert index.refresh() == 3
+    assert sorted(listed) == [str(notebook / "k8s"), str(notebook / "net")]
+    assert found(index, "rollout") == []
+    assert found(index, "restart") == [os.path.join("k8s", "restart.md")]
+    assert found(index, "dig") == [os.path.join("net", "dig.md")]
+
+
+def test_refresh_follows_new_deleted_and_ignored_directories(
+    index, notebook, make_file
+):
+    make_file(notebook / "new" / "deep" / "helm.md")
+    index.refresh()
+    assert found(index, "helm") == [os.path.join("new", "deep", "helm.md")]
+
+    for p in sorted((notebook / "new").rglob("*"), reverse=True):
+        p.unlink() if p.is_file() else p.rmdir()
+    (notebook / "new").rmdir()
+    index.refresh()
+    assert found(index, "helm") == []
+
+    make_file(notebook / ".gitignore", "")
+    index.refresh()
+    assert found(index, "deploy.log")[0] == os.path.join("build", "deploy.log")
+
+
+def test_rebuild_and_changing_base(tmp_path, index, notebook, make_file):
+    assert index.rebuild() == 7
+    other = tmp_path / "other"
+    make_file(other / "deploy.md")
+    with PathIndex(str(tmp_path), str(other)) as moved:
+        moved.refresh()
+        assert found(moved, "deploy") == ["deploy.md"]
+
+
+def test_find_command_populates_display_index(tmp_path, notebook, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    cfg = Config()
+    cfg.notebook_base_dir = str(notebook)
+
+    result = CliRunner().invoke(dir_cmds.find_cmd, ["k8s"])
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines()[0] == "1 📁 /k8s"
+    saved = list(Config().display_index.values())
+    assert saved[0] == {"type": "dir", "absolute_path": str(notebook / "k8s")}
+    assert saved[1]["absolute_path"] == str(notebook / "k8s" / "deploy.md")
+
+    assert CliRunner().invoke(dir_cmds.cd_cmd, ["1"]).exit_code == 0
+    assert Config().notebook_cwd == str(notebook / "k8s")
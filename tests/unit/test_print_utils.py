@@ -1,5 +1,9 @@
+import io
 import re
 
+import pyperclip
+import pytest
+
 import noteagator.print_utils as putils
 
 
@@ -47,7 +51,7 @@ def test_add_copy_markers_markdown_numbers_blocks_and_preserves_content():
 
 def test_print_note_markdown_copies_requested_block(monkeypatch, capsys):
     copied = {"val": None}
-    monkeypatch.setattr(putils.pyperclip, "copy", lambda s: copied.update(val=s))
+    monkeypatch.setattr(pyperclip, "copy", lambda s: copied.update(val=s))
 
     md = "```bash\necho A\n```\n```python\nprint('B')\n```"
     putils.print_note_markdown(md, copy=2)
@@ -95,7 +99,7 @@ def test_extract_copy_block_grabs_exact_block_and_stops():
 
 def test_print_note_slim_copies_and_prints(monkeypatch, capsys):
     copied = {"val": None}
-    monkeypatch.setattr(putils.pyperclip, "copy", lambda s: copied.update(val=s))
+    monkeypatch.setattr(pyperclip, "copy", lambda s: copied.update(val=s))
 
     body = "```bash\necho A\n```\n```bash\nB\n```"
     putils.print_note_slim(body, copy=2)
@@ -107,7 +111,7 @@ def test_print_note_slim_copies_and_prints(monkeypatch, capsys):
 
 
 def test_print_note_slim_no_block_found_prints_error(monkeypatch, capsys):
-    monkeypatch.setattr(putils.pyperclip, "copy", lambda s: None)
+    monkeypatch.setattr(pyperclip, "copy", lambda s: None)
     body = "```bash\necho A\n```"
     putils.print_note_slim(body, copy=9)
     cap = capsys.readouterr()
@@ -123,3 +127,124 @@ def test_format_note_body_integration_colors_and_option_replace(monkeypatch):
 
     assert putils.NOTE_COLORS["<red>"] in out and putils.NOTE_COLORS["<end>"] in out
     assert "-i BAR" in out
+
+
+def test_substitution_is_single_pass():
+    meta = {"placeholders": {"i": "HOST", "j": "PORT"}}
+    out = putils.format_note_body(
+        "ssh HOST -p PORT", meta, i="PORT", j="22", k=None, u=None, d=None, p=None
+    )
+    assert out == "ssh PORT -p 22"
+
+
+def test_substitution_prefers_longest_key():
+    meta = {"placeholders": {"i": "HOST", "j": "HOSTNAME"}}
+    out = putils.format_note_body(
+        "HOSTNAME HOST", meta, i="a", j="b", k=None, u=None, d=None, p=None
+    )
+    assert out == "b a"
+
+
+def test_colors_win_over_clashing_placeholder_and_empty_values_are_ignored():
+    meta = {"placeholders": {"i": "<red>", "j": ""}}
+    out = putils.format_note_body(
+        "<red>x<end>", meta, i="R", j="J", k=None, u=None, d=None, p=None
+    )
+    assert out == "\033[91mx\033[0m"
+
+
+def test_first_key_wins_for_duplicate_placeholder_values():
+    meta = {"placeholders": {"i": "X", "j": "X"}}
+    assert putils.replace_placeholders("X", {"i": "1", "j": "2"}, meta) == "1"
+
+
+def test_compiled_substitutions_are_reused():
+    putils._compile_substitutions.cache_clear()
+    meta = {"placeholders": {"i": "HOST"}}
+    for _ in range(3):
+        putils.format_note_body("HOST", meta, "h", None, None, None, None, None)
+    assert putils._compile_substitutions.cache_info().hits == 2
+
+
+def test_find_code_blocks_records_offsets():
+    body = "Intro\n```bash\necho A\nls\n```\nMid\n```\nopen"
+    first, second = putils.find_code_blocks(body)
+    assert (first.number, first.language) == (1, "bash")
+    assert body[first.start : first.end] == "```bash\necho A\nls\n```\n"
+    assert first.content(body) == "echo A\nls"
+    assert (second.number, second.language, second.end) == (2, "", len(body))
+    assert second.content(body) == "open"
+
+
+def test_code_block_numbers_agree_between_renderers():
+    body = "```\na\n```\n```\n```\n```sh\nb\r\nc\r\n```"
+    slim = putils.add_copy_markers_slim(body)
+    for n in (1, 2, 3, 4):
+        assert (putils.code_block_text(body, n) or "") == putils.extract_copy_block(
+            slim, n
+        )
+    marked = putils.add_copy_markers_markdown(body)
+    assert marked.count("--copy ") == 3
+    assert putils.get_code_by_number_markdown(marked, 3) == "b\nc"
+
+
+def test_blocks_can_be_numbered_from_an_offset(monkeypatch, capsys):
+    monkeypatch.setattr(pyperclip, "copy", lambda s: None)
+    body = "```\na\n```\n```\nb\n```\n"
+    blocks = putils.find_code_blocks(body, first=4)
+    assert [b.number for b in blocks] == [4, 5]
+    assert putils.code_block_text(body, 5, blocks) == "b"
+    assert putils.code_block_text(body, 1, blocks) is None
+    assert putils.print_note_markdown(body, copy=4, first_block=4) == "a"
+    assert "--copy 4" in capsys.readouterr().out
+
+
+def test_print_note_markdown_reports_missing_block(monkeypatch, capsys):
+    monkeypatch.setattr(pyperclip, "copy", lambda s: None)
+    assert putils.print_note_markdown("no code", copy=1) is None
+    assert "No --copy 1 block found." in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "",
+        "\n",
+        "plain\n\nlines",
+        "```bash\necho A\n\nls\n```\ntext\n```\nunterminated\n",
+        "a\x0cb\n```\nc d\n```\n",
+    ],
+)
+def test_streamed_slim_matches_whole_body_render(body, monkeypatch, capsys):
+    monkeypatch.setattr(pyperclip, "copy", lambda s: None)
+    expected = putils.add_copy_markers_slim(body) + "\n"
+    for copy in (None, 1, 2, 9):
+        out = io.StringIO()
+        chunks = body.splitlines(keepends=True)
+        copied = putils.write_note_slim(chunks, copy, out)
+        assert out.getvalue().startswith(expected)
+        if copy is not None:
+            assert copied == (putils.code_block_text(body, copy) or None)
+
+
+def test_write_note_slim_writes_before_input_is_exhausted():
+    out = io.StringIO()
+
+    def chunks():
+        yield "first line\n"
+        assert out.getvalue() == "first line\n"
+        yield "second line\n"
+
+    putils.write_note_slim(chunks(), None, out)
+    assert out.getvalue() == "first line\nsecond line\n"
+
+
+def test_format_note_chunks_matches_format_note_body():
+    body = "ssh HOST\n<red>x<end> HOST\n"
+    meta = {"placeholders": {"i": "HOST", "j": "a\nb"}}
+    for j in (None, "J"):
+        args = dict(i="web", j=j, k=None, u=None, d=None, p=None)
+        chunks = [body[:9], body[9:]]
+        assert "".join(
+            putils.format_note_chunks(chunks, meta, **args)
+        ) == putils.format_note_body(body, meta, **args)
@@ -0,0 +1,153 @@
+from pathlib import Path
+
+import pytest
+
+import noteagator.search_index as search_index
+from noteagator.fsutils import search_files
+from noteagator.query import Query, Term, bm25_scores, count_terms
+from noteagator.search_index import SearchIndex
+
+
+def test_parse_and_or_regex_terms():
+    q = Query.parse(["kubectl", "rollout restart", "OR", "/helm\\s+\\w+/"])
+    assert q.clauses == [
+        (Term("kubectl"), Term("rollout restart")),
+        (Term("helm\\s+\\w+", regex=True),),
+    ]
+    assert str(q) == "kubectl rollout restart OR /helm\\s+\\w+/"
+
+
+@pytest.mark.parametrize("args", [[], ["OR"], ["OR", "OR"]])
+def test_parse_rejects_empty_queries(args):
+    with pytest.raises(ValueError):
+        Query.parse(args)
+
+
+def test_parse_rejects_invalid_regex():
+    with pytest.raises(ValueError, match="Invalid regular expression"):
+        Query.parse(["/[/"])
+
+
+def test_lone_slash_is_a_plain_term():
+    assert Query.parse(["/"]).single_text_term == Term("/")
+
+
+def test_count_terms_and_matches():
+    q = Query.parse(["pod", "OR", "/^helm/"])
+    counts = count_terms(b"Pod pod POD\nhelm x", q, count=True)
+    assert counts == {Term("pod"): 3, Term("^helm", regex=True): 1}
+    assert q.matches(counts)
+    assert not q.matches({Term("pod"): 0, Term("^helm", regex=True): 0})
+
+
+def test_count_terms_presence_short_circuits_failed_clause():
+    q = Query.parse(["absent", "pod"])
+    assert count_terms(b"pod", q) == {Term("absent"): 0}
+
+
+def test_bm25_prefers_higher_tf_rare_terms_and_shorter_docs():
+    rare, common = Term("rare"), Term("common")
+    df = {rare: 1, common: 9}
+    scores = bm25_scores(
+        [
+            ({rare: 1}, 100),
+            ({common: 1}, 100),
+            ({common: 3}, 100),
+            ({common: 3}, 1000),
+        ],
+        df,
+        total_docs=10,
+        avg_length=100,
+    )
+    assert scores[0] > scores[2] > scores[1]
+    assert scores[2] > scores[3]
+
+
+@pytest.fixture
+def notebook(tmp_path: Path, make_file) -> Path:
+    base = tmp_path / "nb"
+    make_file(base / "a.md", "kubectl once\n" + "filler words\n" * 50)
+    make_file(base / "b.md", "kubectl kubectl kubectl rollout restart\n")
+    make_file(base / "c.md", "helm rollback\n")
+    make_file(base / "d.md", "unrelated\n")
+    return base
+
+
+def paths_of(display_index):
+    return [Path(v["absolute_path"]).name for v in display_index.values()]
+
+
+def test_search_files_and_or_and_regex(notebook, capsys):
+    assert paths_of(
+        search_files(str(notebook), Query.parse(["kubectl", "restart"]))
+    ) == ["b.md"]
+    assert paths_of(
+        search_files(str(notebook), Query.parse(["kubectl", "OR", "helm"]))
+    ) == ["a.md", "b.md", "c.md"]
+    assert paths_of(
+        search_files(str(notebook), Query.parse(["/^helm roll(back|out)$/"]))
+    ) == ["c.md"]
+    capsys.readouterr()
+
+
+def test_search_files_rank_and_limit(notebook, capsys):
+    q = Query.parse(["kubectl"])
+    ranked = search_files(str(notebook), q, rank=True)
+    assert paths_of(ranked) == ["b.md", "a.md"]
+    assert paths_of(search_files(str(notebook), q, rank=True, limit=1)) == ["b.md"]
+    assert paths_of(search_files(str(notebook), q, limit=1)) == ["a.md"]
+    out = capsys.readouterr().out
+    assert out.splitlines()[0].startswith("1 /b.md")
+
+
+def test_index_search_with_query_matches_scan(tmp_path, notebook, capsys):
+    index = SearchIndex(str(tmp_path), str(notebook))
+    index.refresh()
+    for args in (
+        ["kubectl", "restart"],
+        ["kubectl", "OR", "helm"],
+        ["roll", "OR", "/unrel/"],
+        ["/k.bectl/", "once"],
+    ):
+        q = Query.parse(args)
+        scanned = [v["absolute_path"] for v in search_files(str(notebook), q).values()]
+        assert index.search(q) == scanned, args
+    index.close()
+    capsys.readouterr()
+
+
+def test_index_ranking_matches_scan(tmp_path, notebook, monkeypatch, capsys, make_file):
+    # "kubectl" is common across the notebook and "rare" is not, so the note
+    # with more "rare" wins only if idf is taken over every note.
+    make_file(notebook / "e.md", "kubectl kubectl kubectl rare\n")
+    make_file(notebook / "f.md", "kubectl rare rare rare\n")
+    for i in range(4):
+        make_file(notebook / f"g{i}.md", "kubectl\n")
+    index = SearchIndex(str(tmp_path), str(notebook))
+    index.refresh()
+    reads = []
+    real = search_index.scan_query
+    monkeypatch.setattr(
+        search_index,
+        "scan_query",
+        lambda path, *a, **kw: reads.append(path) or real(path, *a, **kw),
+    )
+    for args, only in (
+        (["kubectl", "rare"], None),
+        (["kubectl", "OR", "helm"], None),
+        (["roll"], None),
+        (["/k.bectl/", "OR", "rare"], None),
+        (["kubectl"], {str(notebook / n) for n in ("a.md", "b.md", "e.md")}),
+    ):
+        q = Query.parse(args)
+        ranked = search_files(str(notebook), q, rank=True, only_paths=only)
+        scanned = [v["absolute_path"] for v in ranked.values()]
+        reads.clear()
+        assert index.ranked(q, only) == scanned, args
+        assert len(reads) == len(set(reads)), args
+    assert [Path(p).name for p in index.ranked(Query.parse(["kubectl", "rare"]))] == [
+        "f.md",
+        "e.md",
+    ]
+    index.close()
+    capsys.readouterr()
@@ -0,0 +1,133 @@
+import io
+import os
+from pathlib import Path
+
+import pyperclip
+import pytest
+from click.testing import CliRunner
+
+import noteagator.commands.notes as notes
+from noteagator.config import Config
+from noteagator.render_cache import RenderCache
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> RenderCache:
+    return RenderCache(str(tmp_path), max_bytes=1000)
+
+
+def read(cached) -> str:
+    out = io.StringIO()
+    cached.write_to(out)
+    return out.getvalue()
+
+
+def test_key_depends_on_content_and_every_param():
+    base = RenderCache.key(b"note", fmt="slim", values={"i": "a"})
+    assert base == RenderCache.key(b"note", values={"i": "a"}, fmt="slim")
+    assert base != RenderCache.key(b"note!", fmt="slim", values={"i": "a"})
+    assert base != RenderCache.key(b"note", fmt="markdown", values={"i": "a"})
+    assert base != RenderCache.key(b"note", fmt="slim", values={"i": "b"})
+
+
+def test_put_and_get_round_trip(cache):
+    assert cache.get("k") is None
+    cache.put("k", "héllo\n", copy_text="echo hi")
+    cached = cache.get("k")
+    assert cached.copy_text == "echo hi"
+    assert read(cached) == "héllo\n"
+    cache.put("n", "plain")
+    assert cache.get("n").copy_text is None
+
+
+def test_write_to_binary_buffer(cache):
+    cache.put("k", "héllo\n")
+    raw = io.BytesIO()
+    stream = io.TextIOWrapper(raw, encoding="utf-8")
+    cache.get("k").write_to(stream)
+    assert raw.getvalue() == "héllo\n".encode()
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for n, key in enumerate(["a", "b", "c"]):
+        cache.put(key, "x" * 300)
+        path = os.path.join(cache._dir, key)
+        os.utime(path, ns=(n * 10**9, n * 10**9))
+    read(cache.get("a"))
+    cache.put("d", "x" * 300)
+    assert cache.get("b") is None
+    assert all(cache.get(k) is not None for k in "acd")
+
+
+def test_oversized_output_is_not_cached(cache):
+    assert not cache.put("big", "x" * 2000)
+    assert cache.get("big") is None
+
+
+@pytest.fixture
+def printed_note_text() -> str:
+    return "---\nplaceholders:\n  i: HOST\n---\n# Hi\n```bash\nssh HOST\n```\n"
+
+
+def test_print_serves_repeat_renders_from_cache(printed_note, monkeypatch):
+    copied = []
+    monkeypatch.setattr(pyperclip, "copy", copied.append)
+    runner = CliRunner()
+    args = ["1", "-i", "web1", "--format", "slim", "-c", "1"]
+    first = runner.invoke(notes.prt, args)
+    assert first.exit_code == 0, first.output
+    assert "--copy 1 $ ssh web1" in first.output
+
+    def no_render(*_):
+        raise AssertionError("cached print rendered the note again")
+
+    monkeypatch.setattr(notes, "Note", no_render)
+    second = runner.invoke(notes.prt, args)
+    assert second.exit_code == 0, second.output
+    assert second.output == first.output
+    assert copied == ["ssh web1", "ssh web1"]
+
+    other = runner.invoke(notes.prt, ["1", "-i", "web2", "--format", "slim"])
+    assert isinstance(other.exception, AssertionError)
+
+
+def test_print_misses_after_note_changes(printed_note):
+    runner = CliRunner()
+    first = runner.invoke(notes.prt, ["1", "--format", "slim"])
+    printed_note.write_text("changed body\n", encoding="utf-8")
+    second = runner.invoke(notes.prt, ["1", "--format", "slim"])
+    assert first.output != second.output
+    assert "changed body" in second.output
+
+
+def test_identical_notes_at_different_paths_do_not_share_entries(printed_note):
+    copy = printed_note.parent / "sub" / "b.md"
+    copy.parent.mkdir()
+    copy.write_bytes(printed_note.read_bytes())
+    Config().display_index = {
+        "1": {"type": "file", "absolute_path": str(printed_note)},
+        "2": {"type": "file", "absolute_path": str(copy)},
+    }
+    runner = CliRunner()
+    for index, note in (("2", copy), ("1", printed_note), ("2", copy)):
+        result = runner.invoke(notes.prt, [index, "--format", "slim"])
+        assert result.exit_code == 0, result.output
+        assert f"note: {note}" in result.output
+
+
+def test_copy_only_copies_without_rendering(printed_note, monkeypatch):
+    copied = []
+    monkeypatch.setattr(pyperclip, "copy", copied.append)
+
+    def no_render(*_):
+        raise AssertionError("--copy-only rendered the note")
+
+    monkeypatch.setattr(notes, "_render_note", no_render)
+    runner = CliRunner()
+    result = runner.invoke(notes.prt, ["1", "-c", "1", "--copy-only", "-i", "web1"])
+    assert result.exit_code == 0, result.output
+    assert copied == ["ssh web1"]
+    missing = runner.invoke(notes.prt, ["1", "-c", "2", "--copy-only"])
+    assert missing.exit_code == 1
+    assert "No --copy 2 block found." in missing.output
+    assert runner.invoke(notes.prt, ["1", "--copy-only"]).exit_code == 2
@@ -0,0 +1,178 @@
+import os
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import noteagator.commands.notes as notes
+import noteagator.search_index as search_index
+from noteagator.config import Config
+from noteagator.fsutils import search_files
+from noteagator.search_index import SearchIndex, tokenize
+
+
+@pytest.fixture
+def notebook(tmp_path: Path, make_file) -> Path:
+    base = tmp_path / "nb"
+    make_file(base / "k8s.md", "kubectl get pods\nkubectl rollout restart\n")
+    make_file(base / "net" / "nc.md", "Use netcat: nc -lvnp 4444\n")
+    make_file(base / "net" / "dns.md", "dig +short example.com\n")
+    make_file(base / ".git" / "HEAD", "kubectl in git internals\n")
+    return base
+
+
+@pytest.fixture
+def index(tmp_path: Path, notebook: Path):
+    app = tmp_path / "app"
+    app.mkdir()
+    idx = SearchIndex(str(app), str(notebook))
+    idx.refresh()
+    yield idx
+    idx.close()
+
+
+def test_tokenize_lowercases_word_runs():
+    assert tokenize("Hello, WORLD-42 foo_bar") == ["hello", "world", "42", "foo_bar"]
+
+
+def test_search_matches_substring_case_insensitive(index, notebook):
+    assert index.search("KUBE") == [str(notebook / "k8s.md")]
+    assert index.search("netcat") == [str(notebook / "net" / "nc.md")]
+    assert index.search("missing") == []
+
+
+def test_search_skips_git_directory(index):
+    assert all(".git" not in p for p in index.search("internals"))
+
+
+def test_search_with_punctuation_verifies_exact_substring(index, notebook):
+    assert index.search("example.com") == [str(notebook / "net" / "dns.md")]
+    assert index.search("rollout restart") == [str(notebook / "k8s.md")]
+    assert index.search("restart rollout") == []
+    assert index.search("-lvnp 44") == [str(notebook / "net" / "nc.md")]
+
+
+def test_search_agrees_with_cold_scan(index, notebook, capsys):
+    for term in ["kubectl", "n", "e.c", ": ", "pods\n", "4444"]:
+        scanned = search_files(str(notebook), term)
+        expected = [v["absolute_path"] for v in scanned.values()]
+        assert index.search(term) == expected, term
+    capsys.readouterr()
+
+
+def test_refresh_only_reindexes_changed_files(index, notebook, shift_mtime):
+    assert index.refresh() == 0
+
+    path = str(notebook / "k8s.md")
+    Path(path).write_text("helm upgrade --install\n", encoding="utf-8")
+    shift_mtime(path)
+    assert index.refresh() == 1
+    assert index.search("kubectl") == []
+    assert index.search("helm") == [path]
+
+
+def test_refresh_drops_deleted_and_adds_new_files(index, notebook, make_file):
+    os.remove(notebook / "net" / "dns.md")
+    make_file(notebook / "new.md", "brand new dig note\n")
+    assert index.refresh() == 2
+    assert index.search("dig") == [str(notebook / "new.md")]
+
+
+def test_refresh_lists_only_changed_directories(
+    index, notebook, monkeypatch, make_file, shift_mtime
+):
+    ignore_file = make_file(notebook / ".gitignore", "")
+    shift_mtime(notebook, notebook / "net", seconds=-10)
+    index.refresh()
+    listed = []
+    real = search_index.list_dir
+    monkeypatch.setattr(
+        search_index, "list_dir", lambda d, ignore: listed.append(d) or real(d, ignore)
+    )
+
+    nc = str(notebook / "net" / "nc.md")
+    Path(nc).write_text("socat instead\n", encoding="utf-8")
+    shift_mtime(nc)
+    assert index.refresh() == 1
+    assert listed == []
+    assert index.search("socat") == [nc]
+
+    Path(ignore_file).write_text("dns.md\n", encoding="utf-8")
+    shift_mtime(ignore_file)
+    assert index.refresh() == 2
+    assert sorted(listed) == [str(notebook), str(notebook / "net")]
+    assert index.search("dig") == []
+
+
+def test_rebuild_reads_every_file(index):
+    assert index.rebuild() == 3
+    assert index.stats()["files"] == 3
+
+
+def test_index_persists_across_instances(tmp_path, index, notebook):
+    index.close()
+    reopened = SearchIndex(str(tmp_path / "app"), str(notebook))
+    assert reopened.refresh() == 0
+    assert reopened.search("netcat") == [str(notebook / "net" / "nc.md")]
+    reopened.close()
+
+
+def test_changing_base_discards_old_entries(tmp_path, index, make_file):
+    index.close()
+    other = tmp_path / "other"
+    make_file(other / "a.md", "kubectl elsewhere\n")
+    idx = SearchIndex(str(tmp_path / "app"), str(other))
+    assert idx.search("kubectl") == []
+    idx.refresh()
+    assert idx.search("kubectl") == [str(other / "a.md")]
+    idx.close()
+
+
+def test_results_follow_walk_order(tmp_path, make_file):
+    base = tmp_path / "nb"
+    paths = [
+        make_file(base / "z.md", "term"),
+        make_file(base / "a" / "b.md", "term"),
+        make_file(base / "b" / "a.md", "term"),
+    ]
+    idx = SearchIndex(str(tmp_path), str(base))
+    idx.refresh()
+    assert idx.search("term") == [paths[0], paths[1], paths[2]]
+    idx.close()
+
+
+def test_sync_reclaims_index_taken_over_by_another_base(tmp_path, index, notebook):
+    app = str(tmp_path / "app")
+    SearchIndex(app, str(tmp_path)).close()
+    index.sync()
+    index.refresh()
+    fresh = SearchIndex(app, str(notebook))
+    assert fresh.stats()["files"] == 3
+    fresh.close()
+
+
+def test_iter_search_reads_candidates_only_as_needed(index, monkeypatch):
+    read = []
+    real = search_index.file_contains
+    monkeypatch.setattr(
+        search_index, "file_contains", lambda p, t: read.append(p) or real(p, t)
+    )
+    hits = index.iter_search("nc -l")
+    assert next(hits).endswith("nc.md")
+    assert len(read) == 1
+
+
+@pytest.mark.parametrize("args", [["--first"], ["--limit", "1", "--scan"]])
+def test_search_first_saves_partial_display_index(
+    tmp_path, notebook, monkeypatch, args, make_file
+):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    make_file(notebook / "a.md", "kubectl apply\n")
+    cfg = Config()
+    cfg.notebook_base_dir = str(notebook)
+
+    result = CliRunner().invoke(notes.search, ["kubectl", *args])
+    assert result.exit_code == 0, result.output
+    assert result.output.startswith("1 /a.md") and result.output.count("\n") == 1
+    saved = Config().display_index
+    assert [v["absolute_path"] for v in saved.values()] == [str(notebook / "a.md")]
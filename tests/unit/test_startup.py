@@ -0,0 +1,79 @@
+import ast
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Cumulative import time allowed for `ngt show-base`, in microseconds. Wall
+# clock varies too much on shared machines, so it is only checked on request.
+IMPORT_BUDGET_US = 150_000
+BUDGET_ENV = "NGT_CHECK_IMPORT_TIME"
+
+HEAVY_MODULES = {
+    "yaml",
+    "pyperclip",
+    "rich",
+    "sqlite3",
+    "socket",
+    "concurrent.futures",
+    "mmap",
+    "noteagator.commands.notes",
+    "noteagator.daemon",
+    "noteagator.fsutils",
+    "noteagator.meta_cache",
+    "noteagator.search_index",
+}
+
+# The console entry point, which first checks for a daemon to forward to.
+_SCRIPT = """
+import sys
+sys.argv = ["ngt", "show-base"]
+from noteagator.cli import run
+try:
+    run()
+finally:
+    print(sorted(sys.modules), file=sys.stderr)
+"""
+
+
+@pytest.fixture
+def show_base_run(tmp_path):
+    env = dict(os.environ, HOME=str(tmp_path))
+    env.pop("NGT_NO_DAEMON", None)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.join(os.path.dirname(__file__), "..", "..", "src")]
+        + [p for p in [env.get("PYTHONPATH")] if p]
+    )
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _import_times(stderr: str) -> dict[str, int]:
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_show_base_does_not_import_heavy_modules(show_base_run):
+    modules = ast.literal_eval(show_base_run.stderr.strip().splitlines()[-1])
+    assert show_base_run.stdout.strip().endswith("notebook")
+    assert not HEAVY_MODULES & set(modules)
+
+
+@pytest.mark.skipif(not os.environ.get(BUDGET_ENV), reason=f"set {BUDGET_ENV}=1")
+def test_show_base_stays_within_import_budget(show_base_run):
+    times = _import_times(show_base_run.stderr)
+    assert "noteagator.cli" in times
+    total = sum(us for name, us in times.items() if name not in sys.stdlib_module_names)
+    assert total < IMPORT_BUDGET_US, f"{total}us spent importing: {times}"
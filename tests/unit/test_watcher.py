@@ -0,0 +1,165 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+import noteagator.meta_cache as meta_cache
+from noteagator.meta_cache import MetadataCache
+from noteagator.query import MetaFilter
+from noteagator.search_index import SearchIndex
+from noteagator.watcher import Watcher, collapse_paths
+
+
+@pytest.fixture
+def notebook(tmp_path: Path, make_file) -> Path:
+    base = tmp_path / "nb"
+    make_file(base / "a.md", "---\ntags: [k8s]\n---\nkubectl\n")
+    make_file(base / "sub" / "b.md", "helm\n")
+    make_file(base / ".git" / "HEAD", "ref\n")
+    return base
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher(request, notebook):
+    w = Watcher(str(notebook), polling=request.param == "polling", poll_interval=0.02)
+    if w.kind != request.param:
+        w.close()
+        pytest.skip("inotify is not available")
+    yield w
+    w.close()
+
+
+def covers(seen, path: str) -> bool:
+    # inotify reports a moved directory itself, polling the files inside it.
+    return any(
+        p == path or path.startswith(p + os.sep) or p.startswith(path + os.sep)
+        for p in seen
+    )
+
+
+def drain_until(subscription, expected, timeout=5.0):
+    seen: set[str] = set()
+    deadline = time.monotonic() + timeout
+    while True:
+        changes = subscription.drain()
+        assert not changes.rescan
+        seen |= set(changes.paths)
+        if all(covers(seen, p) for p in expected) or time.monotonic() > deadline:
+            return seen
+        time.sleep(0.01)
+
+
+def test_collapse_paths_drops_descendants():
+    paths = ["/nb/sub/b.md", "/nb/sub", "/nb/a.md", "/nb/subway.md", "/nb/a.md"]
+    assert collapse_paths(paths) == ("/nb/a.md", "/nb/sub", "/nb/subway.md")
+
+
+def test_new_subscription_starts_with_rescan(watcher):
+    sub = watcher.subscribe()
+    assert sub.drain().rescan
+    assert sub.drain() == ((), False)
+
+
+def test_watcher_reports_file_changes(watcher, notebook, make_file):
+    sub = watcher.subscribe()
+    sub.drain()
+    created = make_file(notebook / "c.md", "new\n")
+    make_file(notebook / "sub" / "b.md", "helm chart\n")
+    os.rename(notebook / "a.md", notebook / "sub" / "a2.md")
+    expected = {
+        created,
+        str(notebook / "sub" / "b.md"),
+        str(notebook / "a.md"),
+        str(notebook / "sub" / "a2.md"),
+    }
+    seen = drain_until(sub, expected)
+    assert all(covers(seen, p) for p in expected)
+
+
+def test_watcher_reports_directory_moves_and_deletes(
+    watcher, notebook, tmp_path, make_file
+):
+    sub = watcher.subscribe()
+    sub.drain()
+    os.rename(notebook / "sub", tmp_path / "moved")
+    new_dir = notebook / "new"
+    make_file(new_dir / "deep" / "c.md", "x\n")
+    seen = drain_until(sub, {str(notebook / "sub" / "b.md"), str(new_dir)})
+    assert covers(seen, str(notebook / "sub" / "b.md"))
+    assert covers(seen, str(new_dir / "deep" / "c.md"))
+
+
+def test_watcher_ignores_git(watcher, notebook, make_file):
+    sub = watcher.subscribe()
+    sub.drain()
+    make_file(notebook / ".git" / "index", "changed\n")
+    make_file(notebook / "a.md", "kubectl edited\n")
+    seen = drain_until(sub, {str(notebook / "a.md")})
+    assert not [p for p in seen if ".git" in p]
+
+
+def test_every_subscription_sees_each_change(watcher, notebook, make_file):
+    first, second = watcher.subscribe(), watcher.subscribe()
+    first.drain(), second.drain()
+    path = make_file(notebook / "c.md", "new\n")
+    assert path in drain_until(first, {path})
+    assert path in drain_until(second, {path})
+
+
+def test_watched_index_refreshes_incrementally(
+    tmp_path, watcher, notebook, monkeypatch, make_file
+):
+    index = SearchIndex(str(tmp_path), str(notebook))
+    index.watch(watcher.subscribe())
+    assert index.refresh() == 2
+    make_file(notebook / "sub" / "c.md", "helm rollback\n")
+    (notebook / "a.md").unlink()
+
+    def no_walk(*_):
+        raise AssertionError("watched refresh walked the whole notebook")
+
+    monkeypatch.setattr(SearchIndex, "_walk", no_walk)
+    deadline = time.monotonic() + 5
+    changed = 0
+    while changed < 2 and time.monotonic() < deadline:
+        changed += index.refresh()
+        time.sleep(0.01)
+    assert changed == 2
+    assert [Path(p).name for p in index.search("helm")] == ["b.md", "c.md"]
+    assert index.search("kubectl") == []
+    index.close()
+
+
+def test_watched_index_rejects_other_base(tmp_path, watcher):
+    index = SearchIndex(str(tmp_path), str(tmp_path))
+    with pytest.raises(ValueError):
+        index.watch(watcher.subscribe())
+    index.close()
+
+
+def test_watched_metadata_cache_refreshes_incrementally(
+    tmp_path, watcher, notebook, make_file
+):
+    cache = MetadataCache(str(tmp_path))
+    cache.watch(watcher.subscribe())
+    base = str(notebook)
+    assert cache.refresh(base) == 2
+    make_file(notebook / "sub" / "b.md", "---\ntags: k8s\n---\n")
+    deadline = time.monotonic() + 5
+    while not cache.refresh(base) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    found = cache.find(base, [MetaFilter("tags", "k8s")])
+    assert [Path(p).name for p in found] == ["a.md", "b.md"]
+    cache.close()
+
+
+def test_unwatched_metadata_refresh_walks_base(tmp_path, notebook, monkeypatch):
+    calls = []
+    real = meta_cache.files_under
+    monkeypatch.setattr(
+        meta_cache, "files_under", lambda p, *a: calls.append(p) or real(p, *a)
+    )
+    with MetadataCache(str(tmp_path)) as cache:
+        cache.refresh(str(notebook))
+    assert calls == [str(notebook)]